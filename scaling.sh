@@ -0,0 +1 @@
+SCALING_TESTS=1 python3 -m unittest discover -s src -p test_scaling.py "$@"
@@ -0,0 +1,188 @@
+from build import *
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+STAGES = ("markdown_to_blocks","block_to_block_type","text_to_textnodes","to_html","template_fill","file_write")
+
+BLOCK_KINDS = ("paragraph","heading","unordered_list","ordered_list","quote","code")
+
+#name -> corpus parameters; mix weights follow BLOCK_KINDS
+SCENARIOS = {
+    "small_site":{"pages":50,"blocks":20,"inline_density":0.1,"mix":(6,2,1,1,1,1)},
+    "large_pages":{"pages":5,"blocks":2000,"inline_density":0.1,"mix":(6,2,1,1,1,1)},
+    "dense_inline":{"pages":20,"blocks":100,"inline_density":0.6,"mix":(1,0,0,0,0,0)},
+    "lists_and_quotes":{"pages":20,"blocks":100,"inline_density":0.2,"mix":(1,0,3,3,3,0)},
+    "code_heavy":{"pages":20,"blocks":100,"inline_density":0.05,"mix":(2,1,0,0,0,4)},
+}
+
+WORDS = ("elf","ring","shire","mithril","palantir","road","river","tower","song","lore","star","ent","hobbit","king","sword")
+
+def inline_word(rng,inline_density):
+    word = rng.choice(WORDS)
+    if rng.random() >= inline_density:
+        return word
+    match rng.randrange(5):
+        case 0:
+            return f"**{word}**"
+        case 1:
+            return f"_{word}_"
+        case 2:
+            return f"`{word}`"
+        case 3:
+            return f"[{word}](/{word})"
+        case _:
+            return f"![{word}](/images/{word}.png)"
+
+def inline_line(rng,words,inline_density):
+    return " ".join(inline_word(rng,inline_density) for i in range(words))
+
+def generate_block(rng,kind,inline_density):
+    match kind:
+        case "paragraph":
+            return "\n".join(inline_line(rng,12,inline_density) for i in range(rng.randint(1,5)))
+        case "heading":
+            return "#" * rng.randint(2,4) + " " + inline_line(rng,5,inline_density)
+        case "unordered_list":
+            return "\n".join("- " + inline_line(rng,8,inline_density) for i in range(rng.randint(2,8)))
+        case "ordered_list":
+            return "\n".join(f"{i}. " + inline_line(rng,8,inline_density) for i in range(1,rng.randint(2,8) + 1))
+        case "quote":
+            return "\n".join("> " + inline_line(rng,10,inline_density) for i in range(rng.randint(1,4)))
+        case "code":
+            lines = [f"{rng.choice(WORDS)} = {rng.randint(0,999)}" for i in range(rng.randint(2,10))]
+            return "```\n" + "\n".join(lines) + "\n```"
+
+def generate_page_markdown(rng,blocks,inline_density,mix):
+    parts = ["# " + inline_line(rng,4,0)]
+    for kind in rng.choices(BLOCK_KINDS,weights=mix,k=blocks):
+        parts.append(generate_block(rng,kind,inline_density))
+    return "\n\n".join(parts) + "\n"
+
+def generate_corpus(pages,blocks,inline_density,mix,seed=0):
+    #deterministic for a given seed so results are comparable across commits
+    rng = random.Random(seed)
+    return [generate_page_markdown(rng,blocks,inline_density,mix) for i in range(pages)]
+
+def time_stage(function,repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+def bench_template():
+    #the site's own template when run from the repo root
+    try:
+        return shared_templates.get(TEMPLATE_PATH)
+    except OSError:
+        return Template("<title>{{ Title }}</title>{{ Content }}")
+
+def run_scenario(corpus,repeat=3):
+    #time each pipeline stage on its own over the whole corpus
+    template = bench_template()
+    blocks = [block for markdown in corpus for block in markdown_to_blocks(markdown)]
+    typed_blocks = [(block_type,lines) for markdown in corpus for block_type,lines in iter_blocks(markdown)]
+    inline_texts = [" ".join(lines) for block_type,lines in typed_blocks if block_type != BlockType.CODE]
+    #the compact trees and streaming template fill the build uses
+    trees = [markdown_to_html_node(markdown,compact=True) for markdown in corpus]
+    titles = [extract_title(markdown) for markdown in corpus]
+    contents = [tree.to_html() for tree in trees]
+    fill = lambda title,content: "".join(template.iter_render({"Title":title,"Content":content}))
+    pages = [fill(title,content) for title,content in zip(titles,contents)]
+    with tempfile.TemporaryDirectory() as tmp:
+        def write_pages():
+            for i,page in enumerate(pages):
+                with open(os.path.join(tmp,f"{i}.html"),"w") as file:
+                    file.write(page)
+        stages = {
+            "markdown_to_blocks":lambda: [markdown_to_blocks(markdown) for markdown in corpus],
+            "block_to_block_type":lambda: [block_to_block_type(block) for block in blocks],
+            "text_to_textnodes":lambda: [text_to_textnodes(text) for text in inline_texts],
+            "to_html":lambda: [tree.to_html() for tree in trees],
+            "template_fill":lambda: [fill(title,content) for title,content in zip(titles,contents)],
+            "file_write":write_pages,
+        }
+        results = {}
+        for name in STAGES:
+            times = time_stage(stages[name],repeat)
+            results[name] = {"median":statistics.median(times),"min":min(times)}
+    size = sum(len(markdown) for markdown in corpus)
+    return {"pages":len(corpus),"bytes":size,"blocks":len(blocks),"stages":results}
+
+def git_revision():
+    try:
+        return subprocess.run(["git","rev-parse","--short","HEAD"],capture_output=True,text=True,check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(scenarios,repeat=3,seed=0,scale=1.0):
+    results = {}
+    for name in scenarios:
+        params = SCENARIOS[name]
+        pages = max(1,int(params["pages"] * scale))
+        corpus = generate_corpus(pages,params["blocks"],params["inline_density"],params["mix"],seed)
+        results[name] = run_scenario(corpus,repeat)
+    return {
+        "revision":git_revision(),
+        "python":platform.python_version(),
+        "seed":seed,
+        "scale":scale,
+        "repeat":repeat,
+        "scenarios":results,
+    }
+
+def compare_results(old,new,threshold=0.1):
+    #(scenario, stage, old seconds, new seconds) for every stage more than threshold slower
+    regressions = []
+    for name,scenario in new["scenarios"].items():
+        old_scenario = old["scenarios"].get(name)
+        if old_scenario is None:
+            continue
+        for stage,timing in scenario["stages"].items():
+            old_timing = old_scenario["stages"].get(stage)
+            if old_timing is None:
+                continue
+            if timing["min"] > old_timing["min"] * (1 + threshold):
+                regressions.append((name,stage,old_timing["min"],timing["min"]))
+    return regressions
+
+def print_results(results):
+    for name,scenario in results["scenarios"].items():
+        print(f"{name}: {scenario['pages']} pages, {scenario['blocks']} blocks, {scenario['bytes']} bytes")
+        for stage in STAGES:
+            timing = scenario["stages"][stage]
+            print(f"  {stage:<20} {timing['min'] * 1000:9.2f} ms min {timing['median'] * 1000:9.2f} ms median")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each markdown pipeline stage on synthetic corpora.")
+    parser.add_argument("--scenario",action="append",choices=sorted(SCENARIOS),help="scenario to run (repeatable, default all)")
+    parser.add_argument("--repeat",type=int,default=3,help="timed runs per stage (default 3)")
+    parser.add_argument("--seed",type=int,default=0,help="corpus random seed (default 0)")
+    parser.add_argument("--scale",type=float,default=1.0,help="multiply every scenario's page count")
+    parser.add_argument("--output",metavar="FILE",help="write JSON results to FILE")
+    parser.add_argument("--compare",metavar="FILE",help="compare against earlier JSON results")
+    parser.add_argument("--threshold",type=float,default=0.1,help="slowdown that counts as a regression (default 0.1 = 10%%)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    results = run_benchmarks(args.scenario or list(SCENARIOS),args.repeat,args.seed,args.scale)
+    print_results(results)
+    if args.output:
+        with open(args.output,"w") as file:
+            json.dump(results,file,indent=1)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare_results(json.load(file),results,args.threshold)
+        for name,stage,old_time,new_time in regressions:
+            print(f"Regression in {name}/{stage}: {old_time * 1000:.2f} ms -> {new_time * 1000:.2f} ms")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
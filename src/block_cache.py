@@ -0,0 +1,93 @@
+import hashlib
+import os
+
+BLOCK_CACHE_DIR = os.path.join(".cache","blocks")
+BLOCK_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+class BlockCache():
+    #rendered html per block on disk, addressed by a hash of the block and renderer version.
+    #files are written atomically, so worker processes can share one directory
+    def __init__(self,directory=BLOCK_CACHE_DIR,version=0,max_bytes=BLOCK_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self,block_type,lines,salt=""):
+        digest = hashlib.sha256(f"{self.version}\0{salt}\0{block_type.value}\0".encode())
+        for line in lines:
+            digest.update(line.encode())
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def path(self,key):
+        return os.path.join(self.directory,key[:2],key[2:] + ".html")
+
+    def get(self,key):
+        path = self.path(key)
+        try:
+            with open(path,encoding="utf-8") as file:
+                html = file.read()
+        except OSError:
+            self.misses += 1
+            return None
+        #mtime doubles as the last-used time for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return html
+
+    def put(self,key,html):
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path,"w",encoding="utf-8") as file:
+                file.write(html)
+            os.replace(tmp_path,path)
+        except OSError:
+            #a cache that cannot be written just means more misses
+            pass
+
+    def render_block(self,block_type,lines,render,resolve=None,salt=""):
+        #resolved urls end up in the html, so the resolver's key is part of the cache key
+        if resolve is not None:
+            salt = f"{resolve.key}\0{salt}"
+        key = self.key(block_type,lines,salt)
+        html = self.get(key)
+        if html is None:
+            html = render(block_type,lines).to_html(resolve)
+            self.put(key,html)
+        return html
+
+    def evict(self):
+        #drop least recently used entries until the cache fits in max_bytes; returns entries removed
+        entries = []
+        total = 0
+        for dirpath,dirnames,filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(dirpath,filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns,stat.st_size,path))
+                total += stat.st_size
+        entries.sort()
+        removed = 0
+        for mtime,size,path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        return {"hits":self.hits,"misses":self.misses}
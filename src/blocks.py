@@ -0,0 +1,144 @@
+import mmap
+import os
+from enum import Enum
+
+class BlockType(Enum):
+    PARAGRAPH = "paragraph"
+    HEADING = "heading"
+    CODE = "code"
+    QUOTE = "quote"
+    UNORDERED_LIST = "unordered_list"
+    ORDERED_LIST = "ordered_list"
+
+FENCE = "```"
+
+def heading_level(line):
+    #1-6 for "# " to "###### ", otherwise 0
+    level = len(line) - len(line.lstrip("#"))
+    if 1 <= level <= 6 and line[level:level + 1] == " ":
+        return level
+    return 0
+
+def is_closed_fence(line,opening):
+    line = line.rstrip()
+    if opening:
+        return len(line) >= 2 * len(FENCE) and line.endswith(FENCE)
+    return line.endswith(FENCE)
+
+def start_block_type(line):
+    if heading_level(line):
+        return BlockType.HEADING
+    if line.startswith(">"):
+        return BlockType.QUOTE
+    if line.startswith("- "):
+        return BlockType.UNORDERED_LIST
+    if line.startswith("1. "):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+def iter_lines_blocks(lines):
+    #single forward pass over lines, yielding (BlockType, lines) as each block ends.
+    #a quote or list block falls back to a paragraph as soon as one line breaks the pattern
+    block_type = None
+    block = []
+    number = 0
+    for line in lines:
+        if block_type == BlockType.CODE:
+            block.append(line)
+            if is_closed_fence(line,False):
+                yield block_type,block
+                block_type = None
+            continue
+        if not line.strip():
+            if block_type is not None:
+                block[-1] = block[-1].rstrip()
+                yield block_type,block
+                block_type = None
+            continue
+        if block_type is None:
+            line = line.lstrip()
+            block = [line]
+            if line.startswith(FENCE):
+                if is_closed_fence(line,True):
+                    block[-1] = line.rstrip()
+                    yield BlockType.CODE,block
+                else:
+                    block_type = BlockType.CODE
+                continue
+            block_type = start_block_type(line)
+            number = 1
+            continue
+        block.append(line)
+        if block_type == BlockType.QUOTE:
+            if not line.startswith(">"):
+                block_type = BlockType.PARAGRAPH
+        elif block_type == BlockType.UNORDERED_LIST:
+            if not line.startswith("- "):
+                block_type = BlockType.PARAGRAPH
+        elif block_type == BlockType.ORDERED_LIST:
+            number += 1
+            if not line.startswith(f"{number}. "):
+                block_type = BlockType.PARAGRAPH
+    if block_type is not None:
+        #an unclosed fence runs to the end of the document
+        block[-1] = block[-1].rstrip()
+        yield block_type,block
+
+def iter_blocks(markdown):
+    #markdown is a string or a MappedMarkdown, which is decoded one line at a time
+    if isinstance(markdown,MappedMarkdown):
+        return iter_lines_blocks(markdown.lines())
+    return iter_lines_blocks(markdown.split("\n"))
+
+class MappedMarkdown():
+    #read-only memory map of a markdown file. lines are found over the mapped bytes and decoded
+    #one at a time, so parsing holds one block in memory instead of copies of the whole file.
+    #offsets from find are byte offsets; pickling sends the path and the map is reopened
+    def __init__(self,path):
+        self.path = path
+        with open(path,"rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                self.buffer = b""
+            else:
+                self.buffer = mmap.mmap(file.fileno(),0,access=mmap.ACCESS_READ)
+
+    def __reduce__(self):
+        return MappedMarkdown,(self.path,)
+
+    def lines(self):
+        #same lines as open(path).read().split("\n"), including universal newlines
+        buffer = self.buffer
+        start = 0
+        while True:
+            newline = buffer.find(b"\n",start)
+            end = len(buffer) if newline == -1 else newline
+            line = buffer[start:end].decode("utf-8")
+            if newline != -1 and line.endswith("\r"):
+                line = line[:-1]
+            if "\r" in line:
+                yield from line.replace("\r\n","\n").replace("\r","\n").split("\n")
+            else:
+                yield line
+            if newline == -1:
+                return
+            start = newline + 1
+
+    def first_line(self):
+        return next(self.lines())
+
+    def find(self,text,start=0):
+        return self.buffer.find(text.encode(),start)
+
+    def count(self,text,start,end):
+        #str.count over a byte range, as used for line numbers
+        text = text.encode()
+        count = 0
+        found = self.buffer.find(text,start,end)
+        while found != -1:
+            count += 1
+            found = self.buffer.find(text,found + len(text),end)
+        return count
+
+    def close(self):
+        if isinstance(self.buffer,mmap.mmap):
+            self.buffer.close()
@@ -0,0 +1,461 @@
+from nodes import *
+from node_utils import *
+from manifest import *
+from templates import *
+from static_sync import sync_tree, fingerprint_tree
+from compress import compress_tree, available_codecs
+from images import ImageSizes
+from pipeline import *
+from search import SearchIndex, page_url, tokenize
+from links import *
+from shards import shard_of
+from static_sync import walk_files
+from urls import *
+import os
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
+import tracemalloc
+from profiling import *
+from block_cache import *
+
+TEMPLATE_PATH = "template.html"
+#sources at least this large are memory-mapped and parsed a block at a time instead of read whole
+MMAP_THRESHOLD = 1 << 20
+
+shared_templates = TemplateCache(TEMPLATE_PATH)
+
+def copy_static(source,destination,checksum=False,hardlink=False,fingerprint=False):
+    #returns the asset map for UrlResolver, empty unless fingerprinting
+    assets = {}
+    if fingerprint:
+        copied,removed,assets = fingerprint_tree(source,destination,hardlink)
+    else:
+        copied,removed = sync_tree(source,destination,checksum,hardlink)
+    for rel_path in copied:
+        print(os.path.join(destination,rel_path))
+    for rel_path in removed:
+        print(f"Removed stale file {os.path.join(destination,rel_path)}")
+    print(f"{len(copied)} static files copied, {len(removed)} removed.")
+    return assets
+
+def precompress(destination,workers=1):
+    codecs = available_codecs()
+    written,removed = compress_tree(destination,workers,codecs)
+    print(f"{len(written)} compressed variants ({', '.join(codecs)}) written, {len(removed)} removed.")
+
+def resolve_templates(templates,resolver):
+    #template links are resolved once per build instead of on every page
+    return {path:Template(resolver.resolve_attributes(template.source),template.name) for path,template in templates.items()}
+
+def iter_page(markdown,template,resolver,block_cache=None,scan=None):
+    #parse eagerly so syntax errors surface before anything is written; mapped sources are the exception.
+    #urls in the content are resolved by the serializer; the template's are already resolved.
+    #scan, if given, is filled for the page checks as the page renders
+    if isinstance(markdown,MappedMarkdown):
+        #large sources are rendered a block at a time as the page is written
+        node = StreamedContent(markdown,block_cache,resolver,scan)
+    else:
+        node = markdown_to_html_node(markdown,block_cache,resolver,compact=True,scan=scan)
+    title = extract_title(markdown)
+    return template.iter_render({"Title":title,"Content":node},resolver)
+
+def render_page(markdown,template,base_path):
+    resolver = UrlResolver(base_path)
+    template = Template(resolver.resolve_attributes(template.source),template.name)
+    return "".join(iter_page(markdown,template,resolver))
+
+def write_page(dest_path,page):
+    try:
+        atomic_write(dest_path,[page])
+    except IOError as e:
+        print(f"Error writing file {dest_path}: {e}")
+
+def generate_page(from_path,template_path,dest_path,base_path):
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}.")
+    #Read source
+    try:
+        with open(from_path) as file:
+            markdown = file.read()
+    except OSError as e:
+        print(f"Source file error: {e}")
+    #Compiled template, read once per build
+    try:
+        template = shared_templates.get(template_path)
+    except OSError as e:
+        print(f"Template file error: {e}")
+    write_page(dest_path,render_page(markdown,template,base_path))
+
+def find_pages(dir_path_content,dest_dir_path):
+    #(source, destination) pairs for every page, in a stable order
+    pages = []
+    for entry in sorted(os.listdir(dir_path_content)):
+        src = os.path.join(dir_path_content,entry)
+        dst = os.path.join(dest_dir_path,entry)
+        if os.path.isfile(src):
+            pages.append((src,str(Path(dst).with_suffix(".html"))))
+        elif os.path.isdir(src):
+            pages.extend(find_pages(src,dst))
+        else:
+            print("Not a file or directory, skipping")
+    return pages
+
+#per-process render state, set once per worker instead of being sent with every page
+_page_context = {}
+
+def init_page_context(templates,resolver,options=None):
+    #options: trace_memory (bool), block_cache (directory or None), search (bool),
+    #link_index (output_paths of the whole site, or None to skip link checking)
+    options = options or {}
+    _page_context["search"] = options.get("search",False)
+    _page_context["link_index"] = options.get("link_index")
+    _page_context["templates"] = resolve_templates(templates,resolver)
+    _page_context["resolver"] = resolver
+    _page_context["trace_memory"] = options.get("trace_memory",False)
+    if _page_context["trace_memory"] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    #set by build_pages when writes go to I/O threads
+    _page_context["writer"] = None
+    _page_context["block_cache"] = None
+    if options.get("block_cache"):
+        _page_context["block_cache"] = BlockCache(options["block_cache"],RENDERER_VERSION)
+
+def page_result(error=None,cache_hits=0,cache_misses=0):
+    return {"error":error,"cache_hits":cache_hits,"cache_misses":cache_misses}
+
+def build_page(job):
+    #render and write one page; errors are returned in the result instead of raised
+    src,dst,markdown,template_path = job
+    try:
+        return render_and_write(dst,markdown,template_path)
+    finally:
+        close_source(markdown)
+
+def render_and_write(dst,markdown,template_path):
+    block_cache = _page_context["block_cache"]
+    writer = _page_context["writer"]
+    hits,misses = (block_cache.hits,block_cache.misses) if block_cache else (0,0)
+    write = None
+    scan = page_scan()
+    try:
+        template = _page_context["templates"][template_path]
+        chunks = iter_page(markdown,template,_page_context["resolver"],block_cache,scan)
+        if writer and not isinstance(markdown,MappedMarkdown):
+            #rendered here, written on an I/O thread while the next page renders
+            write = writer.submit(dst,["".join(chunks)])
+        else:
+            #large mapped pages are streamed to the file rather than joined in memory
+            atomic_write(dst,chunks)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    if block_cache:
+        result = page_result(error,block_cache.hits - hits,block_cache.misses - misses)
+    else:
+        result = page_result(error)
+    if write:
+        result["write"] = write
+    if error is None:
+        add_page_checks(result,markdown,scan)
+    return result
+
+def close_source(markdown):
+    #a mapped source holds a file descriptor until it is closed, not just until it is collected
+    if isinstance(markdown,MappedMarkdown):
+        markdown.close()
+
+def page_scan():
+    #the PageScan the enabled page checks need, or None when they are all off
+    links = _page_context["link_index"] is not None
+    if not links and not _page_context["search"]:
+        return None
+    return PageScan(links,tokenize if _page_context["search"] else None)
+
+def add_page_checks(result,markdown,scan):
+    #search terms and link checks for a page that rendered, from what its render scanned
+    if _page_context["search"]:
+        result["search"] = {"title":extract_title(markdown),"terms":scan.terms}
+    if _page_context["link_index"] is not None:
+        result["links"] = link_lines(markdown,scan.urls)
+        result["broken_links"] = broken_links(result["links"],_page_context["link_index"])
+
+def finish_write(result):
+    #the error of a background write becomes the page's error
+    write = result.pop("write",None)
+    if write is not None and write.exception() is not None:
+        e = write.exception()
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+def profile_page(job):
+    #build_page split into separately timed stages; the result also carries stages and pid
+    src,dst,markdown,template_path = job
+    timer = StageTimer(_page_context["trace_memory"])
+    block_cache = _page_context["block_cache"]
+    resolver = _page_context["resolver"]
+    scan = page_scan()
+    try:
+        template = _page_context["templates"][template_path]
+        if isinstance(markdown,MappedMarkdown):
+            #mapped pages are parsed and rendered as they are written, like build_page does
+            with timer.stage("write"):
+                atomic_write(dst,iter_page(markdown,template,resolver,block_cache,scan))
+        else:
+            #the line scanner splits and types blocks in the same pass
+            with timer.stage("blocks"):
+                blocks = list(iter_blocks(markdown))
+            with timer.stage("inline"):
+                node = blocks_to_compact_tree(blocks,block_cache,resolver,scan)
+            with timer.stage("serialize"):
+                content = node.to_html(resolver)
+            with timer.stage("template"):
+                title = extract_title(markdown)
+                page = "".join(template.iter_render({"Title":title,"Content":content},resolver))
+            with timer.stage("write"):
+                atomic_write(dst,[page])
+        result = page_result()
+        with timer.stage("checks"):
+            add_page_checks(result,markdown,scan)
+    except Exception as e:
+        result = page_result(f"{type(e).__name__}: {e}")
+    finally:
+        close_source(markdown)
+    result["stages"] = timer.stages
+    result["pid"] = os.getpid()
+    return result
+
+def build_pages(jobs,templates,resolver,workers=1,worker=build_page,options=None):
+    #worker's result for each job, in job order.
+    #jobs may be a lazy iterable; pages render while later sources are still being read
+    context = (templates,resolver,options)
+    jobs = iter(jobs)
+    first = list(islice(jobs,2))
+    jobs = chain(first,jobs)
+    if workers <= 1 or len(first) <= 1:
+        init_page_context(*context)
+        with BackgroundWriter() as writer:
+            _page_context["writer"] = writer
+            try:
+                results = [worker(job) for job in jobs]
+            finally:
+                _page_context["writer"] = None
+        return [finish_write(result) for result in results]
+    #worker processes write their own pages, so their writes overlap the other workers' rendering
+    with ProcessPoolExecutor(max_workers=workers,initializer=init_page_context,initargs=context) as executor:
+        return list(bounded_map(executor,worker,submitted(jobs),workers * 4))
+
+def submitted(jobs):
+    #a mapped source is pickled as its path and mapped again by the worker,
+    #so this process's map is closed as soon as the job is submitted
+    for job in jobs:
+        yield job
+        close_source(job[2])
+
+def read_source(page):
+    #(page, markdown, error, read stages) for the page tuple SiteBuilder.build queued
+    timer = StageTimer()
+    try:
+        with timer.stage("read"):
+            if os.path.getsize(page[1]) >= MMAP_THRESHOLD:
+                return page,MappedMarkdown(page[1]),None,timer.stages
+            with open(page[1]) as file:
+                return page,file.read(),None,timer.stages
+    #a source that is not utf-8 fails its own page, not the build
+    except (OSError, ValueError) as e:
+        return page,None,e,timer.stages
+
+class SiteBuilder():
+    #build state kept between builds: compiled templates and the page manifest
+    def __init__(self,content_dir,template_path,dest_dir,base_path,workers=1,layouts_dir=LAYOUTS_DIR,profiler=None,block_cache=None,assets=None,minify=False,search=False,static_dir=None,check_links=True,shard=None):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        self.base_path = base_path
+        #base path plus the fingerprinted asset names from copy_static
+        self.resolver = UrlResolver(base_path,assets)
+        self.workers = workers
+        self.profiler = profiler
+        #a BlockCache shared with the workers through its directory
+        self.block_cache = block_cache
+        self.cache_stats = {"hits":0,"misses":0}
+        #the content serializer emits no whitespace between tags, so minifying templates is enough
+        self.templates = TemplateCache(template_path,layouts_dir,minify)
+        self.manifest_file = manifest_path(dest_dir)
+        self.pages = load_manifest(self.manifest_file)
+        self.search = SearchIndex(dest_dir) if search else None
+        #static files count as link targets too
+        self.static_dir = static_dir
+        self.check_links = check_links
+        #(index, count) to render only the pages shard_of assigns to index
+        self.shard = shard
+        #(source, line, url) found by the last build, including unchanged pages
+        self.broken_links = []
+        #output paths written or removed by the last build
+        self.changed = []
+        #(source, error) for the pages the last build failed on
+        self.errors = []
+
+    def set_assets(self,assets=None,images=None):
+        #pages whose resolved urls or image sizes change are re-rendered by the next build
+        self.resolver = UrlResolver(self.base_path,assets,images)
+
+    def dest_path(self,rel_source):
+        return os.path.join(self.dest_dir,str(Path(rel_source).with_suffix(".html")))
+
+    def site_sources(self):
+        return [os.path.relpath(src,self.content_dir) for src,dst in find_pages(self.content_dir,self.dest_dir)]
+
+    def all_sources(self):
+        #the sources this builder renders: the whole site or its shard of it
+        if self.shard is None:
+            return self.site_sources()
+        index,count = self.shard
+        return [rel_source for rel_source in self.site_sources() if shard_of(rel_source,count) == index]
+
+    def sources_using(self,template_path):
+        return sorted(entry["source"] for entry in self.pages.values() if entry.get("template") == template_path)
+
+    def build(self,rel_sources=None):
+        #only re-render pages whose source, layout, resolved urls or renderer changed.
+        #with rel_sources only those pages are looked at; missing sources have their output removed.
+        #returns a list of (source, error) for pages that failed
+        full = rel_sources is None
+        if full:
+            rel_sources = self.all_sources()
+        old_pages = self.pages
+        new_pages = {} if full else dict(old_pages)
+        used_templates = {}
+        pages = []
+        jobs = []
+        errors = []
+        #failed pages keep their old output rather than being treated as stale
+        failed = set()
+        counts = {"unchanged":0}
+        for rel_source in rel_sources:
+            src = os.path.join(self.content_dir,rel_source)
+            dst = self.dest_path(rel_source)
+            rel_dest = os.path.relpath(dst,self.dest_dir)
+            if not full and not os.path.isfile(src):
+                new_pages.pop(rel_dest,None)
+                continue
+            layout = self.templates.layout_path(rel_source)
+            try:
+                template = self.templates.get(layout)
+            except OSError as e:
+                print(f"Template file error: {e}")
+                errors.append((src,str(e)))
+                new_pages.pop(rel_dest,None)
+                failed.add(rel_dest)
+                continue
+            used_templates[layout] = template
+            pages.append((rel_source,src,dst,rel_dest,layout,template))
+
+        def iter_jobs(io):
+            #sources are read ahead on I/O threads; each job is yielded as soon as its read lands
+            for page,markdown,error,stages in bounded_map(io,read_source,pages):
+                rel_source,src,dst,rel_dest,layout,template = page
+                if error is not None:
+                    errors.append((src,str(error)))
+                    new_pages.pop(rel_dest,None)
+                    failed.add(rel_dest)
+                    continue
+                source = markdown.buffer if isinstance(markdown,MappedMarkdown) else markdown
+                page_hash = hash_page(source,template.digest,self.resolver.key,RENDERER_VERSION)
+                new_pages[rel_dest] = {"source":rel_source,"template":layout,"hash":page_hash}
+                if "links" in old_pages.get(rel_dest,{}):
+                    new_pages[rel_dest]["links"] = old_pages[rel_dest]["links"]
+                #pages missing from the search index are rendered again to index them
+                indexed = self.search is None or rel_dest in self.search.pages
+                if indexed and is_up_to_date(old_pages,self.dest_dir,rel_dest,page_hash):
+                    counts["unchanged"] += 1
+                    close_source(markdown)
+                    continue
+                print(f"Generating page from {src} to {dst} using {layout}.")
+                if self.profiler:
+                    self.profiler.add(src,stages)
+                #only what the results loop needs is kept, so no source outlives its page
+                jobs.append((src,dst,layout))
+                yield (src,dst,markdown,layout)
+
+        self.changed = []
+        link_index = None
+        if self.check_links:
+            #every page this build will leave in place, plus static files; indexed once per build
+            page_dests = {page[3] for page in pages} | (set() if full else new_pages.keys())
+            if self.shard:
+                #pages of the other shards are link targets in the merged site
+                page_dests |= {os.path.relpath(self.dest_path(rel_source),self.dest_dir) for rel_source in self.site_sources()}
+            static_files = walk_files(self.static_dir) if self.static_dir else []
+            link_index = output_paths(page_dests,static_files)
+        options = {
+            "trace_memory":bool(self.profiler and self.profiler.trace_memory),
+            "block_cache":self.block_cache.directory if self.block_cache else None,
+            "search":self.search is not None,
+            "link_index":link_index,
+        }
+        worker = profile_page if self.profiler else build_page
+        with ThreadPoolExecutor(max_workers=IO_THREADS) as io:
+            results = build_pages(iter_jobs(io),used_templates,self.resolver,self.workers,worker,options)
+        unchanged = counts["unchanged"]
+        self.cache_stats = {"hits":0,"misses":0}
+        #rel_dest -> broken links reported by the worker that rendered it
+        checked = {}
+        for (src,dst,layout),result in zip(jobs,results):
+            if self.profiler:
+                self.profiler.add(src,result["stages"],result["pid"])
+            self.cache_stats["hits"] += result["cache_hits"]
+            self.cache_stats["misses"] += result["cache_misses"]
+            error = result["error"]
+            rel_dest = os.path.relpath(dst,self.dest_dir)
+            if error is None:
+                self.changed.append(rel_dest)
+                if "links" in result:
+                    new_pages[rel_dest]["links"] = result["links"]
+                    checked[rel_dest] = result["broken_links"]
+                if self.search:
+                    self.search.update(rel_dest,self.resolver(page_url(rel_dest)),result["search"]["title"],result["search"]["terms"])
+                continue
+            #leave failed pages out of the manifest so they are retried next build
+            del new_pages[rel_dest]
+            failed.add(rel_dest)
+            errors.append((src,error))
+        generated = len(self.changed)
+        removed = remove_stale_outputs(self.dest_dir,old_pages,new_pages.keys() | failed)
+        for rel_dest in removed:
+            print(f"Removed stale page {os.path.join(self.dest_dir,rel_dest)}")
+        self.changed.extend(removed)
+        if self.search:
+            for rel_dest in list(self.search.pages):
+                if rel_dest not in new_pages and rel_dest not in failed:
+                    self.search.remove(rel_dest)
+            shards = self.search.save()
+            print(f"Search index: {len(self.search.pages)} pages, {len(shards)} shards updated.")
+        self.pages = new_pages
+        save_manifest(self.manifest_file,new_pages)
+        print(f"{generated} pages generated, {unchanged} unchanged, {len(removed)} removed.")
+        if self.block_cache and jobs:
+            evicted = self.block_cache.evict()
+            print(f"Block cache: {self.cache_stats['hits']} hits, {self.cache_stats['misses']} misses, {evicted} evicted.")
+        for src,error in errors:
+            print(f"Error generating {src}: {error}")
+        if link_index is not None:
+            self.report_broken_links(link_index,checked)
+        self.errors = errors
+        return errors
+
+    def report_broken_links(self,link_index,checked):
+        #pages that were not rendered are checked from their stored links, their targets may be gone
+        self.broken_links = []
+        for rel_dest,entry in sorted(self.pages.items()):
+            src = os.path.join(self.content_dir,entry["source"])
+            broken = checked.get(rel_dest)
+            if broken is None:
+                broken = broken_links(entry.get("links",[]),link_index)
+            for line,url in broken:
+                self.broken_links.append((src,line,url))
+                print(f"Broken link in {src}:{line}: {url}")
+        if self.broken_links:
+            print(f"{len(self.broken_links)} broken internal links.")
+
+def generate_pages_recursively(dir_path_content,template_path,dest_dir_path,base_path,workers=1,layouts_dir=LAYOUTS_DIR):
+    return SiteBuilder(dir_path_content,template_path,dest_dir_path,base_path,workers,layouts_dir).build()
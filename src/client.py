@@ -0,0 +1,45 @@
+import json
+import os
+import socket
+import sys
+
+#only the standard library is imported here, so asking a running daemon costs little more than interpreter startup
+SOCKET_PATH = os.path.join(".cache","build.sock")
+CLIENT_COMMANDS = ("build","status","stop")
+
+def send_message(file,message):
+    file.write(json.dumps(message).encode() + b"\n")
+    file.flush()
+
+def read_message(file):
+    line = file.readline()
+    if not line:
+        raise ConnectionError("connection closed without a reply")
+    return json.loads(line)
+
+def request(command,socket_path=SOCKET_PATH):
+    #one JSON line each way
+    with socket.socket(socket.AF_UNIX,socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile("rwb") as file:
+            send_message(file,{"command":command})
+            return read_message(file)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "build"
+    socket_path = argv[1] if len(argv) > 1 else SOCKET_PATH
+    if command not in CLIENT_COMMANDS:
+        print(f"usage: client.py [{'|'.join(CLIENT_COMMANDS)}] [SOCKET]")
+        sys.exit(2)
+    try:
+        response = request(command,socket_path)
+    except (OSError, ValueError) as e:
+        print(f"No build daemon at {socket_path} ({e}); start one with: python3 src/main.py serve-build")
+        sys.exit(2)
+    sys.stdout.write(response.get("output",""))
+    if response.get("errors"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+from array import array
+
+from nodes import *
+
+#node kinds
+ELEMENT = 0     #<tag> around the next sizes[index] nodes
+TEXT = 1        #text[start:end] as is
+LEAF = 2        #<tag>text[start:end]</tag>
+LINK = 3        #<a href="text[end:url_end]">text[start:end]</a>
+IMAGE = 4       #<img src="text[end:url_end]" alt="text[start:end]" ...></img>
+LAZY_IMAGE = 5  #an IMAGE below the fold, with loading="lazy"
+
+TAGS = (None,"div","p","h1","h2","h3","h4","h5","h6","pre","code","blockquote","ul","ol","li","b","i","a","img")
+TAG_IDS = {tag:tag_id for tag_id,tag in enumerate(TAGS)}
+INLINE_TAGS = {TextType.BOLD:"b",TextType.ITALIC:"i",TextType.CODE:"code"}
+
+class CompactTree():
+    #a document tree as parallel arrays in document order instead of one object per node.
+    #node i's children are the nodes i + 1 to i + sizes[i]; leaf text and urls are offsets
+    #into one text buffer, with a link's or image's url stored right after its text
+    def __init__(self):
+        self.kinds = array("B")
+        self.tags = array("B")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.url_ends = array("q")
+        self.sizes = array("q")
+        #image node -> (width, height), for the few images whose size is known
+        self.image_sizes = {}
+        self.chunks = []
+        self.length = 0
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def text(self):
+        if len(self.chunks) > 1:
+            self.chunks = ["".join(self.chunks)]
+        return self.chunks[0] if self.chunks else ""
+
+    def add_text(self,text):
+        #(start, end) of text in the buffer
+        start = self.length
+        if text:
+            self.chunks.append(text)
+            self.length += len(text)
+        return start,self.length
+
+    def add_node(self,kind,tag=None,start=0,end=0,url_end=0):
+        self.kinds.append(kind)
+        self.tags.append(TAG_IDS[tag])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.url_ends.append(url_end)
+        self.sizes.append(0)
+        return len(self.kinds) - 1
+
+    def open(self,tag):
+        #an element whose children are the nodes added until close
+        return self.add_node(ELEMENT,tag)
+
+    def close(self,index):
+        self.sizes[index] = len(self.kinds) - index - 1
+
+    def add_leaf(self,tag,text):
+        start,end = self.add_text(text)
+        return self.add_node(TEXT if tag is None else LEAF,tag,start,end)
+
+    def add_textnode(self,node,resolve=None,lazy=False,urls=None):
+        #same html as text_node_to_html_node plus set_image_attributes, without the node objects.
+        #link and image urls are also appended to urls, when given
+        if node.children and node.text_type in (TextType.BOLD,TextType.ITALIC):
+            index = self.open(INLINE_TAGS[node.text_type])
+            for child in node.children:
+                self.add_textnode(child,resolve,lazy,urls)
+            self.close(index)
+            return
+        match node.text_type:
+            case TextType.PLAIN:
+                self.add_leaf(None,node.text)
+            case TextType.BOLD | TextType.ITALIC | TextType.CODE:
+                self.add_leaf(INLINE_TAGS[node.text_type],node.text)
+            case TextType.LINK | TextType.IMAGE:
+                if urls is not None:
+                    urls.append(node.url)
+                start,end = self.add_text(node.text)
+                url_end = self.add_text(node.url)[1]
+                if node.text_type == TextType.LINK:
+                    self.add_node(LINK,"a",start,end,url_end)
+                    return
+                index = self.add_node(LAZY_IMAGE if lazy else IMAGE,"img",start,end,url_end)
+                size = resolve.image_size(node.url) if resolve else None
+                if size:
+                    self.image_sizes[index] = size
+            case _:
+                raise Exception("Invalid text type")
+
+    def image_props(self,index,text):
+        props = {"src":text[self.ends[index]:self.url_ends[index]],"alt":text[self.starts[index]:self.ends[index]]}
+        size = self.image_sizes.get(index)
+        if size:
+            props["width"] = str(size[0])
+            props["height"] = str(size[1])
+        if self.kinds[index] == LAZY_IMAGE:
+            props["loading"] = "lazy"
+        props["decoding"] = "async"
+        return props
+
+    def iter_html(self,resolve=None):
+        #one walk over the arrays; open elements wait on a stack for the index they end at
+        text = self.text
+        kinds = self.kinds
+        closing = []
+        for index in range(len(kinds)):
+            while closing and closing[-1][0] <= index:
+                yield f"</{closing.pop()[1]}>"
+            kind = kinds[index]
+            tag = TAGS[self.tags[index]]
+            if kind == ELEMENT:
+                if not self.sizes[index]:
+                    raise ValueError("Error: Missing children")
+                closing.append((index + self.sizes[index] + 1,tag))
+                yield f"<{tag}>"
+            elif kind == TEXT:
+                yield text[self.starts[index]:self.ends[index]]
+            elif kind == LEAF:
+                yield f"<{tag}>{text[self.starts[index]:self.ends[index]]}</{tag}>"
+            elif kind == LINK:
+                href = text[self.ends[index]:self.url_ends[index]]
+                if resolve:
+                    href = resolve(href)
+                yield f"<a href=\"{href}\">{text[self.starts[index]:self.ends[index]]}</a>"
+            else:
+                props = self.image_props(index,text)
+                if resolve:
+                    props["src"] = resolve(props["src"])
+                properties = "".join(f" {prop}=\"{value}\"" for prop,value in props.items())
+                yield f"<img{properties}></img>"
+        while closing:
+            yield f"</{closing.pop()[1]}>"
+
+    def to_html(self,resolve=None):
+        return "".join(self.iter_html(resolve))
+
+    def write_html(self,fp,resolve=None):
+        fp.writelines(self.iter_html(resolve))
+
+    def to_html_node(self,index=0):
+        #the subtree at index as ParentNode and LeafNode objects
+        return self.node_at(index,self.text)[0]
+
+    def node_at(self,index,text):
+        #(node, index after its subtree)
+        kind = self.kinds[index]
+        tag = TAGS[self.tags[index]]
+        if kind == ELEMENT:
+            end = index + self.sizes[index] + 1
+            children = []
+            child = index + 1
+            while child < end:
+                node,child = self.node_at(child,text)
+                children.append(node)
+            return ParentNode(tag,children),end
+        value = text[self.starts[index]:self.ends[index]]
+        if kind == LINK:
+            return LeafNode("a",value,{"href":text[self.ends[index]:self.url_ends[index]]}),index + 1
+        if kind in (IMAGE,LAZY_IMAGE):
+            return LeafNode("img",None,self.image_props(index,text)),index + 1
+        return LeafNode(tag,value),index + 1
@@ -0,0 +1,102 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import *
+from static_sync import walk_files
+
+#optional codecs; gzip is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".html",".css",".js",".mjs",".json",".svg",".xml",".txt",".md")
+
+def compress_gzip(data):
+    #mtime=0 keeps the output identical across builds
+    return gzip.compress(data,compresslevel=9,mtime=0)
+
+def available_codecs():
+    #variant suffix -> compress function
+    codecs = {".gz":compress_gzip}
+    if zstandard is not None:
+        codecs[".zst"] = zstandard.ZstdCompressor(level=19).compress
+    if brotli is not None:
+        codecs[".br"] = lambda data: brotli.compress(data,quality=11)
+    return codecs
+
+def is_compressible(rel_path):
+    #skips the build's own hidden manifests
+    return not os.path.basename(rel_path).startswith(".") and rel_path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+def variant_is_fresh(dest_dir,rel_variant,entry,old_entry):
+    if old_entry is None or (old_entry.get("size"),old_entry.get("mtime")) != (entry["size"],entry["mtime"]):
+        return False
+    #a variant that was not worth keeping stays skipped until the source changes
+    return not old_entry.get("kept") or os.path.isfile(os.path.join(dest_dir,rel_variant))
+
+def compress_file(dest_dir,rel_path,suffixes,codecs):
+    #writes each variant that is smaller than the file; returns {suffix: kept}
+    path = os.path.join(dest_dir,rel_path)
+    with open(path,"rb") as file:
+        data = file.read()
+    stat = os.stat(path)
+    kept = {}
+    for suffix in suffixes:
+        compressed = codecs[suffix](data)
+        variant = path + suffix
+        kept[suffix] = len(compressed) < len(data)
+        if not kept[suffix]:
+            if os.path.isfile(variant):
+                os.remove(variant)
+            continue
+        tmp_path = variant + ".tmp"
+        with open(tmp_path,"wb") as file:
+            file.write(compressed)
+        #servers that check sibling freshness compare mtimes
+        os.utime(tmp_path,ns=(stat.st_atime_ns,stat.st_mtime_ns))
+        os.replace(tmp_path,variant)
+    return kept
+
+def compress_tree(dest_dir,workers=1,codecs=None):
+    #write .gz (and .zst/.br when available) next to every compressible file in dest_dir.
+    #returns (written, removed) relative variant paths
+    codecs = codecs or available_codecs()
+    manifest_file = compress_manifest_path(dest_dir)
+    old_variants = load_manifest(manifest_file,"variants")
+    new_variants = {}
+    jobs = []
+    for rel_path in walk_files(dest_dir):
+        if not is_compressible(rel_path):
+            continue
+        stat = os.stat(os.path.join(dest_dir,rel_path))
+        entry = {"source":rel_path,"size":stat.st_size,"mtime":stat.st_mtime_ns}
+        stale = []
+        for suffix in codecs:
+            rel_variant = rel_path + suffix
+            old_entry = old_variants.get(rel_variant)
+            if variant_is_fresh(dest_dir,rel_variant,entry,old_entry):
+                new_variants[rel_variant] = old_entry
+            else:
+                stale.append(suffix)
+        if stale:
+            jobs.append((rel_path,entry,stale))
+    #zlib and the other codecs release the GIL, so threads compress in parallel
+    with ThreadPoolExecutor(max_workers=max(1,workers)) as executor:
+        results = list(executor.map(lambda job: compress_file(dest_dir,job[0],job[2],codecs),jobs))
+    written = []
+    for (rel_path,entry,stale),kept in zip(jobs,results):
+        for suffix in stale:
+            new_variants[rel_path + suffix] = dict(entry,kept=kept[suffix])
+            if kept[suffix]:
+                written.append(rel_path + suffix)
+    #variants of removed outputs, and ones that stopped being worth keeping
+    kept_variants = {rel_variant for rel_variant,entry in new_variants.items() if entry["kept"]}
+    removed = remove_stale_outputs(dest_dir,old_variants,kept_variants)
+    save_manifest(manifest_file,new_variants,"variants")
+    return written,removed
@@ -0,0 +1,109 @@
+import os
+import socket
+import socketserver
+import threading
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+from watch import *
+from client import SOCKET_PATH, send_message, read_message
+
+class BuildDaemon():
+    #a SiteBuilder kept warm between build requests: compiled templates, manifests, image sizes
+    #and a snapshot of the source files, so a request only stats files and renders what changed
+    def __init__(self,builder,static_dir,layouts_dir=LAYOUTS_DIR):
+        self.builder = builder
+        self.static_dir = static_dir
+        self.layouts_dir = layouts_dir
+        self.watcher = None
+        #(source, error) of pages that failed; they are retried on every request until they build
+        self.errors = []
+        self.builds = 0
+
+    def start(self):
+        copy_static(self.static_dir,self.builder.dest_dir)
+        image_sizes = ImageSizes()
+        self.builder.set_assets(images=image_sizes.scan(self.static_dir))
+        self.errors = self.builder.build()
+        self.watcher = SiteWatcher(self.builder,self.static_dir,self.layouts_dir,image_sizes)
+
+    def build(self):
+        #{"output", "changed", "errors"} for the files changed since the previous request
+        output = StringIO()
+        start = time.perf_counter()
+        with redirect_stdout(output):
+            changed = self.watcher.poll()
+            changed.update(src for src,error in self.errors if os.path.isfile(src))
+            if changed:
+                self.builder.errors = []
+                outputs = self.watcher.rebuild(changed)
+                self.errors = self.builder.errors
+            else:
+                outputs = []
+                print("Nothing changed.")
+        self.builds += 1
+        print(f"Build request: {len(outputs)} outputs in {(time.perf_counter() - start) * 1000:.0f} ms.")
+        return {"output":output.getvalue(),"changed":outputs,"errors":[list(error) for error in self.errors]}
+
+    def status(self):
+        output = f"{len(self.builder.pages)} pages in {self.builder.dest_dir}, {self.builds} builds served, {len(self.errors)} failing.\n"
+        return {"output":output,"errors":[list(error) for error in self.errors]}
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon = self.server.daemon
+        try:
+            command = read_message(self.rfile).get("command")
+        except (ConnectionError, ValueError):
+            return
+        match command:
+            case "build":
+                #a failed build is reported to the client, which would otherwise see no reply at all
+                try:
+                    response = daemon.build()
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    response = {"output":f"Build failed: {error}\n","changed":[],"errors":[[None,error]]}
+            case "status":
+                response = daemon.status()
+            case "stop":
+                response = {"output":"Build daemon stopped.\n"}
+                #shutdown waits for serve_forever, which is running this handler
+                threading.Thread(target=self.server.shutdown).start()
+            case _:
+                response = {"output":f"Unknown command {command!r}\n","errors":[[None,"unknown command"]]}
+        send_message(self.wfile,response)
+
+def remove_stale_socket(socket_path):
+    #a socket file nobody answers on is left over from a daemon that died
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX,socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            os.remove(socket_path)
+            return
+    raise OSError(f"a build daemon is already listening on {socket_path}")
+
+def start_build_server(daemon,socket_path=SOCKET_PATH):
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    remove_stale_socket(socket_path)
+    server = socketserver.UnixStreamServer(socket_path,BuildRequestHandler)
+    server.daemon = daemon
+    return server
+
+def serve_build(daemon,socket_path=SOCKET_PATH):
+    #requests are handled one at a time, so builds never overlap
+    daemon.start()
+    server = start_build_server(daemon,socket_path)
+    print(f"Build daemon listening on {socket_path}; request builds with: python3 src/client.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
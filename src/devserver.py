@@ -0,0 +1,220 @@
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+import urllib.parse
+from functools import partial
+from http.server import ThreadingHTTPServer
+
+from watch import *
+
+class DevSite():
+    #renders pages from content/ when they are requested and keeps them in memory.
+    #every request re-stats the page's source and template, so only what changed is re-rendered
+    def __init__(self,content_dir,static_dir,template_path,base_path="/",layouts_dir=LAYOUTS_DIR,image_sizes=None):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.base_path = base_path
+        self.templates = TemplateCache(template_path,layouts_dir)
+        self.image_sizes = image_sizes or ImageSizes()
+        self.resolver = UrlResolver(base_path,None,self.image_sizes.scan(static_dir))
+        #url path -> (key, body, etag)
+        self.pages = {}
+        #static path -> ((mtime, size), etag)
+        self.etags = {}
+        #template path -> (key from template_for, template with resolved urls)
+        self.resolved_templates = {}
+        self.lock = threading.Lock()
+        self.renders = 0
+
+    def site_path(self,url_path):
+        #request path relative to the site root, or None when outside the base path
+        if not url_path.startswith(self.base_path):
+            return None
+        rel_path = url_path[len(self.base_path):]
+        #"////tmp/x" leaves an absolute remainder that os.path.join would let escape the site
+        if rel_path.startswith("/") or os.path.isabs(rel_path) or ".." in rel_path.split("/"):
+            return None
+        return rel_path
+
+    def source_for(self,rel_path):
+        #content file that builds rel_path: "blog/tom/" and "blog/tom/index.html" both map to blog/tom/index.md
+        if not is_under(os.path.join(self.content_dir,rel_path),self.content_dir):
+            return None
+        if rel_path == "" or rel_path.endswith("/"):
+            rel_path += "index.html"
+        if not rel_path.endswith(".html"):
+            if not os.path.isdir(os.path.join(self.content_dir,rel_path)):
+                return None
+            rel_path += "/index.html"
+        stem = rel_path[:-len(".html")]
+        directory = os.path.join(self.content_dir,os.path.dirname(stem))
+        if os.path.isfile(os.path.join(self.content_dir,stem + ".md")):
+            return stem + ".md"
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            return None
+        #find_pages turns any file into a page, not just .md
+        for name in names:
+            if os.path.splitext(name)[0] == os.path.basename(stem) and os.path.isfile(os.path.join(directory,name)):
+                return os.path.join(os.path.dirname(stem),name)
+        return None
+
+    def template_for(self,rel_source):
+        #(template, key) where the key changes whenever the template file does
+        path = self.templates.layout_path(rel_source)
+        stat = os.stat(path)
+        key = (path,stat.st_mtime_ns,stat.st_size,self.resolver.key)
+        cached = self.resolved_templates.get(path)
+        if cached and cached[0] == key:
+            return cached[1],key
+        self.templates.invalidate(path)
+        template = self.templates.get(path)
+        template = Template(self.resolver.resolve_attributes(template.source),path)
+        self.resolved_templates[path] = (key,template)
+        return template,key
+
+    def page(self,rel_path):
+        #(body, etag) for a page, rendered only if its source, template or image sizes changed.
+        #None if no source builds that path; rendering errors are raised
+        with self.lock:
+            rel_source = self.source_for(rel_path)
+            if rel_source is None:
+                return None
+            src = os.path.join(self.content_dir,rel_source)
+            stat = os.stat(src)
+            template,template_key = self.template_for(rel_source)
+            key = (rel_source,stat.st_mtime_ns,stat.st_size,template_key)
+            cached = self.pages.get(rel_path)
+            if cached and cached[0] == key:
+                return cached[1],cached[2]
+            with open(src) as file:
+                markdown = file.read()
+            body = "".join(iter_page(markdown,template,self.resolver)).encode()
+            etag = f"\"{hashlib.sha256(body).hexdigest()[:20]}\""
+            self.pages[rel_path] = (key,body,etag)
+            self.renders += 1
+            return body,etag
+
+    def static_file(self,rel_path):
+        #(path, etag) for a file under static/, hashed once per (mtime, size)
+        path = os.path.normpath(os.path.join(self.static_dir,rel_path))
+        if not is_under(path,self.static_dir) or not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        with self.lock:
+            cached = self.etags.get(path)
+            if cached and cached[0] == (stat.st_mtime_ns,stat.st_size):
+                return path,cached[1]
+            etag = f"\"{hash_file(path)[:20]}\""
+            self.etags[path] = ((stat.st_mtime_ns,stat.st_size),etag)
+            return path,etag
+
+    def invalidate(self,changed):
+        #drop what depends on changed files; pages also re-check their own sources on every request
+        with self.lock:
+            for path in changed:
+                self.etags.pop(os.path.normpath(path),None)
+            if any(not is_under(path,self.content_dir) and not is_under(path,self.static_dir) for path in changed):
+                #a new or removed layout can move pages to another template
+                self.templates.invalidate()
+            if any(is_under(path,self.static_dir) for path in changed):
+                images = self.image_sizes.scan(self.static_dir)
+                if images != self.resolver.images:
+                    self.resolver = UrlResolver(self.base_path,None,images)
+                    self.pages.clear()
+
+class DevHandler(WatchHandler):
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def serve(self,send_body):
+        site = self.server.site
+        url_path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if url_path == RELOAD_PATH:
+            self.send_reload_events()
+            return
+        rel_path = site.site_path(url_path)
+        if rel_path is None:
+            self.send_error(404)
+            return
+        try:
+            page = site.page(rel_path)
+        except Exception as e:
+            self.send_body(500,f"Error rendering {url_path}: {type(e).__name__}: {e}".encode(),"text/plain; charset=utf-8",None,send_body)
+            return
+        if page is not None:
+            body,etag = page
+            if self.not_modified(etag):
+                return
+            script = RELOAD_SCRIPT.encode()
+            if b"</body>" in body:
+                body = body.replace(b"</body>",script + b"</body>",1)
+            else:
+                body += script
+            self.send_body(200,body,"text/html; charset=utf-8",etag,send_body)
+            return
+        static = site.static_file(rel_path)
+        if static is None:
+            self.send_error(404)
+            return
+        path,etag = static
+        if self.not_modified(etag):
+            return
+        with open(path,"rb") as file:
+            body = file.read()
+        self.send_body(200,body,mimetypes.guess_type(path)[0] or "application/octet-stream",etag,send_body)
+
+    def not_modified(self,etag):
+        tags = [tag.strip() for tag in self.headers.get("If-None-Match","").split(",")]
+        if etag not in tags and "*" not in tags:
+            return False
+        self.send_response(304)
+        self.send_header("ETag",etag)
+        self.send_header("Cache-Control","no-cache")
+        self.end_headers()
+        return True
+
+    def send_body(self,status,body,content_type,etag,send_body):
+        self.send_response(status)
+        self.send_header("Content-Type",content_type)
+        self.send_header("Content-Length",str(len(body)))
+        if etag:
+            self.send_header("ETag",etag)
+        #always revalidate; unchanged files cost a 304 and no body
+        self.send_header("Cache-Control","no-cache")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+def start_dev_server(site,port,hub):
+    server = ThreadingHTTPServer(("",port),partial(DevHandler,directory=site.static_dir))
+    server.daemon_threads = True
+    server.site = site
+    server.hub = hub
+    threading.Thread(target=server.serve_forever,daemon=True).start()
+    return server
+
+def serve(site,port=8888,interval=0.2,layouts_dir=LAYOUTS_DIR):
+    #nothing is written to disk; pages render on request and browsers reload on changes
+    hub = ReloadHub()
+    server = start_dev_server(site,port,hub)
+    watched = [site.content_dir,site.static_dir,site.templates.default_path,layouts_dir]
+    files = snapshot(watched)
+    print(f"Serving {site.content_dir} at http://localhost:{port}{site.base_path} from memory.")
+    try:
+        while True:
+            time.sleep(interval)
+            new_files = snapshot(watched)
+            changed = diff_snapshots(files,new_files)
+            files = new_files
+            if changed:
+                site.invalidate(changed)
+                hub.notify()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,91 @@
+import os
+import struct
+
+from manifest import *
+from static_sync import walk_files, asset_url
+
+IMAGE_EXTENSIONS = (".png",".jpg",".jpeg",".gif",".webp")
+IMAGE_CACHE_PATH = os.path.join(".cache","images.json")
+#start of frame markers; every other jpeg segment is skipped
+JPEG_SOF_MARKERS = {0xC0,0xC1,0xC2,0xC3,0xC5,0xC6,0xC7,0xC9,0xCA,0xCB,0xCD,0xCE,0xCF}
+
+def read_jpeg_size(file):
+    #walks the segment headers up to the first frame header, without reading image data
+    while True:
+        byte = file.read(1)
+        while byte and byte != b"\xff":
+            byte = file.read(1)
+        while byte == b"\xff":
+            byte = file.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue
+        header = file.read(2)
+        if len(header) < 2:
+            return None
+        length = struct.unpack(">H",header)[0]
+        if marker in JPEG_SOF_MARKERS:
+            frame = file.read(5)
+            if len(frame) < 5:
+                return None
+            height,width = struct.unpack(">xHH",frame)
+            return width,height
+        file.seek(length - 2,os.SEEK_CUR)
+
+def read_image_size(path):
+    #(width, height) from the file header, or None for unknown or broken images
+    with open(path,"rb") as file:
+        head = file.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II",head[16:24])
+        if head[:6] in (b"GIF87a",b"GIF89a"):
+            return struct.unpack("<HH",head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) >= 30:
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                width,height = struct.unpack("<HH",head[26:30])
+                return width & 0x3FFF,height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = int.from_bytes(head[21:25],"little")
+                return (bits & 0x3FFF) + 1,((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return int.from_bytes(head[24:27],"little") + 1,int.from_bytes(head[27:30],"little") + 1
+            return None
+        if head[:2] == b"\xff\xd8":
+            file.seek(2)
+            return read_jpeg_size(file)
+    return None
+
+class ImageSizes():
+    #image dimensions by content hash, kept across builds; unchanged files are not even hashed
+    def __init__(self,cache_path=IMAGE_CACHE_PATH):
+        self.cache_path = cache_path
+        self.files = load_manifest(cache_path,"images")
+
+    def scan(self,static_dir):
+        #url ("/images/a.png") -> (width, height) for every readable image under static_dir
+        by_hash = {entry["hash"]:entry for entry in self.files.values()}
+        files = {}
+        sizes = {}
+        for rel_path in walk_files(static_dir):
+            if not rel_path.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(static_dir,rel_path)
+            stat = os.stat(path)
+            entry = self.files.get(path)
+            if entry is None or (entry["size"],entry["mtime"]) != (stat.st_size,stat.st_mtime_ns):
+                file_hash = hash_file(path)
+                entry = by_hash.get(file_hash)
+                if entry is None:
+                    size = read_image_size(path)
+                    entry = {"hash":file_hash,"width":size and size[0],"height":size and size[1]}
+                entry = dict(entry,size=stat.st_size,mtime=stat.st_mtime_ns)
+            files[path] = entry
+            if entry["width"] and entry["height"]:
+                sizes[asset_url(rel_path)] = (entry["width"],entry["height"])
+        if files != self.files:
+            self.files = files
+            save_manifest(self.cache_path,files,"images")
+        return sizes
@@ -0,0 +1,108 @@
+from nodes import *
+import re
+
+#everything that can start an inline element; plain text between them is skipped in C
+INLINE_SPECIAL = re.compile(r"\*\*|!\[|[_`\[]")
+LINK_AT = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+EMPHASIS = {"**":TextType.BOLD,"_":TextType.ITALIC}
+
+class InlineFrame():
+    #an open emphasis delimeter and everything parsed since it
+    __slots__ = ("delimeter","children","text")
+
+    def __init__(self,delimeter):
+        self.delimeter = delimeter
+        self.children = []
+        self.text = []
+
+    def add_text(self,text):
+        if text:
+            self.text.append(text)
+
+    def add_node(self,node):
+        self.flush()
+        self.children.append(node)
+
+    def flush(self):
+        #adjacent plain text is collected and joined once
+        if self.text:
+            self.children.append(TextNode("".join(self.text),TextType.PLAIN))
+            self.text = []
+
+    def absorb(self,frame):
+        #an unclosed delimeter turns back into literal text
+        self.add_text(frame.delimeter)
+        for child in frame.children:
+            if child.text_type == TextType.PLAIN:
+                self.add_text(child.text)
+            else:
+                self.add_node(child)
+        self.text.extend(frame.text)
+
+    def close(self):
+        self.flush()
+        if not self.children:
+            return None
+        text_type = EMPHASIS[self.delimeter]
+        if len(self.children) == 1 and self.children[0].text_type == TextType.PLAIN:
+            return TextNode(self.children[0].text,text_type)
+        text = "".join(child.text for child in self.children)
+        return TextNode(text,text_type,children=self.children)
+
+def parse_inline(text):
+    #one left-to-right scan with a delimeter stack; linear in len(text)
+    stack = [InlineFrame(None)]
+    open_delimeters = set()
+    code_can_close = True
+    pos = 0
+    while True:
+        match = INLINE_SPECIAL.search(text,pos)
+        if match is None:
+            break
+        start = match.start()
+        token = match[0]
+        top = stack[-1]
+        top.add_text(text[pos:start])
+        pos = match.end()
+        if token == "`":
+            #once a backtick has no partner, no later one can have one either
+            end = text.find("`",pos) if code_can_close else -1
+            if end == -1:
+                code_can_close = False
+                top.add_text(token)
+            elif end == pos:
+                top.add_text("``")
+                pos = end + 1
+            else:
+                top.add_node(TextNode(text[pos:end],TextType.CODE))
+                pos = end + 1
+        elif token == "[" or token == "![":
+            link = LINK_AT.match(text,pos - 1)
+            if link is None:
+                top.add_text(token)
+            else:
+                text_type = TextType.IMAGE if token == "![" else TextType.LINK
+                top.add_node(TextNode(link[1],text_type,link[2]))
+                pos = link.end()
+        elif token in open_delimeters:
+            while stack[-1].delimeter != token:
+                frame = stack.pop()
+                open_delimeters.discard(frame.delimeter)
+                stack[-1].absorb(frame)
+            frame = stack.pop()
+            open_delimeters.discard(token)
+            node = frame.close()
+            if node is None:
+                stack[-1].add_text(token + token)
+            else:
+                stack[-1].add_node(node)
+        else:
+            open_delimeters.add(token)
+            stack.append(InlineFrame(token))
+    stack[-1].add_text(text[pos:])
+    while len(stack) > 1:
+        frame = stack.pop()
+        stack[-1].absorb(frame)
+    root = stack[0]
+    root.flush()
+    return root.children
@@ -0,0 +1,55 @@
+import functools
+import urllib.parse
+from pathlib import Path
+
+from node_utils import *
+
+def page_links(markdown):
+    #[line, url] of every site-absolute link and image, from the inline TextNode streams
+    return link_lines(markdown,scan_page(markdown,PageScan()).urls)
+
+def link_lines(markdown,urls):
+    #[line, url] for the site-absolute urls of a page's links and images, in document order
+    links = []
+    pos = 0
+    line = 1
+    for url in urls:
+        if not is_internal(url):
+            continue
+        #line numbers come from the source, scanning forward from the previous link.
+        #past the match, so the next link to the same url is found further on
+        target = f"]({url})"
+        found = markdown.find(target,pos)
+        if found != -1:
+            line += markdown.count("\n",pos,found)
+            pos = found + len(target)
+        links.append([line,url])
+    return links
+
+def is_internal(url):
+    return url.startswith("/") and not url.startswith("//")
+
+#pages link to the same few urls over and over
+@functools.lru_cache(maxsize=4096)
+def link_target(url):
+    #path part of a site-absolute url, without query, fragment or percent-encoding
+    return urllib.parse.unquote(urllib.parse.urlsplit(url).path)
+
+def output_paths(page_dests,static_files=()):
+    #every url path the built site answers: pages (with and without index.html, and without
+    #.html as static hosts like GitHub Pages serve them) and static files
+    paths = set()
+    for rel_dest in page_dests:
+        url = "/" + Path(rel_dest).as_posix()
+        paths.add(url)
+        paths.add(url[:-len(".html")])
+        if url.endswith("/index.html"):
+            directory = url[:-len("index.html")]
+            paths.add(directory)
+            paths.add(directory.rstrip("/") or "/")
+    for rel_path in static_files:
+        paths.add("/" + Path(rel_path).as_posix())
+    return frozenset(paths)
+
+def broken_links(links,paths):
+    return [[line,url] for line,url in links if link_target(url) not in paths]
@@ -1,80 +1,136 @@
-from nodes import *
-from node_utils import *
-import shutil
+from build import *
+from watch import watch
+from devserver import DevSite, serve
+from shards import *
+from daemon import serve_build, BuildDaemon, SOCKET_PATH
 import os
-from pathlib import Path
 import sys
+import argparse
+import cProfile
 
-TEMPLATE_PATH = "template.html"
-
-def copy_recursive(source,destination):
-    #copy recursively
-    for entry in os.listdir(source):
-        src = os.path.join(source,entry)
-        dst = os.path.join(destination,entry)
-        if os.path.isfile(src):
-            print(shutil.copy(src,dst))
-        elif os.path.isdir(src):
-            if os.path.exists(dst):
-                shutil.rmtree(dst)
-            os.mkdir(dst)
-            copy_recursive(src,dst)
-        else:
-            print("Not a file or directory, skipping")
-    
-    return
-
-def generate_page(from_path,template_path,dest_path,base_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}.")
-    #Read source
-    try:
-        with open(from_path) as file:
-            markdown = file.read()
-    except OSError as e:
-        print(f"Source file error: {e}")
-    #Read template
-    try:
-        with open(template_path) as file:
-            template = file.read()
-    except OSError as e:
-        print(f"Template file error: {e}")
-    #Convert MD to HTML
-    content = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown)
-    #Create page
-    page = template.replace("{{ Title }}",title).replace("{{ Content }}",content)
-    #set link paths
-    page = page.replace("href=\"/",f"href=\"{base_path}").replace("src=\"/",f"src=\"{base_path}")
+COMMANDS = ("build","watch","serve","merge","serve-build")
 
+def shard_arg(text):
     try:
-        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-        with open(dest_path, 'w') as f:
-            f.write(page)
-    except IOError as e:
-        print(f"Error writing file {dest_path}: {e}")
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
-def generate_pages_recursively(dir_path_content,template_path,dest_dir_path,base_path):
-    for entry in os.listdir(dir_path_content):
-        src = os.path.join(dir_path_content,entry)
-        dst = os.path.join(dest_dir_path,entry)
-        if os.path.isfile(src):
-            dst = Path(dst).with_suffix(".html")
-            generate_page(src,template_path,dst,base_path)
-        elif os.path.isdir(src):
-            if os.path.exists(dst):
-                shutil.rmtree(dst)
-            os.mkdir(dst)
-            generate_pages_recursively(src,template_path,dst,base_path)
-        else:
-            print("Not a file or directory, skipping")
+def parse_args(argv):
+    command = "build"
+    if argv and argv[0] in COMMANDS:
+        command,argv = argv[0],argv[1:]
+    parser = argparse.ArgumentParser(prog=f"main.py {command}",description="Build the site from content/ and static/ into docs/.")
+    parser.add_argument("basepath",nargs="?",default="/",help="URL prefix the site is served under (default /)")
+    parser.add_argument("--layouts",default=LAYOUTS_DIR,metavar="DIR",help="per-directory templates, e.g. DIR/blog.html for content/blog/ (default layouts)")
+    parser.add_argument("--checksum",action="store_true",help="compare static files by content hash instead of size and mtime")
+    parser.add_argument("--hardlink-static",action="store_true",help="hardlink static files into the output instead of copying them")
+    parser.add_argument("-j","--jobs",type=int,default=1,metavar="N",help="render pages with N worker processes (0 = one per CPU)")
+    parser.add_argument("--profile",action="store_true",help="time every stage of every page and report the slowest pages")
+    parser.add_argument("--trace",metavar="FILE",help="write a Chrome trace-event JSON of the page stages to FILE (implies --profile)")
+    parser.add_argument("--cprofile",metavar="FILE",help="write a cProfile dump of the build process to FILE")
+    parser.add_argument("--tracemalloc",action="store_true",help="record peak memory per stage (implies --profile)")
+    #off by default: filling a cold cache costs more than it saves
+    parser.add_argument("--block-cache",action="store_true",help="reuse rendered blocks across builds; pays off on repeated local builds, not on fresh checkouts")
+    parser.add_argument("--block-cache-dir",default=BLOCK_CACHE_DIR,metavar="DIR",help=f"directory for the block cache (default {BLOCK_CACHE_DIR})")
+    parser.add_argument("--block-cache-size",type=int,default=BLOCK_CACHE_MAX_BYTES // (1024 * 1024),metavar="MB",help="evict least recently used blocks above this size (default 64)")
+    parser.add_argument("--no-link-check",action="store_true",help="skip checking internal links and images against the built site")
+    parser.add_argument("--search",action="store_true",help="write a prefix-sharded search index to docs/search/")
+    parser.add_argument("--minify",action="store_true",help="strip comments, whitespace between tags and optional attribute quotes from templates")
+    if command in ("watch","serve"):
+        parser.add_argument("--port",type=int,default=8888,help="port to serve the site on (default 8888)")
+        parser.add_argument("--interval",type=float,default=0.2,help="seconds between checks for changes (default 0.2)")
+    elif command == "serve-build":
+        parser.add_argument("--socket",default=SOCKET_PATH,metavar="PATH",help=f"Unix socket to accept build requests on (default {SOCKET_PATH})")
+    else:
+        parser.add_argument("--precompress",action="store_true",help="write .gz (and .zst/.br when the codec is installed) next to html, css and text outputs")
+        #compression runs in threads (zlib and friends release the GIL), so it gets its own count
+        parser.add_argument("--compress-jobs",type=int,default=0,metavar="N",help="compress with N threads (default 0 = one per CPU)")
+        parser.add_argument("--shard-dir",default=SHARD_DIR,metavar="DIR",help=f"where sharded builds write DIR/<i>-of-<n>/ and merge reads them (default {SHARD_DIR})")
+    if command == "build":
+        parser.add_argument("--fingerprint",action="store_true",help="copy static files to content-hashed names and point every reference at them")
+        parser.add_argument("--shard",type=shard_arg,metavar="I/N",help="render only shard I of N of content/ (by a stable hash of each path); combine the shards with merge")
+    args = parser.parse_args(argv)
+    if command == "build" and args.shard and args.fingerprint:
+        parser.error("--fingerprint cannot be combined with --shard; static files are copied by merge")
+    args.command = command
+    return args
 
-def main():
-    if len(sys.argv) < 2:
-        basepath = "/"
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command == "serve":
+        #renders from content/ on request; docs/ is not touched
+        serve(DevSite("content","static",TEMPLATE_PATH,args.basepath,args.layouts),args.port,args.interval,args.layouts)
+        return
+    workers = cpu_workers(args.jobs)
+    if args.command == "merge":
+        merge(args)
+        return
+    dest_dir = "docs"
+    shard = getattr(args,"shard",None)
+    if shard:
+        #each shard renders its pages into its own root; static files are left to merge
+        dest_dir = shard_root(args.shard_dir,*shard)
+    profiler = None
+    if args.profile or args.trace or args.tracemalloc:
+        profiler = BuildProfiler(args.tracemalloc)
+    block_cache = None
+    if args.block_cache:
+        block_cache = BlockCache(args.block_cache_dir,RENDERER_VERSION,args.block_cache_size * 1024 * 1024)
+    builder = SiteBuilder("content",TEMPLATE_PATH,dest_dir,args.basepath,workers,args.layouts,profiler,block_cache,minify=args.minify,search=args.search,static_dir="static",check_links=not args.no_link_check,shard=shard)
+    if args.command == "watch":
+        watch(builder,"static",args.port,args.interval,args.layouts)
+        return
+    if args.command == "serve-build":
+        serve_build(BuildDaemon(builder,"static",args.layouts),args.socket)
+        return
+    if args.cprofile:
+        #only covers this process; combine with -j 1 to see page rendering
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+    static = ThreadPoolExecutor(max_workers=1)
+    if shard:
+        builder.set_assets(None,ImageSizes().scan("static"))
+        static_copy = None
+    elif args.fingerprint:
+        #pages need the hashed asset names before they can render
+        builder.set_assets(copy_static("static","docs",args.checksum,args.hardlink_static,True),ImageSizes().scan("static"))
+        static_copy = None
     else:
-        basepath = sys.argv[1]
-    copy_recursive("static","docs")
-    generate_pages_recursively("content",TEMPLATE_PATH,"docs",basepath)
+        #static files are copied while the pages render
+        static_copy = static.submit(copy_static,"static","docs",args.checksum,args.hardlink_static)
+        builder.set_assets(None,ImageSizes().scan("static"))
+    errors = builder.build()
+    if static_copy:
+        static_copy.result()
+    static.shutdown()
+    if args.precompress and not shard:
+        precompress("docs",cpu_workers(args.compress_jobs))
+    if args.cprofile:
+        cprofiler.disable()
+        cprofiler.dump_stats(args.cprofile)
+    if profiler:
+        print(profiler.report())
+        if args.trace:
+            profiler.export_trace(args.trace)
+            print(f"Trace written to {args.trace}")
+    if errors:
+        sys.exit(1)
+
+def cpu_workers(jobs):
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+def merge(args):
+    #shard outputs into docs/, then what a normal build does after rendering
+    expected = [os.path.relpath(dst,"docs") for src,dst in find_pages("content","docs")]
+    problems = merge_shards(args.shard_dir,"docs",expected)
+    for problem in problems:
+        print(f"Merge error: {problem}")
+    if problems:
+        sys.exit(1)
+    copy_static("static","docs",args.checksum,args.hardlink_static)
+    if args.precompress:
+        precompress("docs",cpu_workers(args.compress_jobs))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
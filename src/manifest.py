@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = ".manifest.json"
+STATIC_MANIFEST_NAME = ".static-manifest.json"
+COMPRESS_MANIFEST_NAME = ".compress-manifest.json"
+MANIFEST_VERSION = 1
+
+def manifest_path(dest_dir):
+    return os.path.join(dest_dir,MANIFEST_NAME)
+
+def static_manifest_path(dest_dir):
+    return os.path.join(dest_dir,STATIC_MANIFEST_NAME)
+
+def compress_manifest_path(dest_dir):
+    return os.path.join(dest_dir,COMPRESS_MANIFEST_NAME)
+
+def load_manifest(path,section="pages"):
+    #a missing or unreadable manifest just means a full rebuild
+    try:
+        with open(path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest,dict) or manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get(section,{})
+
+def save_manifest(path,entries,section="pages"):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    #dumps without indent runs on the C encoder; the stored link lists make manifests large
+    data = json.dumps({"version":MANIFEST_VERSION,section:entries},sort_keys=True,separators=(",",":"))
+    with open(tmp_path,"w") as file:
+        file.write(data)
+    os.replace(tmp_path,path)
+
+def hash_page(source,template,urls,renderer_version):
+    digest = hashlib.sha256()
+    #source may also be the bytes of a mapped file
+    for part in (source,template,urls,str(renderer_version)):
+        digest.update(part.encode() if isinstance(part,str) else part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def hash_file(path,chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path,"rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_up_to_date(old_pages,dest_dir,rel_dest,page_hash):
+    entry = old_pages.get(rel_dest)
+    if entry is None or entry.get("hash") != page_hash:
+        return False
+    return os.path.isfile(os.path.join(dest_dir,rel_dest))
+
+def remove_stale_outputs(dest_dir,old_pages,new_pages):
+    removed = []
+    for rel_dest in sorted(old_pages):
+        if rel_dest in new_pages:
+            continue
+        path = os.path.join(dest_dir,rel_dest)
+        if os.path.isfile(path):
+            os.remove(path)
+            removed.append(rel_dest)
+        prune_empty_dirs(os.path.dirname(path),dest_dir)
+    return removed
+
+def prune_empty_dirs(directory,stop_dir):
+    stop_dir = os.path.abspath(stop_dir)
+    directory = os.path.abspath(directory)
+    while directory != stop_dir and directory.startswith(stop_dir):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
@@ -0,0 +1,84 @@
+import re
+
+#elements whose content is kept byte for byte
+PRESERVED_TAGS = ("pre","code","textarea","script","style")
+#elements that start a new line anyway, so line breaks next to them never render as a space
+BLOCK_TAGS = frozenset(("html","head","body","title","meta","link","script","style","base","main","header","footer","nav","section","article","aside",
+    "div","p","h1","h2","h3","h4","h5","h6","ul","ol","li","dl","dt","dd","pre","blockquote","figure","figcaption","table","thead","tbody",
+    "tfoot","tr","td","th","form","fieldset","hr","br","noscript","template"))
+#html5 elements that never have content, so "/>" can become ">"
+VOID_TAGS = ("area","base","br","col","embed","hr","img","input","link","meta","source","track","wbr")
+
+TOKEN_PATTERN = re.compile(r"<!--.*?-->|<![^>]*>|<(/?)([a-zA-Z][\w-]*)((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>|[^<]+|<",re.S)
+ATTRIBUTE_PATTERN = re.compile(r"([^\s\"'>/=]+)(?:\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+)))?")
+UNQUOTED_VALUE = re.compile(r"[^\s\"'=<>`]+")
+WHITESPACE = re.compile(r"\s+")
+
+def quote_attribute(value):
+    #template slots are filled after minifying, with values that may contain spaces
+    if UNQUOTED_VALUE.fullmatch(value) and not value.endswith("/") and "{{" not in value:
+        return value
+    return f"\"{value}\""
+
+def minify_tag(name,attributes,closing):
+    if closing:
+        return f"</{name}>"
+    parts = [f"<{name}"]
+    for match in ATTRIBUTE_PATTERN.finditer(attributes):
+        attribute = match[1]
+        value = next((group for group in match.groups()[1:] if group is not None),None)
+        if value is None:
+            parts.append(f" {attribute}")
+        else:
+            parts.append(f" {attribute}={quote_attribute(value)}")
+    if attributes.rstrip().endswith("/") and name.lower() not in VOID_TAGS:
+        #spaced so it cannot become part of an unquoted value
+        parts.append(" /")
+    parts.append(">")
+    return "".join(parts)
+
+def collapse_text(text):
+    #inside text whitespace shrinks to one space
+    return WHITESPACE.sub(" ",text)
+
+def is_line_break(text):
+    return not text.strip() and "\n" in text
+
+def minify_html(html):
+    #for trusted markup such as templates; comments go, whitespace collapses,
+    #attribute quotes are dropped where optional and preserved elements are left alone.
+    #indentation between tags becomes one space between inline elements, which it separates on
+    #the page, and is dropped next to block elements, the document's start and its end
+    parts = []
+    preserved = None
+    #the tag before a line break whose fate depends on the tag after it
+    previous = None
+    pending = False
+    for match in TOKEN_PATTERN.finditer(html):
+        token = match[0]
+        name = match[2] and match[2].lower()
+        if preserved:
+            parts.append(token)
+            if match[1] and name == preserved:
+                preserved = None
+            continue
+        if token.startswith("<!--"):
+            continue
+        if not name and not token.startswith("<") and is_line_break(token):
+            pending = True
+            continue
+        if pending:
+            if previous and previous not in BLOCK_TAGS and name and name not in BLOCK_TAGS:
+                parts.append(" ")
+            pending = False
+        if name:
+            parts.append(minify_tag(match[2],match[3],match[1]))
+            if not match[1] and name in PRESERVED_TAGS and not match[3].rstrip().endswith("/"):
+                preserved = name
+            previous = name
+        elif token.startswith("<!"):
+            parts.append(token)
+            previous = None
+        else:
+            parts.append(collapse_text(token))
+    return "".join(parts)
@@ -1,19 +1,20 @@
 from nodes import *
+from inline import parse_inline
+from blocks import *
+from compact import CompactTree
 import re
 from enum import Enum
 
 LINKS_PATTERN = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
 IMAGES_PATTERN = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
 
-class BlockType(Enum):
-    PARAGRAPH = "paragraph"
-    HEADING = "heading"
-    CODE = "code"
-    QUOTE = "quote"
-    UNORDERED_LIST = "unordered_list"
-    ORDERED_LIST = "ordered_list"
+#bump whenever rendered output changes for the same markdown, so cached builds are invalidated
+RENDERER_VERSION = 4
 
 def text_node_to_html_node(text_node):
+    if text_node.children and text_node.text_type in (TextType.BOLD,TextType.ITALIC):
+        tag = "b" if text_node.text_type == TextType.BOLD else "i"
+        return ParentNode(tag,[text_node_to_html_node(child) for child in text_node.children])
     match text_node.text_type:
         case TextType.PLAIN: 
             return LeafNode(None,text_node.text)
@@ -75,124 +76,262 @@ def split_nodes_regex(old_nodes,pattern,text_type):
     return new_nodes
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text,TextType.PLAIN)]
-    nodes = split_nodes_delimeter(nodes,"**",TextType.BOLD)
-    nodes = split_nodes_delimeter(nodes,"_",TextType.ITALIC)
-    nodes = split_nodes_delimeter(nodes,"`",TextType.CODE)
-    nodes = split_nodes_regex(nodes,IMAGES_PATTERN,TextType.IMAGE)
-    nodes = split_nodes_regex(nodes,LINKS_PATTERN,TextType.LINK)
-    return nodes
+    #single pass; unbalanced delimeters are kept as literal text
+    return parse_inline(text)
 
 def markdown_to_blocks(markdown):
-    lines = markdown.split("\n\n")
-    lines = map(lambda x:x.strip(),lines)
-    lines = list(filter(None,lines))
-    return lines
+    return ["\n".join(lines) for block_type,lines in iter_blocks(markdown)]
 
 def block_to_block_type(block):
-    if re.search(r"^#{1,6} ",block):
-        return BlockType.HEADING
-    elif block[:3] == "```" and block[-3:] == "```":
-        return BlockType.CODE
-    
-    lines = block.split("\n")
-    quote = True
-    ul = True
-    ol = True
-    count = 0
-    for line in lines:
-        count += 1
-        if not line:
-            quote = False
-            ul = False
-            ol = False
-            break
-        if line[0] != ">":
-            quote = False
-        if line[0:2] != "- ":
-            ul = False
-        if line[0:3] != f"{count}. ":
-            ol = False
-    
-    if quote:
-        return BlockType.QUOTE
-    if ul:
-        return BlockType.UNORDERED_LIST
-    if ol:
-        return BlockType.ORDERED_LIST
-    
+    for block_type,lines in iter_blocks(block):
+        return block_type
     return BlockType.PARAGRAPH
 
-def markdown_to_html_node(markdown):
+def block_inline_texts(block_type,lines):
+    #inline markdown of each element the block renders to, with the block syntax stripped
+    match block_type:
+        case BlockType.PARAGRAPH:
+            return [" ".join(lines)]
+        case BlockType.HEADING:
+            return [" ".join(lines).lstrip("# ")]
+        case BlockType.QUOTE:
+            return [" ".join(filter(None,(line[1:].strip() for line in lines)))]
+        case BlockType.UNORDERED_LIST:
+            return [line[2:] for line in lines]
+        case BlockType.ORDERED_LIST:
+            return [line[len(str(number)) + 2:] for number,line in enumerate(lines,1)]
+        case _:
+            raise Exception("Incorrect block type")
+
+def code_block_text(lines):
+    block = "\n".join(lines).strip("`")
+    return block.lstrip("\n")
+
+def block_to_html_node(block_type,lines,scan=None):
+    match block_type:
+        case BlockType.PARAGRAPH:
+            #inline formatting
+            children = text_to_children(block_inline_texts(block_type,lines)[0],scan)
+            #apply tag
+            return ParentNode("p",children)
+        case BlockType.HEADING:
+            count = heading_level(lines[0])
+            #strip and inline formatting
+            children = text_to_children(block_inline_texts(block_type,lines)[0],scan)
+            #apply tag
+            return ParentNode(f"h{count}",children)
+        case BlockType.CODE:
+            #strip and apply tags
+            code_text = LeafNode("code",code_block_text(lines))
+            if scan:
+                scan.add_text(code_text.value)
+            return ParentNode("pre",[code_text])
+        case BlockType.QUOTE:
+            #strip and inline formatting
+            children = text_to_children(block_inline_texts(block_type,lines)[0],scan)
+            return ParentNode("blockquote",children)
+        case BlockType.UNORDERED_LIST:
+            #strip and apply tags
+            items = block_inline_texts(block_type,lines)
+            return ParentNode("ul",[ParentNode("li",text_to_children(item,scan)) for item in items])
+        case BlockType.ORDERED_LIST:
+            #strip and apply tags
+            items = block_inline_texts(block_type,lines)
+            return ParentNode("ol",[ParentNode("li",text_to_children(item,scan)) for item in items])
+        case _:
+            raise Exception("Incorrect block type")
+
+def set_image_attributes(node,resolve=None,lazy=False):
+    #intrinsic size (when resolve knows the image), lazy loading and async decoding for every img
+    if isinstance(node,ParentNode):
+        for child in node.children:
+            set_image_attributes(child,resolve,lazy)
+        return node
+    if node.tag != "img" or node.props is None:
+        return node
+    size = resolve.image_size(node.props["src"]) if resolve else None
+    if size:
+        node.props["width"] = str(size[0])
+        node.props["height"] = str(size[1])
+    if lazy:
+        node.props["loading"] = "lazy"
+    node.props["decoding"] = "async"
+    return node
+
+def may_have_image(block_type,lines):
+    return block_type != BlockType.CODE and any("![" in line for line in lines)
+
+def markdown_to_html_node(markdown,block_cache=None,resolve=None,compact=False,scan=None):
+    #blocks are rendered as the line scanner finishes them.
+    #compact returns a CompactTree, which renders the same html from a few arrays
+    if compact:
+        return blocks_to_compact_tree(iter_blocks(markdown),block_cache,resolve,scan)
+    return ParentNode("div",blocks_to_html_nodes(iter_blocks(markdown),block_cache,resolve,scan))
+
+def add_compact_block(tree,block_type,lines,resolve=None,lazy=False,scan=None):
+    #block_to_html_node and set_image_attributes, appending to tree
+    def add_inline(tag,text):
+        index = tree.open(tag)
+        nodes = text_to_textnodes(text)
+        #the tree collects the urls as it adds the links
+        urls = scan.urls if scan else None
+        for node in nodes:
+            tree.add_textnode(node,resolve,lazy,urls)
+        if scan:
+            scan.add_nodes_text(nodes)
+        tree.close(index)
+    match block_type:
+        case BlockType.PARAGRAPH | BlockType.HEADING | BlockType.QUOTE:
+            tags = {BlockType.PARAGRAPH:"p",BlockType.QUOTE:"blockquote"}
+            tag = tags.get(block_type) or f"h{heading_level(lines[0])}"
+            add_inline(tag,block_inline_texts(block_type,lines)[0])
+        case BlockType.CODE:
+            index = tree.open("pre")
+            text = code_block_text(lines)
+            if scan:
+                scan.add_text(text)
+            tree.add_leaf("code",text)
+            tree.close(index)
+        case BlockType.UNORDERED_LIST | BlockType.ORDERED_LIST:
+            index = tree.open("ul" if block_type == BlockType.UNORDERED_LIST else "ol")
+            for item in block_inline_texts(block_type,lines):
+                add_inline("li",item)
+            tree.close(index)
+        case _:
+            raise Exception("Incorrect block type")
+
+def render_cached_block(block_cache,block_type,lines,resolve=None,lazy=False,scan=None):
+    #html of one block through the cache. a hit is never parsed, so the scan parses it itself
+    rendered = False
+    def render(block_type,lines):
+        nonlocal rendered
+        rendered = True
+        return set_image_attributes(block_to_html_node(block_type,lines,scan),resolve,lazy)
+    html = block_cache.render_block(block_type,lines,render,resolve,"lazy" if lazy else "")
+    if scan and not rendered:
+        scan.add_block(block_type,lines)
+    return html
+
+def iter_rendered_blocks(blocks,block_cache=None,resolve=None,scan=None):
+    #a one-block CompactTree, or the cached html, for each block as the line scanner yields it
+    lazy = False
+    for block_type,lines in blocks:
+        if block_cache is None:
+            tree = CompactTree()
+            add_compact_block(tree,block_type,lines,resolve,lazy,scan)
+            yield tree
+        else:
+            yield render_cached_block(block_cache,block_type,lines,resolve,lazy,scan)
+        lazy = lazy or may_have_image(block_type,lines)
+
+class StreamedContent():
+    #page content that is parsed and rendered block by block while it is being written,
+    #for sources too large to hold as one tree. serializes like markdown_to_html_node
+    def __init__(self,markdown,block_cache=None,resolve=None,scan=None):
+        self.markdown = markdown
+        self.block_cache = block_cache
+        self.resolve = resolve
+        self.scan = scan
+
+    def iter_html(self,resolve=None):
+        yield "<div>"
+        empty = True
+        for block in iter_rendered_blocks(iter_blocks(self.markdown),self.block_cache,self.resolve,self.scan):
+            empty = False
+            yield block if isinstance(block,str) else block.to_html(resolve)
+        if empty:
+            raise ValueError("Error: Missing children")
+        yield "</div>"
+
+def blocks_to_compact_tree(blocks,block_cache=None,resolve=None,scan=None):
+    #blocks_to_html_nodes into one CompactTree; cached blocks become a single html leaf
+    tree = CompactTree()
+    root = tree.open("div")
+    lazy = False
+    for block_type,lines in blocks:
+        if block_cache is None:
+            add_compact_block(tree,block_type,lines,resolve,lazy,scan)
+        else:
+            tree.add_leaf(None,render_cached_block(block_cache,block_type,lines,resolve,lazy,scan))
+        lazy = lazy or may_have_image(block_type,lines)
+    tree.close(root)
+    return tree
+
+def blocks_to_html_nodes(blocks,block_cache=None,resolve=None,scan=None):
+    #resolve is only needed with a cache, whose html has urls resolved already.
+    #images after the first image block are assumed to be below the fold and load lazily
     html_nodes = []
-    for block in markdown_to_blocks(markdown):
-        match block_to_block_type(block):
-            case BlockType.PARAGRAPH:
-                #inline formatting
-                block = block.replace('\n', ' ')
-                children = text_to_children(block)
-                #apply tag
-                html_nodes.append(ParentNode("p",children))
-            case BlockType.HEADING:
-                #strip
-                block = block.replace('\n', ' ')
-                count = len(re.match(r'^#+', block).group(0))
-                head_text = block.lstrip("# ")
-                #inline formatting
-                children = text_to_children(head_text)
-                #apply tag
-                html_nodes.append(ParentNode(f"h{count}",children))
-            case BlockType.CODE:
-                #strip
-                block = block.strip("`")
-                block = block.lstrip("\n")
-                #apply tags
-                code_text = LeafNode("code",block)
-                html_nodes.append(ParentNode("pre",[code_text]))
-            case BlockType.QUOTE:
-                #strip
-                quote_text = ("".join(striplines(block,1))).strip()
-                #inline formatting
-                children = text_to_children(quote_text)
-                html_nodes.append(ParentNode("blockquote",children))
-            case BlockType.UNORDERED_LIST:
-                #strip
-                ul_text = striplines(block,2)
-                #apply tags
-                children = []
-                for line in ul_text:
-                    sub_children = text_to_children(line)
-                    children.append(ParentNode("li",sub_children))
-                html_nodes.append(ParentNode("ul",children))
-            case BlockType.ORDERED_LIST:
-                #strip
-                ol_text = striplines(block,3)
-                #apply tags
-                children = []
-                for line in ol_text:
-                    sub_children = text_to_children(line)
-                    children.append(ParentNode("li",sub_children))
-                html_nodes.append(ParentNode("ol",children))
-            case _:
-                raise Exception("Incorrect block type")
-            
-    return ParentNode("div",html_nodes)
-
-def striplines(text,chars):
-    lines = text.splitlines(keepends=False)
-    modified_lines = []
-    for line in lines:
-        modified_lines.append(line[chars:])
-    return modified_lines
-
-def text_to_children(text):
+    lazy = False
+    for block_type,lines in blocks:
+        if block_cache is None:
+            html_nodes.append(set_image_attributes(block_to_html_node(block_type,lines,scan),resolve,lazy))
+        else:
+            #cached blocks come back as already rendered html
+            html_nodes.append(LeafNode(None,render_cached_block(block_cache,block_type,lines,resolve,lazy,scan)))
+        lazy = lazy or may_have_image(block_type,lines)
+    return html_nodes
+
+def textnodes_text(nodes):
+    #plain text of inline nodes; images contribute their alt text
+    return " ".join(node.text for node in nodes if node.text)
+
+class PageScan():
+    #what the link check and search index need from a page, gathered from the TextNodes the render
+    #already produces instead of parsing the page again: link and image urls in document order,
+    #and {term: count} over the rendered text when tokenize is given
+    def __init__(self,links=True,tokenize=None):
+        self.urls = [] if links else None
+        self.tokenize = tokenize
+        self.terms = {}
+
+    def add_textnodes(self,nodes):
+        if self.urls is not None:
+            self.add_urls(nodes)
+        self.add_nodes_text(nodes)
+
+    def add_urls(self,nodes):
+        for node in nodes:
+            if node.children:
+                self.add_urls(node.children)
+            elif node.text_type == TextType.LINK or node.text_type == TextType.IMAGE:
+                self.urls.append(node.url)
+
+    def add_nodes_text(self,nodes):
+        if self.tokenize:
+            self.add_text(textnodes_text(nodes))
+
+    def add_text(self,text):
+        if self.tokenize:
+            for term in self.tokenize(text):
+                self.terms[term] = self.terms.get(term,0) + 1
+
+    def add_block(self,block_type,lines):
+        #for blocks that are not rendered, such as block cache hits
+        if block_type == BlockType.CODE:
+            self.add_text(code_block_text(lines))
+            return
+        for text in block_inline_texts(block_type,lines):
+            self.add_textnodes(text_to_textnodes(text))
+
+def scan_page(markdown,scan):
+    #a page's scan without rendering it
+    for block_type,lines in iter_blocks(markdown):
+        scan.add_block(block_type,lines)
+    return scan
+
+def text_to_children(text,scan=None):
     text_nodes = text_to_textnodes(text)
+    if scan:
+        scan.add_textnodes(text_nodes)
     html_nodes = []
     for node in text_nodes:
         html_nodes.append(text_node_to_html_node(node))
     return html_nodes
 
 def extract_title(md):
+    #the title is on the first line, which is all a mapped source has to decode
+    if isinstance(md,MappedMarkdown):
+        md = md.first_line()
     if re.search(r"^# ",md):
         return md.splitlines()[0].lstrip("#").strip()
     else:
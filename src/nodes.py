@@ -1,5 +1,7 @@
 from enum import Enum
 
+from urls import URL_PROPS
+
 class TextType(Enum):
     PLAIN = "plain"
     BOLD = "bold"
@@ -9,19 +11,24 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode():
-    def __init__(self,text,text_type,url=None):
+    def __init__(self,text,text_type,url=None,children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        #nested inline nodes, e.g. a link inside bold text; text is their plain text
+        self.children = children
     
     def __eq__(self,other):
         if (self.text == other.text and
             self.text_type == other.text_type and
-            self.url == other.url):
+            self.url == other.url and
+            self.children == other.children):
             return True
         return False
 
     def __repr__(self):
+        if self.children:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, {self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 class HTMLNode():
@@ -34,6 +41,14 @@ class HTMLNode():
     def to_html(self):
         raise NotImplementedError
 
+    def iter_html(self,resolve=None):
+        #chunks of html in document order; subclasses stream, others fall back to to_html.
+        #resolve maps href/src values to their final urls while serializing
+        yield self.to_html()
+
+    def write_html(self,fp,resolve=None):
+        fp.writelines(self.iter_html(resolve))
+
     def props_to_html(self):
         attributes = ""
         if self.props is None:
@@ -55,27 +70,37 @@ class ParentNode(HTMLNode):
     def __init__(self,tag,children,props=None):
         super().__init__(tag,None,children,props)
     
-    def to_html(self):
+    def to_html(self,resolve=None):
+        return "".join(self.iter_html(resolve))
+
+    def iter_html(self,resolve=None):
         if not self.tag:
             raise ValueError("Error: Missing tag")
         if not self.children:
             raise ValueError("Error: Missing children")
-        childtext= ""
+        yield f"<{self.tag}>"
         for child in self.children:
-            childtext += child.to_html()
-        return f"<{self.tag}>{childtext}</{self.tag}>"
+            yield from child.iter_html(resolve)
+        yield f"</{self.tag}>"
     
 class LeafNode(HTMLNode):
     def __init__(self,tag,value,props=None):
         super().__init__(tag,value,None,props)
     
-    def to_html(self):
+    def to_html(self,resolve=None):
+        return "".join(self.iter_html(resolve))
+
+    def iter_html(self,resolve=None):
         if not self.value:
             self.value = ""
         if not self.tag:
-            return str(self.value)
+            yield str(self.value)
+            return
         properties = ""
         if self.props:
             for prop in self.props:
-                properties += f" {prop}=\"{self.props[prop]}\""
-        return f"<{self.tag}{properties}>{self.value}</{self.tag}>"
\ No newline at end of file
+                value = self.props[prop]
+                if resolve and prop in URL_PROPS:
+                    value = resolve(value)
+                properties += f" {prop}=\"{value}\""
+        yield f"<{self.tag}{properties}>{self.value}</{self.tag}>"
\ No newline at end of file
@@ -0,0 +1,55 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+#threads for blocking file reads and writes; they mostly wait on the filesystem
+IO_THREADS = 8
+#items in flight between two stages, so a fast stage cannot run far ahead of a slow one
+QUEUE_DEPTH = 32
+
+def bounded_map(executor,function,items,limit=QUEUE_DEPTH):
+    #like executor.map, but pulls items lazily and keeps at most limit of them in flight
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(function,item))
+        if len(pending) >= limit:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def atomic_write(path,chunks,mode="w"):
+    #readers (and servers) only ever see the old file or the complete new one
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path,mode) as file:
+            file.writelines(chunks)
+        os.replace(tmp_path,path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class BackgroundWriter():
+    #writes files on I/O threads; submit blocks once QUEUE_DEPTH writes are pending
+    def __init__(self,threads=IO_THREADS,depth=QUEUE_DEPTH):
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.slots = threading.BoundedSemaphore(depth)
+
+    def submit(self,path,chunks):
+        self.slots.acquire()
+        future = self.executor.submit(atomic_write,path,chunks)
+        future.add_done_callback(lambda future: self.slots.release())
+        return future
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc_info):
+        self.close()
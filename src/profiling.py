@@ -0,0 +1,105 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PAGE_STAGES = ("read","blocks","inline","serialize","template","write","checks")
+
+class StageTimer():
+    #(stage, start, seconds, peak bytes or None) for each stage of one page
+    def __init__(self,trace_memory=False):
+        self.trace_memory = trace_memory and tracemalloc.is_tracing()
+        self.stages = []
+
+    @contextmanager
+    def stage(self,name):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            peak = None
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - before
+            self.stages.append((name,start,duration,peak))
+
+class BuildProfiler():
+    #per-page, per-stage timings collected from the builder and its workers
+    def __init__(self,trace_memory=False):
+        self.trace_memory = trace_memory
+        self.pages = {}
+
+    def add(self,page,stages,pid=None):
+        pid = pid or os.getpid()
+        events = self.pages.setdefault(page,[])
+        for name,start,duration,peak in stages:
+            events.append((name,start,duration,peak,pid))
+
+    def page_total(self,page):
+        return sum(duration for name,start,duration,peak,pid in self.pages[page])
+
+    def stage_totals(self):
+        totals = {name:0.0 for name in PAGE_STAGES}
+        for events in self.pages.values():
+            for name,start,duration,peak,pid in events:
+                totals[name] = totals.get(name,0.0) + duration
+        return totals
+
+    def stage_peaks(self):
+        peaks = {}
+        for events in self.pages.values():
+            for name,start,duration,peak,pid in events:
+                if peak is not None:
+                    peaks[name] = max(peaks.get(name,0),peak)
+        return peaks
+
+    def slowest(self,count=10):
+        return sorted(self.pages,key=self.page_total,reverse=True)[:count]
+
+    def report(self,count=10):
+        lines = [f"Profiled {len(self.pages)} pages."]
+        totals = self.stage_totals()
+        peaks = self.stage_peaks()
+        lines.append("Stage totals:")
+        for name,seconds in totals.items():
+            line = f"  {name:<10} {seconds * 1000:10.2f} ms"
+            if name in peaks:
+                line += f"  peak {peaks[name] / 1024:10.1f} KiB"
+            lines.append(line)
+        lines.append(f"Slowest {min(count,len(self.pages))} pages:")
+        for page in self.slowest(count):
+            stages = " ".join(f"{name}={duration * 1000:.2f}" for name,start,duration,peak,pid in self.pages[page])
+            lines.append(f"  {self.page_total(page) * 1000:10.2f} ms  {page}  ({stages})")
+        return "\n".join(lines)
+
+    def trace_events(self):
+        #chrome://tracing / Perfetto "complete" events, one track per worker process
+        if not self.pages:
+            return []
+        origin = min(event[1] for events in self.pages.values() for event in events)
+        trace = []
+        for page,events in self.pages.items():
+            for name,start,duration,peak,pid in events:
+                args = {"page":page}
+                if peak is not None:
+                    args["peak_bytes"] = peak
+                trace.append({
+                    "name":name,
+                    "cat":"page",
+                    "ph":"X",
+                    "ts":round((start - origin) * 1e6,3),
+                    "dur":round(duration * 1e6,3),
+                    "pid":pid,
+                    "tid":pid,
+                    "args":args,
+                })
+        trace.sort(key=lambda event:event["ts"])
+        return trace
+
+    def export_trace(self,path):
+        with open(path,"w") as file:
+            json.dump({"traceEvents":self.trace_events(),"displayTimeUnit":"ms"},file)
@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+
+from node_utils import *
+from templates import Template
+from block_cache import BlockCache
+from minify import minify_html
+from urls import UrlResolver
+
+DEFAULT_TEMPLATE = "<!DOCTYPE html><html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+#compiled templates kept per Renderer, least recently used dropped first
+TEMPLATE_CACHE_SIZE = 64
+#rendered blocks kept in memory per Renderer
+BLOCK_CACHE_ENTRIES = 4096
+
+class MemoryBlockCache(BlockCache):
+    #BlockCache kept in a bounded in-memory LRU instead of on disk, shared by threads.
+    #two threads missing the same block both render it; the html is the same either way
+    def __init__(self,max_entries=BLOCK_CACHE_ENTRIES,version=RENDERER_VERSION):
+        super().__init__(None,version)
+        self.max_entries = max_entries
+        self.blocks = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self,key):
+        with self.lock:
+            html = self.blocks.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self.blocks.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self,key,html):
+        with self.lock:
+            self.blocks[key] = html
+            self.blocks.move_to_end(key)
+            while len(self.blocks) > self.max_entries:
+                self.blocks.popitem(last=False)
+
+    def evict(self):
+        return 0
+
+class Renderer():
+    #renders markdown strings to html strings for embedding in other programs.
+    #nothing is read from or written to disk and nothing is printed; errors are raised.
+    #one Renderer can be shared by any number of threads
+    def __init__(self,template=DEFAULT_TEMPLATE,base_path="/",assets=None,images=None,minify=False,block_cache_entries=BLOCK_CACHE_ENTRIES):
+        self.template = template
+        self.minify = minify
+        self.resolver = UrlResolver(base_path,assets,images)
+        self.block_cache = MemoryBlockCache(block_cache_entries) if block_cache_entries else None
+        #template source -> Template with minified source and resolved urls
+        self.templates = OrderedDict()
+        self.lock = threading.Lock()
+
+    def compile(self,source):
+        #compiled once per source string, then shared
+        with self.lock:
+            template = self.templates.get(source)
+            if template is not None:
+                self.templates.move_to_end(source)
+                return template
+        compiled = minify_html(source) if self.minify else source
+        template = Template(self.resolver.resolve_attributes(compiled))
+        with self.lock:
+            self.templates[source] = template
+            while len(self.templates) > TEMPLATE_CACHE_SIZE:
+                self.templates.popitem(last=False)
+        return template
+
+    def render_content(self,markdown):
+        #the page body alone, without a template
+        return markdown_to_html_node(markdown,self.block_cache,self.resolver,compact=True).to_html(self.resolver)
+
+    def render(self,markdown,template=None):
+        #a whole page; template is a template source string, by default the Renderer's own
+        template = self.compile(self.template if template is None else template)
+        node = markdown_to_html_node(markdown,self.block_cache,self.resolver,compact=True)
+        return template.render({"Title":extract_title(markdown),"Content":node},self.resolver)
+
+    def stats(self):
+        return self.block_cache.stats() if self.block_cache else {"hits":0,"misses":0}
@@ -0,0 +1,115 @@
+import heapq
+import json
+import os
+import re
+from pathlib import Path
+
+from node_utils import *
+from manifest import *
+
+SEARCH_DIR = "search"
+SEARCH_MANIFEST_NAME = ".search-manifest.json"
+#shards are named after the first PREFIX_LENGTH characters of their terms
+PREFIX_LENGTH = 2
+TERM_PATTERN = re.compile(r"\w+")
+
+def tokenize(text):
+    return [term.lower() for term in TERM_PATTERN.findall(text)]
+
+def page_terms(markdown):
+    #{term: count} over the text the page renders, taken from the inline TextNode streams
+    return scan_page(markdown,PageScan(False,tokenize)).terms
+
+def page_url(rel_dest):
+    #blog/tom/index.html -> /blog/tom/
+    url = "/" + Path(rel_dest).as_posix()
+    if url.endswith("/index.html"):
+        url = url[:-len("index.html")]
+    return url
+
+def term_prefix(term):
+    return term[:PREFIX_LENGTH]
+
+class SearchIndex():
+    #inverted index under <dest>/search/:
+    #  pages.json   [[url, title], ...] indexed by page id (null for removed pages)
+    #  <prefix>.json {term: [page id, count, page id, count, ...]} for terms starting with prefix
+    #a browser loads pages.json once and then only the shard for what is being typed.
+    #per-page terms are kept in a manifest, so a build only rewrites the shards its pages touch
+    def __init__(self,dest_dir):
+        self.dest_dir = dest_dir
+        self.directory = os.path.join(dest_dir,SEARCH_DIR)
+        self.manifest_file = os.path.join(dest_dir,SEARCH_MANIFEST_NAME)
+        #rel_dest -> {"id", "url", "title", "terms"}
+        self.pages = load_manifest(self.manifest_file)
+        #ids below next_page_id that no page holds, smallest first, so new pages reuse them
+        used = {entry["id"] for entry in self.pages.values()}
+        self.next_page_id = max(used,default=-1) + 1
+        self.free_ids = [page_id for page_id in range(self.next_page_id) if page_id not in used]
+        self.dirty = set()
+        self.pages_changed = False
+
+    def next_id(self):
+        #the smallest id no page holds
+        if self.free_ids:
+            return heapq.heappop(self.free_ids)
+        self.next_page_id += 1
+        return self.next_page_id - 1
+
+    def update(self,rel_dest,url,title,terms):
+        old = self.pages.get(rel_dest)
+        if old and (old["url"],old["title"],old["terms"]) == (url,title,terms):
+            return
+        page_id = old["id"] if old else self.next_id()
+        if old:
+            self.dirty.update(term_prefix(term) for term in old["terms"])
+        self.dirty.update(term_prefix(term) for term in terms)
+        self.pages[rel_dest] = {"id":page_id,"url":url,"title":title,"terms":terms}
+        self.pages_changed = True
+
+    def remove(self,rel_dest):
+        old = self.pages.pop(rel_dest,None)
+        if old:
+            heapq.heappush(self.free_ids,old["id"])
+            self.dirty.update(term_prefix(term) for term in old["terms"])
+            self.pages_changed = True
+
+    def shard_path(self,prefix):
+        return os.path.join(self.directory,prefix + ".json")
+
+    def shards(self,prefixes):
+        #{prefix: {term: postings}} for the given prefixes, in one pass over the pages
+        shards = {prefix:{} for prefix in prefixes}
+        for entry in sorted(self.pages.values(),key=lambda entry:entry["id"]):
+            for term,count in entry["terms"].items():
+                postings = shards.get(term_prefix(term))
+                if postings is not None:
+                    postings.setdefault(term,[]).extend((entry["id"],count))
+        return shards
+
+    def save(self):
+        #writes pages.json and the dirty shards; returns the shards written or removed
+        os.makedirs(self.directory, exist_ok=True)
+        if self.pages_changed or not os.path.isfile(os.path.join(self.directory,"pages.json")):
+            table = [None] * (max((entry["id"] for entry in self.pages.values()),default=-1) + 1)
+            for entry in self.pages.values():
+                table[entry["id"]] = [entry["url"],entry["title"]]
+            write_json(os.path.join(self.directory,"pages.json"),table)
+        written = []
+        for prefix,postings in sorted(self.shards(self.dirty).items()):
+            path = self.shard_path(prefix)
+            if postings:
+                write_json(path,postings)
+            elif os.path.isfile(path):
+                os.remove(path)
+            written.append(prefix)
+        self.dirty = set()
+        self.pages_changed = False
+        save_manifest(self.manifest_file,self.pages)
+        return written
+
+def write_json(path,data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path,"w",encoding="utf-8") as file:
+        json.dump(data,file,ensure_ascii=False,separators=(",",":"),sort_keys=True)
+    os.replace(tmp_path,path)
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import re
+from pathlib import Path
+
+from manifest import *
+from search import SearchIndex, SEARCH_MANIFEST_NAME
+from static_sync import copy_file
+
+SHARD_DIR = "shards"
+SHARD_PATTERN = re.compile(r"(\d+)-of-(\d+)")
+
+def parse_shard(text):
+    #"2/4" -> (2, 4); shards are numbered from 1
+    match = re.fullmatch(r"(\d+)/(\d+)",text.strip())
+    if not match:
+        raise ValueError(f"expected i/n, got {text!r}")
+    index,count = int(match.group(1)),int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {index} is not between 1 and {count}")
+    return index,count
+
+def shard_of(rel_source,count):
+    #stable across machines, Python versions and runs, unlike hash()
+    digest = hashlib.sha256(Path(rel_source).as_posix().encode()).digest()
+    return int.from_bytes(digest[:8],"big") % count + 1
+
+def shard_root(shard_dir,index,count):
+    return os.path.join(shard_dir,f"{index}-of-{count}")
+
+def find_shard_roots(shard_dir):
+    #(roots in shard order, problems); every shard of a single split has to be present
+    splits = {}
+    for name in sorted(os.listdir(shard_dir)) if os.path.isdir(shard_dir) else []:
+        match = SHARD_PATTERN.fullmatch(name)
+        if match and os.path.isdir(os.path.join(shard_dir,name)):
+            splits.setdefault(int(match.group(2)),set()).add(int(match.group(1)))
+    if not splits:
+        return [],[f"no shard outputs in {shard_dir}"]
+    if len(splits) > 1:
+        return [],[f"{shard_dir} mixes splits into {', '.join(str(count) for count in sorted(splits))} shards"]
+    count,indexes = splits.popitem()
+    missing = [index for index in range(1,count + 1) if index not in indexes]
+    if missing:
+        return [],[f"missing shard {shard_root(shard_dir,index,count)}" for index in missing]
+    return [shard_root(shard_dir,index,count) for index in range(1,count + 1)],[]
+
+def merge_shards(shard_dir,dest_dir,expected):
+    #combine the pages and manifests of every shard into dest_dir. expected holds the rel_dest of
+    #every page the site should have. nothing is written unless the shards are complete and disjoint.
+    #returns a list of problems, empty on success
+    roots,problems = find_shard_roots(shard_dir)
+    pages = {}
+    owners = {}
+    for root in roots:
+        for rel_dest,entry in load_manifest(manifest_path(root)).items():
+            if rel_dest in owners:
+                problems.append(f"{rel_dest} was built by both {owners[rel_dest]} and {root}")
+            elif not os.path.isfile(os.path.join(root,rel_dest)):
+                problems.append(f"{rel_dest} is in the manifest of {root} but missing from it")
+            else:
+                owners[rel_dest] = root
+                pages[rel_dest] = entry
+    if roots:
+        for rel_dest in sorted(set(expected) - pages.keys()):
+            problems.append(f"{rel_dest} was not built by any shard")
+    if problems:
+        return problems
+    old_pages = load_manifest(manifest_path(dest_dir))
+    copied = 0
+    for rel_dest,entry in sorted(pages.items()):
+        if is_up_to_date(old_pages,dest_dir,rel_dest,entry["hash"]):
+            continue
+        dst = os.path.join(dest_dir,rel_dest)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        copy_file(os.path.join(owners[rel_dest],rel_dest),dst)
+        copied += 1
+    removed = remove_stale_outputs(dest_dir,old_pages,pages)
+    save_manifest(manifest_path(dest_dir),pages)
+    print(f"{len(pages)} pages merged from {len(roots)} shards: {copied} copied, {len(pages) - copied} unchanged, {len(removed)} removed.")
+    merge_search(roots,dest_dir,pages)
+    return []
+
+def merge_search(roots,dest_dir,pages):
+    #page ids differ between shards, so the index is rebuilt from their per-page terms
+    shard_pages = {}
+    for root in roots:
+        shard_pages.update(load_manifest(os.path.join(root,SEARCH_MANIFEST_NAME)))
+    if not shard_pages:
+        return
+    index = SearchIndex(dest_dir)
+    for rel_dest in list(index.pages):
+        if rel_dest not in shard_pages or rel_dest not in pages:
+            index.remove(rel_dest)
+    for rel_dest,entry in sorted(shard_pages.items()):
+        if rel_dest in pages:
+            index.update(rel_dest,entry["url"],entry["title"],entry["terms"])
+    shards = index.save()
+    print(f"Search index: {len(index.pages)} pages, {len(shards)} shards updated.")
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+from manifest import *
+from urls import UrlResolver, fingerprint_name
+
+def walk_files(root):
+    #relative paths of every file under root, in a stable order
+    files = []
+    for dirpath,dirnames,filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            files.append(os.path.relpath(os.path.join(dirpath,filename),root))
+    return files
+
+def copy_file_data(fsrc,fdst,size):
+    #let the kernel move the bytes: copy_file_range (reflinks on CoW filesystems), then sendfile
+    copied = 0
+    if hasattr(os,"copy_file_range"):
+        try:
+            while copied < size:
+                sent = os.copy_file_range(fsrc.fileno(),fdst.fileno(),size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+        except OSError:
+            pass
+    if copied < size and hasattr(os,"sendfile"):
+        try:
+            os.lseek(fdst.fileno(),copied,os.SEEK_SET)
+            while copied < size:
+                sent = os.sendfile(fdst.fileno(),fsrc.fileno(),copied,size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+        except OSError:
+            pass
+    if copied < size:
+        fsrc.seek(copied)
+        fdst.seek(copied)
+        shutil.copyfileobj(fsrc,fdst)
+
+def copy_file(src,dst):
+    tmp_path = dst + ".tmp"
+    with open(src,"rb",buffering=0) as fsrc, open(tmp_path,"wb",buffering=0) as fdst:
+        copy_file_data(fsrc,fdst,os.fstat(fsrc.fileno()).st_size)
+    #keep the source mtime so the next sync can compare without reading
+    shutil.copystat(src,tmp_path)
+    os.replace(tmp_path,dst)
+
+def link_file(src,dst):
+    tmp_path = dst + ".tmp"
+    try:
+        os.link(src,tmp_path)
+    except OSError:
+        #different filesystem or no hardlink support
+        copy_file(src,dst)
+        return
+    os.replace(tmp_path,dst)
+
+def is_synced(src_stat,dst,entry,old_entry,hardlink):
+    try:
+        dst_stat = os.stat(dst)
+    except OSError:
+        return False
+    if hardlink:
+        return (src_stat.st_dev,src_stat.st_ino) == (dst_stat.st_dev,dst_stat.st_ino)
+    if dst_stat.st_size != src_stat.st_size:
+        return False
+    if "hash" in entry:
+        #size/mtime are not trusted; the recorded content hash has to match
+        return old_entry is not None and old_entry.get("hash") == entry["hash"]
+    return dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+
+def sync_tree(source,destination,checksum=False,hardlink=False):
+    #copy only changed files from source and remove files that were synced before but are gone
+    #returns (copied, removed) relative paths
+    manifest_file = static_manifest_path(destination)
+    old_files = load_manifest(manifest_file,"files")
+    new_files = {}
+    copied = []
+    for rel_path in walk_files(source):
+        src = os.path.join(source,rel_path)
+        dst = os.path.join(destination,rel_path)
+        src_stat = os.stat(src)
+        entry = {"size":src_stat.st_size,"mtime":src_stat.st_mtime_ns}
+        if checksum:
+            entry["hash"] = hash_file(src)
+        new_files[rel_path] = entry
+        if is_synced(src_stat,dst,entry,old_files.get(rel_path),hardlink):
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if hardlink:
+            link_file(src,dst)
+        else:
+            copy_file(src,dst)
+        copied.append(rel_path)
+    removed = remove_stale_outputs(destination,old_files,new_files)
+    save_manifest(manifest_file,new_files,"files")
+    return copied,removed
+
+def asset_url(rel_path):
+    return "/" + Path(rel_path).as_posix()
+
+def fingerprint_tree(source,destination,hardlink=False):
+    #copy static files to content-hashed names (index.3f9a2c1d.css) that can be cached forever.
+    #returns (copied, removed, assets); assets maps "/index.css" to "/index.3f9a2c1d.css"
+    manifest_file = static_manifest_path(destination)
+    old_files = load_manifest(manifest_file,"files")
+    #manifest entries are keyed by output path; look them up by source here
+    old_sources = {entry.get("source",rel_dest):entry for rel_dest,entry in old_files.items()}
+    new_files = {}
+    assets = {}
+    copied = []
+    stylesheets = []
+    for rel_path in walk_files(source):
+        if rel_path.endswith(".css"):
+            #stylesheets point at other assets, so they are named once those are
+            stylesheets.append(rel_path)
+            continue
+        src = os.path.join(source,rel_path)
+        src_stat = os.stat(src)
+        entry = {"source":rel_path,"size":src_stat.st_size,"mtime":src_stat.st_mtime_ns}
+        old_entry = old_sources.get(rel_path)
+        if old_entry and "hash" in old_entry and (old_entry.get("size"),old_entry.get("mtime")) == (entry["size"],entry["mtime"]):
+            entry["hash"] = old_entry["hash"]
+        else:
+            entry["hash"] = hash_file(src)
+        rel_dest = fingerprint_name(rel_path,entry["hash"])
+        new_files[rel_dest] = entry
+        assets[asset_url(rel_path)] = asset_url(rel_dest)
+        dst = os.path.join(destination,rel_dest)
+        #the name is the content, so an existing file of the right size is up to date
+        if os.path.isfile(dst) and os.path.getsize(dst) == src_stat.st_size:
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if hardlink:
+            link_file(src,dst)
+        else:
+            copy_file(src,dst)
+        copied.append(rel_dest)
+    resolver = UrlResolver("/",assets)
+    for rel_path in stylesheets:
+        src = os.path.join(source,rel_path)
+        src_stat = os.stat(src)
+        with open(src,encoding="utf-8") as file:
+            css = resolver.resolve_css(file.read()).encode()
+        entry = {"source":rel_path,"size":src_stat.st_size,"mtime":src_stat.st_mtime_ns,"hash":hashlib.sha256(css).hexdigest()}
+        rel_dest = fingerprint_name(rel_path,entry["hash"])
+        new_files[rel_dest] = entry
+        dst = os.path.join(destination,rel_dest)
+        if not (os.path.isfile(dst) and os.path.getsize(dst) == len(css)):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            tmp_path = dst + ".tmp"
+            with open(tmp_path,"wb") as file:
+                file.write(css)
+            os.replace(tmp_path,dst)
+            copied.append(rel_dest)
+        assets[asset_url(rel_path)] = asset_url(rel_dest)
+    removed = remove_stale_outputs(destination,old_files,new_files)
+    save_manifest(manifest_file,new_files,"files")
+    return copied,removed,assets
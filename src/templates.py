@@ -0,0 +1,101 @@
+import hashlib
+import os
+import re
+
+from minify import minify_html
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+LAYOUTS_DIR = "layouts"
+
+class Template():
+    #a template split once into static chunks with the slots between them
+    def __init__(self,source,name=None):
+        self.source = source
+        self.name = name
+        self.digest = hashlib.sha256(source.encode()).hexdigest()
+        self.pieces = []
+        self.slots = []
+        last_pos = 0
+        for match in SLOT_PATTERN.finditer(source):
+            start,end = match.span()
+            if start > last_pos:
+                self.pieces.append(source[last_pos:start])
+            #keep the original text so unknown slots render unchanged
+            self.slots.append((len(self.pieces),match[1]))
+            self.pieces.append(match[0])
+            last_pos = end
+        if last_pos < len(source):
+            self.pieces.append(source[last_pos:])
+        self.slot_at = dict(self.slots)
+
+    def slot_names(self):
+        return [name for index,name in self.slots]
+
+    def render(self,values,resolve=None):
+        return "".join(self.iter_render(values,resolve))
+
+    def iter_render(self,values,resolve=None):
+        #slot values are strings, or nodes that are streamed with iter_html(resolve)
+        for index,piece in enumerate(self.pieces):
+            name = self.slot_at.get(index)
+            if name is None or name not in values:
+                yield piece
+                continue
+            value = values[name]
+            if hasattr(value,"iter_html"):
+                yield from value.iter_html(resolve)
+            else:
+                yield value
+
+    def __eq__(self,other):
+        return isinstance(other,Template) and self.source == other.source
+
+    def __repr__(self):
+        return f"Template({self.name}, {self.slot_names()})"
+
+class TemplateCache():
+    #compiled templates and layout lookups, kept for the whole build.
+    #with minify, templates are minified once here rather than every page afterwards
+    def __init__(self,default_path,layouts_dir=LAYOUTS_DIR,minify=False):
+        self.default_path = default_path
+        self.layouts_dir = layouts_dir
+        self.minify = minify
+        self.templates = {}
+        self.layouts = {}
+
+    def get(self,path):
+        template = self.templates.get(path)
+        if template is None:
+            with open(path) as file:
+                source = file.read()
+            if self.minify:
+                source = minify_html(source)
+            template = Template(source,path)
+            self.templates[path] = template
+        return template
+
+    def layout_path(self,rel_source):
+        #most specific layouts/<dir>.html for the page's directory, else the default template
+        directory = os.path.dirname(rel_source)
+        if directory in self.layouts:
+            return self.layouts[directory]
+        path = self.default_path
+        #stop at the top, where dirname("/") is "/" again
+        if directory and os.path.dirname(directory) != directory:
+            candidate = os.path.join(self.layouts_dir,directory + ".html")
+            if os.path.isfile(candidate):
+                path = candidate
+            else:
+                path = self.layout_path(directory)
+        self.layouts[directory] = path
+        return path
+
+    def for_page(self,rel_source):
+        return self.get(self.layout_path(rel_source))
+
+    def invalidate(self,path=None):
+        if path is None:
+            self.templates.clear()
+        else:
+            self.templates.pop(path,None)
+        self.layouts.clear()
@@ -0,0 +1,35 @@
+import unittest
+
+from bench import *
+
+class TestCorpus(unittest.TestCase):
+    def test_deterministic(self):
+        self.assertEqual(generate_corpus(3,10,0.2,(1,1,1,1,1,1),seed=7),generate_corpus(3,10,0.2,(1,1,1,1,1,1),seed=7))
+        self.assertNotEqual(generate_corpus(3,10,0.2,(1,1,1,1,1,1),seed=7),generate_corpus(3,10,0.2,(1,1,1,1,1,1),seed=8))
+
+    def test_pages_render(self):
+        for markdown in generate_corpus(5,30,0.5,(1,1,1,1,1,1)):
+            self.assertTrue(markdown.startswith("# "))
+            self.assertEqual(len(markdown_to_blocks(markdown)),31)
+            markdown_to_html_node(markdown).to_html()
+
+    def test_mix_controls_block_types(self):
+        markdown = generate_corpus(1,20,0,(0,0,0,0,0,1))[0]
+        types = [block_to_block_type(block) for block in markdown_to_blocks(markdown)]
+        self.assertEqual(types,[BlockType.HEADING] + [BlockType.CODE] * 20)
+
+class TestRun(unittest.TestCase):
+    def test_every_stage_timed(self):
+        result = run_scenario(generate_corpus(2,5,0.3,(1,1,1,1,1,1)),repeat=1)
+        self.assertEqual(result["pages"],2)
+        self.assertEqual(tuple(result["stages"]),STAGES)
+        for timing in result["stages"].values():
+            self.assertGreaterEqual(timing["median"],timing["min"])
+
+    def test_compare(self):
+        old = {"scenarios":{"s":{"stages":{"to_html":{"min":1.0},"file_write":{"min":1.0}}}}}
+        new = {"scenarios":{"s":{"stages":{"to_html":{"min":1.5},"file_write":{"min":1.05}}},"other":{"stages":{}}}}
+        self.assertEqual(compare_results(old,new,0.1),[("s","to_html",1.0,1.5)])
+
+if __name__ == "__main__":
+    unittest.main()
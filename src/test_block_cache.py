@@ -0,0 +1,85 @@
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from build import *
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = BlockCache(os.path.join(self.tmp.name,"blocks"),RENDERER_VERSION)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key(self):
+        key = self.cache.key(BlockType.PARAGRAPH,["a","b"])
+        self.assertEqual(key,self.cache.key(BlockType.PARAGRAPH,["a","b"]))
+        self.assertNotEqual(key,self.cache.key(BlockType.HEADING,["a","b"]))
+        self.assertNotEqual(key,self.cache.key(BlockType.PARAGRAPH,["ab"]))
+        self.assertNotEqual(key,self.cache.key(BlockType.PARAGRAPH,["a","b"],salt="/ssg/"))
+        self.assertNotEqual(key,BlockCache(self.cache.directory,RENDERER_VERSION + 1).key(BlockType.PARAGRAPH,["a","b"]))
+
+    def test_render_block_hits_and_misses(self):
+        calls = []
+        def render(block_type,lines):
+            calls.append(lines)
+            return block_to_html_node(block_type,lines)
+        self.assertEqual(self.cache.render_block(BlockType.PARAGRAPH,["**hi**"],render),"<p><b>hi</b></p>")
+        self.assertEqual(self.cache.render_block(BlockType.PARAGRAPH,["**hi**"],render),"<p><b>hi</b></p>")
+        self.assertEqual(len(calls),1)
+        self.assertEqual(self.cache.stats(),{"hits":1,"misses":1})
+        #a fresh instance (another build or worker) sees the same entries
+        other = BlockCache(self.cache.directory,RENDERER_VERSION)
+        self.assertEqual(other.render_block(BlockType.PARAGRAPH,["**hi**"],render),"<p><b>hi</b></p>")
+        self.assertEqual(other.stats(),{"hits":1,"misses":0})
+
+    def test_same_output_as_uncached(self):
+        md = "# Title\n\nSome _text_\n\n- a\n- b\n\n```\ncode\n```"
+        expected = markdown_to_html_node(md).to_html()
+        self.assertEqual(markdown_to_html_node(md,self.cache).to_html(),expected)
+        self.assertEqual(markdown_to_html_node(md,self.cache).to_html(),expected)
+        self.assertEqual(self.cache.stats(),{"hits":4,"misses":4})
+
+    def test_lru_eviction(self):
+        self.cache.max_bytes = 25
+        keys = [self.cache.key(BlockType.PARAGRAPH,[str(i)]) for i in range(4)]
+        for i,key in enumerate(keys):
+            self.cache.put(key,"x" * 10)
+            os.utime(self.cache.path(key),ns=(i * 10**9,i * 10**9))
+        #reading the oldest entry makes it the most recently used
+        self.assertEqual(self.cache.get(keys[0]),"x" * 10)
+        self.assertEqual(self.cache.evict(),2)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNone(self.cache.get(keys[2]))
+        self.assertIsNotNone(self.cache.get(keys[3]))
+
+class TestCachedBuild(unittest.TestCase):
+    def test_one_changed_paragraph_renders_one_block(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp,"content")
+            os.makedirs(content)
+            page = os.path.join(content,"index.md")
+            with open(page,"w") as file:
+                file.write("# Title\n\nFirst\n\nSecond\n\nThird")
+            template = os.path.join(tmp,"template.html")
+            with open(template,"w") as file:
+                file.write("{{ Content }}")
+            cache = BlockCache(os.path.join(tmp,"cache"),RENDERER_VERSION)
+            builder = SiteBuilder(content,template,os.path.join(tmp,"docs"),"/",1,os.path.join(tmp,"layouts"),block_cache=cache)
+            with redirect_stdout(StringIO()):
+                builder.build()
+                self.assertEqual(builder.cache_stats,{"hits":0,"misses":4})
+                with open(page,"w") as file:
+                    file.write("# Title\n\nFirst\n\nChanged\n\nThird")
+                builder.build()
+            self.assertEqual(builder.cache_stats,{"hits":3,"misses":1})
+            with open(os.path.join(tmp,"docs","index.html")) as file:
+                self.assertEqual(file.read(),"<div><h1>Title</h1><p>First</p><p>Changed</p><p>Third</p></div>")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from blocks import *
+
+class TestIterBlocks(unittest.TestCase):
+    def test_classifies_as_it_goes(self):
+        md = """
+# Title
+
+Some text
+over two lines
+
+> quote
+> more
+
+- a
+- b
+
+1. one
+2. two
+
+```
+code
+```
+"""
+        self.assertListEqual(
+            [
+                (BlockType.HEADING,["# Title"]),
+                (BlockType.PARAGRAPH,["Some text","over two lines"]),
+                (BlockType.QUOTE,["> quote","> more"]),
+                (BlockType.UNORDERED_LIST,["- a","- b"]),
+                (BlockType.ORDERED_LIST,["1. one","2. two"]),
+                (BlockType.CODE,["```","code","```"]),
+            ],
+            list(iter_blocks(md))
+        )
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "```\nfirst\n\n\nsecond\n```\n\nafter"
+        self.assertListEqual(
+            [
+                (BlockType.CODE,["```","first","","","second","```"]),
+                (BlockType.PARAGRAPH,["after"]),
+            ],
+            list(iter_blocks(md))
+        )
+
+    def test_fence_ends_block_without_blank_line(self):
+        md = "```\ncode\n```\nafter"
+        self.assertListEqual(
+            [
+                (BlockType.CODE,["```","code","```"]),
+                (BlockType.PARAGRAPH,["after"]),
+            ],
+            list(iter_blocks(md))
+        )
+
+    def test_unclosed_fence_runs_to_end(self):
+        self.assertListEqual([(BlockType.CODE,["```","code","","more"])],list(iter_blocks("```\ncode\n\nmore")))
+
+    def test_single_line_fence(self):
+        self.assertListEqual([(BlockType.CODE,["```Code```"])],list(iter_blocks("```Code```")))
+
+    def test_broken_pattern_falls_back_to_paragraph(self):
+        self.assertEqual(next(iter_blocks("> quote\nnot quote"))[0],BlockType.PARAGRAPH)
+        self.assertEqual(next(iter_blocks("- a\nb"))[0],BlockType.PARAGRAPH)
+        self.assertEqual(next(iter_blocks("1. a\n3. b"))[0],BlockType.PARAGRAPH)
+
+    def test_long_ordered_list(self):
+        lines = [f"{i}. item" for i in range(1,13)]
+        self.assertEqual(next(iter_blocks("\n".join(lines))),(BlockType.ORDERED_LIST,lines))
+
+    def test_block_whitespace_trimmed(self):
+        self.assertListEqual([(BlockType.HEADING,["## H2"])],list(iter_blocks("\n   ## H2   \n  \n")))
+
+    def test_heading_level(self):
+        self.assertEqual(heading_level("# a"),1)
+        self.assertEqual(heading_level("###### a"),6)
+        self.assertEqual(heading_level("####### a"),0)
+        self.assertEqual(heading_level("#a"),0)
+
+class TestMappedMarkdown(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def mapped(self,data):
+        path = os.path.join(self.tmp.name,"page.md")
+        with open(path,"wb") as file:
+            file.write(data)
+        markdown = MappedMarkdown(path)
+        self.addCleanup(markdown.close)
+        return markdown
+
+    def test_blocks_match_string(self):
+        md = "# T\u00eftle\n\nSome text\nmore\n\n```\ncode\n\n```\n- a\n- b\n"
+        self.assertListEqual(list(iter_blocks(self.mapped(md.encode()))),list(iter_blocks(md)))
+
+    def test_lines_use_universal_newlines(self):
+        data = b"a\r\nb\rc\n\nd\r"
+        with open(self.mapped(data).path) as file:
+            expected = file.read().split("\n")
+        self.assertListEqual(list(self.mapped(data).lines()),expected)
+
+    def test_empty_file(self):
+        self.assertListEqual(list(self.mapped(b"").lines()),[""])
+        self.assertListEqual(list(iter_blocks(self.mapped(b""))),[])
+
+    def test_find_and_count(self):
+        markdown = self.mapped("\u00e9\n[a](/x)\n\n[b](/x)".encode())
+        first = markdown.find("](/x)")
+        second = markdown.find("](/x)",first + 1)
+        self.assertEqual(markdown.count("\n",0,first),1)
+        self.assertEqual(markdown.count("\n",first,second),2)
+        self.assertEqual(markdown.find("](/y)"),-1)
+
+    def test_pickles_as_path(self):
+        markdown = pickle.loads(pickle.dumps(self.mapped(b"# A\n\nbody")))
+        self.addCleanup(markdown.close)
+        self.assertEqual(markdown.first_line(),"# A")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from node_utils import *
+from compact import *
+from urls import UrlResolver
+from renderer import MemoryBlockCache
+
+MARKDOWN = """# Title with **bold**
+
+Some **bold _nested [link](/a/b)_** and `code` text ![pic](/images/a.png)
+
+> quoted _text_
+
+- one
+- ![second](/images/b.png)
+
+1. first
+2. [second](https://example.com)
+
+```
+code **not bold**
+```
+
+###### Small"""
+
+class TestCompactTree(unittest.TestCase):
+    def setUp(self):
+        self.resolve = UrlResolver("/ssg/",{"/a/b":"/a/b.123"},{"/images/a.png":(2,3)})
+
+    def test_same_html_as_nodes(self):
+        expected = markdown_to_html_node(MARKDOWN,None,self.resolve).to_html(self.resolve)
+        tree = markdown_to_html_node(MARKDOWN,None,self.resolve,compact=True)
+        self.assertIsInstance(tree,CompactTree)
+        self.assertEqual(tree.to_html(self.resolve),expected)
+        self.assertEqual("".join(tree.iter_html(self.resolve)),expected)
+
+    def test_same_html_without_resolver(self):
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN,compact=True).to_html(),expected)
+
+    def test_to_html_node(self):
+        tree = markdown_to_html_node(MARKDOWN,None,self.resolve,compact=True)
+        node = tree.to_html_node()
+        self.assertIsInstance(node,ParentNode)
+        self.assertEqual(node.to_html(self.resolve),tree.to_html(self.resolve))
+        image = node.children[1].children[-1]
+        self.assertEqual(image.props,{"src":"/images/a.png","alt":"pic","width":"2","height":"3","decoding":"async"})
+        lazy = node.children[3].children[1].children[0]
+        self.assertEqual(lazy.props["loading"],"lazy")
+
+    def test_layout(self):
+        tree = markdown_to_html_node("# A\n\n[b](/c) d",compact=True)
+        self.assertEqual(len(tree),6)
+        self.assertEqual([TAGS[tag] for tag in tree.tags],["div","h1",None,"p","a",None])
+        self.assertEqual(list(tree.kinds),[ELEMENT,ELEMENT,TEXT,ELEMENT,LINK,TEXT])
+        self.assertEqual(list(tree.sizes),[5,1,0,2,0,0])
+        self.assertEqual(tree.text,"Ab/c d")
+        self.assertEqual((tree.starts[4],tree.ends[4],tree.url_ends[4]),(1,2,4))
+
+    def test_missing_children(self):
+        tree = CompactTree()
+        tree.open("p")
+        with self.assertRaises(ValueError):
+            tree.to_html()
+
+    def test_with_block_cache(self):
+        cache = MemoryBlockCache()
+        expected = markdown_to_html_node(MARKDOWN,None,self.resolve).to_html(self.resolve)
+        for repeat in range(2):
+            tree = markdown_to_html_node(MARKDOWN,cache,self.resolve,compact=True)
+            self.assertEqual(tree.to_html(self.resolve),expected)
+        self.assertEqual(len(tree),8)
+        self.assertEqual(cache.stats(),{"hits":7,"misses":7})
+
+if __name__ == "__main__":
+    unittest.main()
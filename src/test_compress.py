@@ -0,0 +1,51 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import *
+from test_utils import write_file
+
+class TestCompressTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = self.tmp.name
+        self.page = b"<html>" + b"<p>hello</p>" * 200 + b"</html>"
+        write_file(os.path.join(self.dest,"index.html"),self.page)
+        write_file(os.path.join(self.dest,"blog","post.html"),self.page)
+        write_file(os.path.join(self.dest,"tiny.css"),b"a{}")
+        write_file(os.path.join(self.dest,"images","a.png"),b"\x89PNG" + bytes(500))
+        self.codecs = {".gz":compress_gzip}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_smaller_variants_only(self):
+        written,removed = compress_tree(self.dest,2,self.codecs)
+        self.assertEqual(sorted(written),[os.path.join("blog","post.html.gz"),"index.html.gz"])
+        with open(os.path.join(self.dest,"index.html.gz"),"rb") as file:
+            self.assertEqual(gzip.decompress(file.read()),self.page)
+        #a 3 byte stylesheet only grows, and images are not text
+        self.assertFalse(os.path.exists(os.path.join(self.dest,"tiny.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest,"images","a.png.gz")))
+
+    def test_up_to_date_skipped(self):
+        compress_tree(self.dest,1,self.codecs)
+        self.assertEqual(compress_tree(self.dest,1,self.codecs),([],[]))
+        write_file(os.path.join(self.dest,"index.html"),self.page + b"<!-- changed -->")
+        self.assertEqual(compress_tree(self.dest,1,self.codecs),(["index.html.gz"],[]))
+
+    def test_variant_mtime_matches_source(self):
+        compress_tree(self.dest,1,self.codecs)
+        path = os.path.join(self.dest,"index.html")
+        self.assertEqual(os.stat(path + ".gz").st_mtime_ns,os.stat(path).st_mtime_ns)
+
+    def test_variants_of_removed_outputs_removed(self):
+        compress_tree(self.dest,1,self.codecs)
+        os.remove(os.path.join(self.dest,"blog","post.html"))
+        self.assertEqual(compress_tree(self.dest,1,self.codecs),([],[os.path.join("blog","post.html.gz")]))
+        self.assertFalse(os.path.exists(os.path.join(self.dest,"blog")))
+
+    def test_gzip_is_deterministic(self):
+        self.assertEqual(compress_gzip(self.page),compress_gzip(self.page))
+        self.assertIn(".gz",available_codecs())
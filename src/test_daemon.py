@@ -0,0 +1,105 @@
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from daemon import *
+from client import request, main as client_main
+from test_utils import write_file
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+class TestBuildDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root,"content")
+        self.static = os.path.join(root,"static")
+        self.template = os.path.join(root,"template.html")
+        self.dest = os.path.join(root,"docs")
+        self.socket = os.path.join(root,"build.sock")
+        write_file(self.template,TEMPLATE)
+        write_file(os.path.join(self.content,"index.md"),"# Home")
+        write_file(os.path.join(self.content,"blog","post.md"),"# Post")
+        write_file(os.path.join(self.static,"index.css"),"body{}")
+        builder = SiteBuilder(self.content,self.template,self.dest,"/",1,os.path.join(root,"layouts"))
+        self.daemon = BuildDaemon(builder,self.static)
+        with redirect_stdout(StringIO()):
+            self.daemon.start()
+        self.server = start_build_server(self.daemon,self.socket)
+        self.thread = threading.Thread(target=self.server.serve_forever,args=(0.05,))
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def request(self,command):
+        with redirect_stdout(StringIO()):
+            return request(command,self.socket)
+
+    def test_nothing_changed(self):
+        self.assertTrue(os.path.isfile(os.path.join(self.dest,"blog","post.html")))
+        response = self.request("build")
+        self.assertEqual((response["output"],response["changed"],response["errors"]),("Nothing changed.\n",[],[]))
+
+    def test_rebuilds_changed_page(self):
+        write_file(os.path.join(self.content,"blog","post.md"),"# New post")
+        response = self.request("build")
+        self.assertEqual(response["changed"],[os.path.join("blog","post.html")])
+        self.assertIn("1 pages generated",response["output"])
+        with open(os.path.join(self.dest,"blog","post.html")) as file:
+            self.assertIn("New post",file.read())
+        self.assertEqual(self.request("status")["output"],f"2 pages in {self.dest}, 1 builds served, 0 failing.\n")
+
+    def test_errors_retried_until_fixed(self):
+        post = os.path.join(self.content,"blog","post.md")
+        write_file(post,"no title")
+        self.assertEqual([src for src,error in self.request("build")["errors"]],[post])
+        #reported again while the page is still broken
+        self.assertEqual([src for src,error in self.request("build")["errors"]],[post])
+        write_file(post,"# Fixed")
+        self.assertEqual(self.request("build")["errors"],[])
+
+    def test_build_failure_reported(self):
+        def fail(changed):
+            raise OSError("disk full")
+        self.daemon.watcher.rebuild = fail
+        write_file(os.path.join(self.content,"index.md"),"# New home")
+        with redirect_stdout(StringIO()) as out:
+            with self.assertRaises(SystemExit) as exit:
+                client_main(["build",self.socket])
+        self.assertEqual(exit.exception.code,1)
+        self.assertEqual(out.getvalue(),"Build failed: OSError: disk full\n")
+        #the daemon keeps serving
+        self.assertIn("pages in",self.request("status")["output"])
+
+    def test_stop(self):
+        self.assertEqual(self.request("stop")["output"],"Build daemon stopped.\n")
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+
+    def test_socket_in_use(self):
+        with self.assertRaises(OSError):
+            start_build_server(self.daemon,self.socket)
+
+    def test_stale_socket_removed(self):
+        stale = os.path.join(self.tmp.name,"stale.sock")
+        with socket.socket(socket.AF_UNIX,socket.SOCK_STREAM) as sock:
+            sock.bind(stale)
+        remove_stale_socket(stale)
+        self.assertFalse(os.path.exists(stale))
+
+    def test_client_without_daemon(self):
+        with redirect_stdout(StringIO()) as out:
+            with self.assertRaises(SystemExit) as exit:
+                client_main(["build",os.path.join(self.tmp.name,"missing.sock")])
+        self.assertEqual(exit.exception.code,2)
+        self.assertIn("No build daemon",out.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
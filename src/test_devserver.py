@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+
+from devserver import *
+from test_utils import write_file
+
+TEMPLATE = "<html><head><link href=\"/index.css\"></head><body>{{ Content }}</body></html>"
+
+class TestDevSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root,"content")
+        self.static = os.path.join(root,"static")
+        self.template = os.path.join(root,"template.html")
+        write_file(self.template,TEMPLATE)
+        write_file(os.path.join(self.content,"index.md"),"# Home\n\n[post](/blog/post)")
+        write_file(os.path.join(self.content,"blog","post.md"),"# Post")
+        write_file(os.path.join(self.static,"index.css"),"body{}")
+        self.site = DevSite(self.content,self.static,self.template,"/ssg/",os.path.join(root,"layouts"),ImageSizes(os.path.join(root,"images.json")))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_source_for(self):
+        self.assertEqual(self.site.source_for(""),"index.md")
+        self.assertEqual(self.site.source_for("index.html"),"index.md")
+        self.assertEqual(self.site.source_for("blog/post.html"),os.path.join("blog","post.md"))
+        self.assertIsNone(self.site.source_for("blog/"))
+        self.assertIsNone(self.site.source_for("index.css"))
+
+    def test_page_rendered_with_base_path(self):
+        body,etag = self.site.page("")
+        self.assertEqual(body.decode(),"<html><head><link href=\"/ssg/index.css\"></head><body><div><h1>Home</h1><p><a href=\"/ssg/blog/post\">post</a></p></div></body></html>")
+
+    def test_rendered_once_until_changed(self):
+        first = self.site.page("blog/post.html")
+        self.assertEqual(self.site.page("blog/post.html"),first)
+        self.site.page("")
+        self.assertEqual(self.site.renders,2)
+        write_file(os.path.join(self.content,"blog","post.md"),"# Changed")
+        self.assertNotEqual(self.site.page("blog/post.html"),first)
+        #only the changed page was rendered again
+        self.site.page("")
+        self.assertEqual(self.site.renders,3)
+
+    def test_template_change(self):
+        self.site.page("")
+        write_file(self.template,"<main>{{ Content }}</main>")
+        self.assertTrue(self.site.page("")[0].startswith(b"<main>"))
+
+    def test_outside_base_path(self):
+        self.assertIsNone(self.site.site_path("/other/"))
+        self.assertIsNone(self.site.site_path("/ssg/../secret"))
+        self.assertEqual(self.site.site_path("/ssg/blog/"),"blog/")
+
+    def test_absolute_paths_rejected(self):
+        outside = os.path.join(self.tmp.name,"evil.md")
+        write_file(outside,"# Evil")
+        self.assertIsNone(self.site.site_path("/ssg//" + outside.lstrip("/")))
+        self.assertIsNone(self.site.source_for(outside[:-len(".md")] + ".html"))
+        self.assertIsNone(self.site.page(outside[:-len(".md")] + ".html"))
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        write_file(os.path.join(root,"template.html"),TEMPLATE)
+        write_file(os.path.join(root,"content","index.md"),"# Home")
+        write_file(os.path.join(root,"static","index.css"),"body{}")
+        site = DevSite(os.path.join(root,"content"),os.path.join(root,"static"),os.path.join(root,"template.html"),"/",os.path.join(root,"layouts"),ImageSizes(os.path.join(root,"images.json")))
+        self.server = start_dev_server(site,0,ReloadHub())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def fetch(self,path,etag=None):
+        request = urllib.request.Request(self.url + path,headers={"If-None-Match":etag} if etag else {})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status,response.headers.get("ETag"),response.read()
+        except urllib.error.HTTPError as e:
+            return e.code,e.headers.get("ETag"),b""
+
+    def test_page_and_static_etags(self):
+        for path in ("/","/index.css"):
+            status,etag,body = self.fetch(path)
+            self.assertEqual(status,200)
+            self.assertTrue(body)
+            self.assertEqual(self.fetch(path,etag),(304,etag,b""))
+            self.assertEqual(self.fetch(path,"\"other\"")[0],200)
+
+    def test_reload_script_and_missing(self):
+        self.assertIn(RELOAD_SCRIPT.encode(),self.fetch("/")[2])
+        self.assertEqual(self.fetch("/missing.html")[0],404)
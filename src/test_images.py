@@ -0,0 +1,73 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from images import *
+
+def png(width,height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I",13) + b"IHDR" + struct.pack(">II",width,height) + bytes(20)
+
+def gif(width,height):
+    return b"GIF89a" + struct.pack("<HH",width,height) + bytes(20)
+
+def jpeg(width,height):
+    app0 = b"\xff\xe0" + struct.pack(">H",16) + b"JFIF\x00" + bytes(9)
+    sof = b"\xff\xc0" + struct.pack(">HBHH",17,8,height,width) + bytes(12)
+    return b"\xff\xd8" + app0 + sof + b"\xff\xda" + bytes(10)
+
+def webp(chunk,payload):
+    return b"RIFF" + struct.pack("<I",100) + b"WEBP" + chunk + struct.pack("<I",len(payload)) + payload + bytes(20)
+
+class TestReadImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self,data):
+        path = os.path.join(self.tmp.name,"image")
+        with open(path,"wb") as file:
+            file.write(data)
+        return read_image_size(path)
+
+    def test_formats(self):
+        self.assertEqual(self.size_of(png(1100,438)),(1100,438))
+        self.assertEqual(self.size_of(gif(16,9)),(16,9))
+        self.assertEqual(self.size_of(jpeg(640,480)),(640,480))
+
+    def test_webp_variants(self):
+        lossy = bytes(3) + b"\x9d\x01\x2a" + struct.pack("<HH",320,200)
+        self.assertEqual(self.size_of(webp(b"VP8 ",lossy)),(320,200))
+        bits = (320 - 1) | ((200 - 1) << 14)
+        self.assertEqual(self.size_of(webp(b"VP8L",b"\x2f" + bits.to_bytes(4,"little"))),(320,200))
+        extended = bytes(4) + (320 - 1).to_bytes(3,"little") + (200 - 1).to_bytes(3,"little")
+        self.assertEqual(self.size_of(webp(b"VP8X",extended)),(320,200))
+
+    def test_unknown_or_truncated(self):
+        self.assertIsNone(self.size_of(b"not an image"))
+        self.assertIsNone(self.size_of(jpeg(640,480)[:25]))
+
+class TestImageSizes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name,"static")
+        self.cache_path = os.path.join(self.tmp.name,"images.json")
+        os.makedirs(os.path.join(self.static,"images"))
+        for name,data in (("a.png",png(10,20)),("b.gif",gif(3,4)),("broken.jpg",b"\xff\xd8"),("notes.txt",b"hi")):
+            with open(os.path.join(self.static,"images",name),"wb") as file:
+                file.write(data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_scan(self):
+        sizes = ImageSizes(self.cache_path).scan(self.static)
+        self.assertEqual(sizes,{"/images/a.png":(10,20),"/images/b.gif":(3,4)})
+
+    def test_cached_across_builds(self):
+        ImageSizes(self.cache_path).scan(self.static)
+        cached = ImageSizes(self.cache_path)
+        self.assertEqual(len(cached.files),3)
+        self.assertEqual(cached.scan(self.static),{"/images/a.png":(10,20),"/images/b.gif":(3,4)})
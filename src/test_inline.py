@@ -0,0 +1,79 @@
+import unittest
+
+from inline import *
+from node_utils import text_node_to_html_node
+
+class TestParseInline(unittest.TestCase):
+    def test_all_types_one_pass(self):
+        nodes = parse_inline("A **b** _c_ `d` ![e](e.png) [f](/f)")
+        self.assertListEqual(
+            [
+                TextNode("A ",TextType.PLAIN),
+                TextNode("b",TextType.BOLD),
+                TextNode(" ",TextType.PLAIN),
+                TextNode("c",TextType.ITALIC),
+                TextNode(" ",TextType.PLAIN),
+                TextNode("d",TextType.CODE),
+                TextNode(" ",TextType.PLAIN),
+                TextNode("e",TextType.IMAGE,"e.png"),
+                TextNode(" ",TextType.PLAIN),
+                TextNode("f",TextType.LINK,"/f"),
+            ],
+            nodes
+        )
+
+    def test_unbalanced_is_literal(self):
+        self.assertListEqual([TextNode("some _italic and **bold",TextType.PLAIN)],parse_inline("some _italic and **bold"))
+        self.assertListEqual([TextNode("a ` b",TextType.PLAIN)],parse_inline("a ` b"))
+        self.assertListEqual([TextNode("____",TextType.PLAIN)],parse_inline("____"))
+
+    def test_nested_emphasis(self):
+        nodes = parse_inline("**bold _and italic_ text**")
+        self.assertListEqual(
+            [
+                TextNode("bold and italic text",TextType.BOLD,children=[
+                    TextNode("bold ",TextType.PLAIN),
+                    TextNode("and italic",TextType.ITALIC),
+                    TextNode(" text",TextType.PLAIN),
+                ])
+            ],
+            nodes
+        )
+        self.assertEqual(text_node_to_html_node(nodes[0]).to_html(),"<b>bold <i>and italic</i> text</b>")
+
+    def test_link_inside_bold(self):
+        nodes = parse_inline("**see [here](/x)**")
+        self.assertEqual(text_node_to_html_node(nodes[0]).to_html(),"<b>see <a href=\"/x\">here</a></b>")
+
+    def test_crossed_delimeters(self):
+        self.assertListEqual(
+            [
+                TextNode("a _b",TextType.BOLD),
+                TextNode(" c_",TextType.PLAIN),
+            ],
+            parse_inline("**a _b** c_")
+        )
+
+    def test_code_and_links_are_atomic(self):
+        self.assertListEqual([TextNode("snake_case_name",TextType.CODE)],parse_inline("`snake_case_name`"))
+        self.assertListEqual(
+            [TextNode("x",TextType.LINK,"https://a.com/foo_bar_baz")],
+            parse_inline("[x](https://a.com/foo_bar_baz)")
+        )
+
+    def test_failed_image_is_not_a_link(self):
+        self.assertListEqual(
+            [
+                TextNode("![a](b ",TextType.PLAIN),
+                TextNode("c",TextType.LINK,"d"),
+            ],
+            parse_inline("![a](b [c](d)")
+        )
+
+    def test_many_unmatched_openers(self):
+        text = "[" * 20000 + "`" * 20000 + "_" * 20001
+        nodes = parse_inline(text)
+        self.assertListEqual([TextNode(text,TextType.PLAIN)],nodes)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from build import *
+from links import *
+from test_utils import write_file
+
+class TestPageLinks(unittest.TestCase):
+    def test_lines_and_kinds(self):
+        md = "# Title\n\n[home](/)\n\nText with **[bold link](/blog/post)**\nand ![img](/images/a.png)\n\n- [item](/x)\n- [outside](https://example.com)\n\n```\n[not a link](/code)\n```\n\n[again](/)"
+        self.assertEqual(page_links(md),[[3,"/"],[5,"/blog/post"],[6,"/images/a.png"],[8,"/x"],[15,"/"]])
+
+    def test_repeated_urls(self):
+        md = "# T\n\n[a](/x)\n\ntext\n\n[b](/x)\n\n[c](/x) [d](/x)\n"
+        self.assertEqual(page_links(md),[[3,"/x"],[7,"/x"],[9,"/x"],[9,"/x"]])
+
+    def test_output_paths(self):
+        paths = output_paths(["index.html",os.path.join("blog","post","index.html"),"about.html"],[os.path.join("images","a.png")])
+        for path in ("/","/index.html","/blog/post/","/blog/post","/blog/post/index.html","/about.html","/images/a.png"):
+            self.assertIn(path,paths)
+        self.assertIn("/about",paths)
+        self.assertNotIn("/about/",paths)
+
+    def test_broken_links(self):
+        paths = output_paths(["index.html",os.path.join("my post","index.html")])
+        links = [[1,"/"],[2,"/#top"],[3,"/my%20post/?x=1"],[4,"/missing"]]
+        self.assertEqual(broken_links(links,paths),[[4,"/missing"]])
+
+class TestLinkCheckBuild(unittest.TestCase):
+    def test_unchanged_pages_rechecked(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp,"content")
+            static = os.path.join(tmp,"static")
+            template = os.path.join(tmp,"template.html")
+            for path,text in ((template,"{{ Content }}"),(os.path.join(static,"a.png"),"png"),
+                    (os.path.join(content,"index.md"),"# Home\n\n[post](/blog/post)\n\n![a](/a.png)"),
+                    (os.path.join(content,"blog","post.md"),"# Post\n\n[home](/)")):
+                write_file(path,text)
+            builder = SiteBuilder(content,template,os.path.join(tmp,"docs"),"/",layouts_dir=os.path.join(tmp,"layouts"),static_dir=static)
+            with redirect_stdout(StringIO()):
+                builder.build()
+                self.assertEqual(builder.broken_links,[])
+                os.remove(os.path.join(content,"blog","post.md"))
+                builder.build([os.path.join("blog","post.md")])
+            self.assertEqual(builder.broken_links,[(os.path.join(content,"index.md"),3,"/blog/post")])
@@ -0,0 +1,182 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+from unittest.mock import patch
+
+from main import *
+from test_utils import write_file
+
+TEMPLATE = "<title>{{ Title }}</title><link href=\"/index.css\">{{ Content }}"
+
+def read_tree(root):
+    files = {}
+    for dirpath,dirnames,filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath,filename)
+            with open(path) as file:
+                files[os.path.relpath(path,root)] = file.read()
+    return files
+
+class TestParallelBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name,"content")
+        self.template = os.path.join(self.tmp.name,"template.html")
+        self.layouts = os.path.join(self.tmp.name,"layouts")
+        write_file(self.template,TEMPLATE)
+        for i in range(12):
+            write_file(os.path.join(self.content,f"section{i % 3}",f"page{i}.md"),f"# Page {i}\n\nSome _text_ for page {i}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self,dest,workers):
+        with redirect_stdout(StringIO()):
+            return generate_pages_recursively(self.content,self.template,dest,"/ssg/",workers,self.layouts)
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.tmp.name,"serial")
+        parallel = os.path.join(self.tmp.name,"parallel")
+        self.assertEqual(self.build(serial,1),[])
+        self.assertEqual(self.build(parallel,4),[])
+        self.assertEqual(read_tree(serial),read_tree(parallel))
+        self.assertEqual(len(read_tree(parallel)),13)
+
+    def test_errors_collected_per_page(self):
+        bad = os.path.join(self.content,"section1","broken.md")
+        write_file(bad,"no title here")
+        dest = os.path.join(self.tmp.name,"docs")
+        errors = self.build(dest,4)
+        self.assertEqual([src for src,error in errors],[bad])
+        self.assertIn("Markdown does not begin with a title",errors[0][1])
+        self.assertTrue(os.path.exists(os.path.join(dest,"section1","page1.html")))
+        self.assertNotIn(os.path.join("section1","broken.html"),load_manifest(manifest_path(dest)))
+
+    def test_undecodable_source_fails_its_page(self):
+        bad = os.path.join(self.content,"section1","bad.md")
+        with open(bad,"wb") as file:
+            file.write(b"\xff\xfe# bad")
+        dest = os.path.join(self.tmp.name,"docs")
+        errors = self.build(dest,1)
+        self.assertEqual([src for src,error in errors],[bad])
+        self.assertIn("codec can't decode",errors[0][1])
+        self.assertTrue(os.path.exists(os.path.join(dest,"section1","page1.html")))
+        self.assertFalse(os.path.exists(os.path.join(dest,"section1","bad.html")))
+
+    def test_build_page_reports_error(self):
+        init_page_context({"t.html":Template(TEMPLATE)},UrlResolver("/"))
+        dst = os.path.join(self.tmp.name,"out","page.html")
+        self.assertIsNone(build_page(("page.md",dst,"# Title\n\nBody","t.html"))["error"])
+        self.assertIn("Title",read_tree(os.path.join(self.tmp.name,"out"))["page.html"])
+        self.assertIsNotNone(build_page(("page.md",dst,"Body","t.html"))["error"])
+
+    def test_write_errors_reported_per_page(self):
+        jobs = [("a.md",os.path.join(self.tmp.name,"out","a.html"),"# A","t.html"),("b.md",self.template + os.sep + "b.html","# B","t.html")]
+        results = build_pages(jobs,{"t.html":Template(TEMPLATE)},UrlResolver("/"))
+        self.assertIsNone(results[0]["error"])
+        self.assertIsNotNone(results[1]["error"])
+        self.assertNotIn("write",results[1])
+
+    def test_mapped_sources_render_the_same(self):
+        write_file(os.path.join(self.content,"big.md"),"# Big\n\n" + "\n\n".join(f"Paragraph [{i}](/ssg/section0/page0) _x_" for i in range(200)))
+        read = os.path.join(self.tmp.name,"read")
+        self.assertEqual(self.build(read,1),[])
+        mapped = os.path.join(self.tmp.name,"mapped")
+        with patch("build.MMAP_THRESHOLD",0):
+            self.assertEqual(self.build(mapped,1),[])
+            self.assertEqual(read_tree(read),read_tree(mapped))
+            self.assertIsInstance(read_source((None,os.path.join(self.content,"big.md")))[1],MappedMarkdown)
+            #unchanged mapped sources hash the same on the next build
+            with redirect_stdout(StringIO()) as out:
+                generate_pages_recursively(self.content,self.template,mapped,"/ssg/",1,self.layouts)
+            self.assertIn("0 pages generated, 13 unchanged",out.getvalue())
+
+    def test_mapped_sources_closed(self):
+        opened = []
+        class RecordedMarkdown(MappedMarkdown):
+            def __init__(self,path):
+                super().__init__(path)
+                opened.append(self)
+        with patch("build.MMAP_THRESHOLD",0),patch("build.MappedMarkdown",RecordedMarkdown):
+            for dest,workers in (("serial",1),("parallel",2),("parallel",1)):
+                self.assertEqual(self.build(os.path.join(self.tmp.name,dest),workers),[])
+        #rendered, handed to worker processes and unchanged pages alike
+        self.assertEqual(len(opened),3 * 12)
+        self.assertTrue(all(markdown.buffer.closed for markdown in opened if markdown.buffer != b""))
+
+    def test_mapped_page_streamed(self):
+        src = os.path.join(self.tmp.name,"big.md")
+        write_file(src,"# Big\n\n" + "Some **bold** text with [a link](/a).\n\n" * 20000)
+        template = Template(TEMPLATE)
+        with open(src) as file:
+            expected = "".join(iter_page(file.read(),template,UrlResolver("/")))
+        init_page_context({"t.html":template},UrlResolver("/"))
+        dst = os.path.join(self.tmp.name,"out","big.html")
+        markdown = MappedMarkdown(src)
+        tracemalloc.start()
+        try:
+            self.assertIsNone(build_page((src,dst,markdown,"t.html"))["error"])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        #one block at a time, not the whole page
+        self.assertLess(peak,os.path.getsize(src) // 4)
+        with open(dst) as file:
+            self.assertEqual(file.read(),expected)
+        self.assertTrue(markdown.buffer.closed)
+
+    def test_directory_layouts(self):
+        write_file(os.path.join(self.layouts,"section1.html"),"<main>{{ Content }}</main>")
+        dest = os.path.join(self.tmp.name,"docs")
+        self.assertEqual(self.build(dest,1),[])
+        pages = read_tree(dest)
+        self.assertTrue(pages[os.path.join("section1","page1.html")].startswith("<main><div><h1>Page 1</h1>"))
+        self.assertTrue(pages[os.path.join("section0","page0.html")].startswith("<title>Page 0</title>"))
+        self.assertEqual(load_manifest(manifest_path(dest))[os.path.join("section1","page1.html")]["template"],os.path.join(self.layouts,"section1.html"))
+
+class TestParseArgs(unittest.TestCase):
+    def test_defaults(self):
+        args = parse_args([])
+        self.assertEqual(args.basepath,"/")
+        self.assertEqual(args.jobs,1)
+        self.assertFalse(args.fingerprint)
+        self.assertFalse(args.block_cache)
+
+    def test_block_cache_opt_in(self):
+        args = parse_args(["--block-cache","/ssg/"])
+        self.assertTrue(args.block_cache)
+        self.assertEqual((args.basepath,args.block_cache_dir),("/ssg/",BLOCK_CACHE_DIR))
+
+    def test_compress_jobs_independent_of_jobs(self):
+        args = parse_args(["--precompress"])
+        self.assertEqual((args.jobs,args.compress_jobs),(1,0))
+        self.assertEqual(cpu_workers(args.compress_jobs),os.cpu_count() or 1)
+        self.assertEqual(cpu_workers(parse_args(["--compress-jobs","3"]).compress_jobs),3)
+
+    def test_serve_command(self):
+        args = parse_args(["serve","/ssg/","--port","9000"])
+        self.assertEqual((args.command,args.basepath,args.port),("serve","/ssg/",9000))
+
+    def test_basepath_and_jobs(self):
+        args = parse_args(["/ssg/","--jobs","8"])
+        self.assertEqual(args.basepath,"/ssg/")
+        self.assertEqual(args.jobs,8)
+
+    def test_serve_build(self):
+        args = parse_args(["serve-build","/ssg/","--socket","/tmp/b.sock","--search"])
+        self.assertEqual((args.command,args.basepath,args.socket,args.search),("serve-build","/ssg/","/tmp/b.sock",True))
+
+    def test_shard(self):
+        self.assertEqual(parse_args(["--shard","2/3"]).shard,(2,3))
+        self.assertEqual(parse_args(["merge","/ssg/"]).shard_dir,SHARD_DIR)
+        with redirect_stderr(StringIO()):
+            with self.assertRaises(SystemExit):
+                parse_args(["--shard","4/3"])
+            with self.assertRaises(SystemExit):
+                parse_args(["--shard","1/2","--fingerprint"])
+
+if __name__ == "__main__":
+    unittest.main()
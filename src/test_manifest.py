@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from manifest import *
+from main import generate_pages_recursively
+from test_utils import write_file
+
+TEMPLATE = "<title>{{ Title }}</title><a href=\"/\">home</a>{{ Content }}"
+
+class TestHashPage(unittest.TestCase):
+    def test_stable(self):
+        self.assertEqual(hash_page("# A","t","/",1),hash_page("# A","t","/",1))
+
+    def test_every_input_counts(self):
+        base = hash_page("# A","t","/",1)
+        self.assertNotEqual(base,hash_page("# B","t","/",1))
+        self.assertNotEqual(base,hash_page("# A","u","/",1))
+        self.assertNotEqual(base,hash_page("# A","t","/ssg/",1))
+        self.assertNotEqual(base,hash_page("# A","t","/",2))
+
+    def test_parts_do_not_run_together(self):
+        self.assertNotEqual(hash_page("ab","c","/",1),hash_page("a","bc","/",1))
+
+class TestManifestFile(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = manifest_path(tmp)
+            save_manifest(path,{"index.html":{"source":"index.md","hash":"abc"}})
+            self.assertEqual(load_manifest(path),{"index.html":{"source":"index.md","hash":"abc"}})
+
+    def test_missing_or_corrupt(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = manifest_path(tmp)
+            self.assertEqual(load_manifest(path),{})
+            write_file(path,"not json")
+            self.assertEqual(load_manifest(path),{})
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name,"content")
+        self.dest = os.path.join(self.tmp.name,"docs")
+        self.template = os.path.join(self.tmp.name,"template.html")
+        write_file(self.template,TEMPLATE)
+        write_file(os.path.join(self.content,"index.md"),"# Home\n\nWelcome")
+        write_file(os.path.join(self.content,"blog","post","index.md"),"# Post\n\nSome **text**")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self,base_path="/"):
+        out = StringIO()
+        with redirect_stdout(out):
+            generate_pages_recursively(self.content,self.template,self.dest,base_path)
+        return out.getvalue().splitlines()[-1]
+
+    def test_unchanged_pages_skipped(self):
+        self.assertEqual(self.build(),"2 pages generated, 0 unchanged, 0 removed.")
+        self.assertEqual(self.build(),"0 pages generated, 2 unchanged, 0 removed.")
+        write_file(os.path.join(self.content,"index.md"),"# Home\n\nChanged")
+        self.assertEqual(self.build(),"1 pages generated, 1 unchanged, 0 removed.")
+
+    def test_template_and_base_path_rebuild_all(self):
+        self.build()
+        self.assertEqual(self.build("/ssg/"),"2 pages generated, 0 unchanged, 0 removed.")
+        with open(os.path.join(self.dest,"index.html")) as file:
+            self.assertIn("href=\"/ssg/\"",file.read())
+        write_file(self.template,TEMPLATE + "<footer></footer>")
+        self.assertEqual(self.build("/ssg/"),"2 pages generated, 0 unchanged, 0 removed.")
+
+    def test_deleted_output_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.dest,"index.html"))
+        self.assertEqual(self.build(),"1 pages generated, 1 unchanged, 0 removed.")
+
+    def test_stale_outputs_removed(self):
+        self.build()
+        os.remove(os.path.join(self.content,"blog","post","index.md"))
+        self.assertEqual(self.build(),"0 pages generated, 1 unchanged, 1 removed.")
+        self.assertFalse(os.path.exists(os.path.join(self.dest,"blog")))
+
+if __name__ == "__main__":
+    unittest.main()
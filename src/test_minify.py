@@ -0,0 +1,41 @@
+import unittest
+
+from minify import *
+from templates import Template
+
+class TestMinifyHTML(unittest.TestCase):
+    def test_whitespace_between_tags(self):
+        html = "<html>\n  <head>\n    <title>{{ Title }}</title>\n  </head>\n  <body>\n    <p>Some   text\n  here</p>\n  </body>\n</html>"
+        self.assertEqual(minify_html(html),"<html><head><title>{{ Title }}</title></head><body><p>Some text here</p></body></html>")
+
+    def test_space_between_inline_elements_kept(self):
+        self.assertEqual(minify_html("<b>a</b> <i>b</i>"),"<b>a</b> <i>b</i>")
+
+    def test_line_breaks_between_inline_elements(self):
+        self.assertEqual(minify_html("<p><b>a</b>\n<i>b</i></p>"),"<p><b>a</b> <i>b</i></p>")
+        html = "<nav>\n  <a href=\"/\">home</a>\n  <!-- more -->\n  <a href=\"/blog\">blog</a>\n</nav>\n<p>x</p>"
+        self.assertEqual(minify_html(html),"<nav><a href=\"/\">home</a> <a href=/blog>blog</a></nav><p>x</p>")
+        self.assertEqual(minify_html("\n<b>a</b>\n"),"<b>a</b>")
+
+    def test_comments_removed(self):
+        self.assertEqual(minify_html("<p>a<!-- note\n spanning lines --></p>"),"<p>a</p>")
+
+    def test_optional_quotes(self):
+        html = "<link href=\"/index.css\" rel=\"stylesheet\" /><a href=\"/\" title='two words'>x</a><input disabled>"
+        self.assertEqual(minify_html(html),"<link href=/index.css rel=stylesheet><a href=\"/\" title=\"two words\">x</a><input disabled>")
+
+    def test_slots_in_attributes_stay_quoted(self):
+        html = "<meta content=\"{{Title}}\"><a href=\"{{ Url }}\">x</a>"
+        self.assertEqual(minify_html(html),"<meta content=\"{{Title}}\"><a href=\"{{ Url }}\">x</a>")
+        template = Template(minify_html(html))
+        self.assertEqual(template.render({"Title":"Tom Bombadil is here","Url":"/a b"}),"<meta content=\"Tom Bombadil is here\"><a href=\"/a b\">x</a>")
+
+    def test_preserved_elements(self):
+        html = "<div>\n  <pre><code>  a\n\n    b  </code></pre>\n  <textarea>\n x </textarea>\n</div>"
+        self.assertEqual(minify_html(html),"<div><pre><code>  a\n\n    b  </code></pre><textarea>\n x </textarea></div>")
+
+    def test_self_closing_non_void_element(self):
+        self.assertEqual(minify_html("<svg><path d=\"M0\"/></svg>"),"<svg><path d=M0 /></svg>")
+
+    def test_doctype_kept(self):
+        self.assertEqual(minify_html("<!doctype html>\n<html></html>"),"<!doctype html><html></html>")
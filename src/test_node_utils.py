@@ -1,6 +1,8 @@
 import unittest
 from node_utils import *
 from nodes import TextNode,TextType
+from urls import UrlResolver
+from renderer import MemoryBlockCache
 
 class TestSplitNode(unittest.TestCase):
     def test_split_bf(self):
@@ -501,6 +503,73 @@ This is a quote:
             "<div><h1>H1</h1><h2>H2</h2><h3>H3</h3><h4>H4</h4><h5>H5</h5><h6>H6</h6><p>####### H7</p></div>",
         )
 
+    def test_codeblock_with_blank_lines(self):
+        md = """
+```
+first
+
+second
+```
+"""
+        node = markdown_to_html_node(md)
+        self.assertEqual(node.to_html(),"<div><pre><code>first\n\nsecond\n</code></pre></div>")
+
+    def test_long_ordered_list(self):
+        md = "\n".join(f"{i}. item {i}" for i in range(1,11))
+        html = markdown_to_html_node(md).to_html()
+        self.assertTrue(html.endswith("<li>item 9</li><li>item 10</li></ol></div>"))
+
+class TestImageAttributes(unittest.TestCase):
+    def test_first_image_eager_rest_lazy(self):
+        md = "# Title\n\n![a](/images/a.png)\n\ntext\n\n![b](/images/b.png) and ![c](/elsewhere.png)"
+        resolve = UrlResolver("/ssg/",images={"/images/a.png":(10,20),"/images/b.png":(30,40)})
+        html = markdown_to_html_node(md,resolve=resolve).to_html(resolve)
+        self.assertIn("<img src=\"/ssg/images/a.png\" alt=\"a\" width=\"10\" height=\"20\" decoding=\"async\"></img>",html)
+        self.assertIn("<img src=\"/ssg/images/b.png\" alt=\"b\" width=\"30\" height=\"40\" loading=\"lazy\" decoding=\"async\"></img>",html)
+        self.assertIn("<img src=\"/ssg/elsewhere.png\" alt=\"c\" loading=\"lazy\" decoding=\"async\"></img>",html)
+
+    def test_image_sizes_need_resolver(self):
+        self.assertEqual(markdown_to_html_node("![a](/images/a.png)").to_html(),"<div><p><img src=\"/images/a.png\" alt=\"a\" decoding=\"async\"></img></p></div>")
+
+    def test_code_blocks_do_not_count(self):
+        html = markdown_to_html_node("```\n![x](y)\n```\n\n![a](/a.png)").to_html()
+        self.assertNotIn("lazy",html)
+
+class TestStreamedContent(unittest.TestCase):
+    def test_same_html_as_tree(self):
+        md = "# Title\n\n![a](/images/a.png)\n\n- **b** [c](/d)\n\n```\ncode\n```\n\n![e](/images/a.png)"
+        resolve = UrlResolver("/ssg/",images={"/images/a.png":(1,2)})
+        expected = markdown_to_html_node(md,resolve=resolve).to_html(resolve)
+        self.assertEqual("".join(StreamedContent(md,None,resolve).iter_html(resolve)),expected)
+        cache = MemoryBlockCache()
+        for run in range(2):
+            self.assertEqual("".join(StreamedContent(md,cache,resolve).iter_html(resolve)),expected)
+
+    def test_empty_document(self):
+        with self.assertRaises(ValueError):
+            "".join(StreamedContent("\n\n").iter_html())
+
+class TestPageScan(unittest.TestCase):
+    def test_render_scans_like_scan_page(self):
+        md = "# Title\n\n[a](/a) and **[b](/b)**\n\n```\n[c](/c)\n```\n\n- ![d](/d.png)\n- [a](/a)"
+        tokenize = lambda text: text.lower().split()
+        expected = scan_page(md,PageScan(True,tokenize))
+        self.assertEqual(expected.urls,["/a","/b","/d.png","/a"])
+        cache = MemoryBlockCache()
+        renders = {
+            "tree":lambda scan: markdown_to_html_node(md,scan=scan),
+            "compact":lambda scan: markdown_to_html_node(md,compact=True,scan=scan),
+            "streamed":lambda scan: "".join(StreamedContent(md,None,None,scan).iter_html()),
+            #a miss renders the blocks, a hit scans them without rendering
+            "cache miss":lambda scan: markdown_to_html_node(md,cache,compact=True,scan=scan),
+            "cache hit":lambda scan: markdown_to_html_node(md,cache,compact=True,scan=scan),
+        }
+        for name,render in renders.items():
+            with self.subTest(name):
+                scan = PageScan(True,tokenize)
+                render(scan)
+                self.assertEqual((scan.urls,scan.terms),(expected.urls,expected.terms))
+
 class TestExtractTitle(unittest.TestCase):
     def test_base(self):
         res = extract_title("# Hello World! ")
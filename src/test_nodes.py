@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO
 
 # Assuming textnode.py contains the TextNode and TextType classes
 from nodes import *
@@ -263,5 +264,33 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("a","Hello world!",{"href": "https://www.google.com","test":"test value"})
         self.assertEqual(node.to_html(),"<a href=\"https://www.google.com\" test=\"test value\">Hello world!</a>")
 
+class TestStreamingHTML(unittest.TestCase):
+    def test_iter_html_chunks(self):
+        node = ParentNode("p", [LeafNode(None, "Hello "), LeafNode("b", "world")])
+        self.assertEqual(list(node.iter_html()), ["<p>", "Hello ", "<b>world</b>", "</p>"])
+
+    def test_write_html(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode("a", "link", {"href": "/x"})])])
+        buffer = StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), node.to_html())
+        self.assertEqual(buffer.getvalue(), "<div><p><a href=\"/x\">link</a></p></div>")
+
+    def test_errors_raised_when_streamed(self):
+        with self.assertRaisesRegex(ValueError, "Error: Missing children"):
+            ParentNode("div", []).write_html(StringIO())
+
+    def test_wide_node(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, str(i))]) for i in range(100000)])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<ul><li>0</li><li>1</li>"))
+        self.assertTrue(html.endswith("<li>99999</li></ul>"))
+
+    def test_urls_resolved_while_serializing(self):
+        resolve = lambda url: "/ssg" + url
+        node = ParentNode("p", [LeafNode("a", "link", {"href": "/x", "title": "/x"}), LeafNode("img", None, {"src": "/a.png", "alt": "a"})])
+        self.assertEqual(node.to_html(resolve), "<p><a href=\"/ssg/x\" title=\"/x\">link</a><img src=\"/ssg/a.png\" alt=\"a\"></img></p>")
+        self.assertEqual(node.to_html(), "<p><a href=\"/x\" title=\"/x\">link</a><img src=\"/a.png\" alt=\"a\"></img></p>")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import *
+
+class TestBoundedMap(unittest.TestCase):
+    def test_results_in_order(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(list(bounded_map(executor,lambda x: x * x,range(100),limit=3)),[x * x for x in range(100)])
+
+    def test_items_pulled_lazily(self):
+        pulled = []
+        def items():
+            for i in range(10):
+                pulled.append(i)
+                yield i
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = bounded_map(executor,lambda x: x,items(),limit=2)
+            self.assertEqual(next(results),0)
+            self.assertEqual(len(pulled),2)
+            self.assertEqual(list(results),list(range(1,10)))
+
+    def test_errors_raised_in_order(self):
+        def check(x):
+            if x == 2:
+                raise ValueError("two")
+            return x
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = bounded_map(executor,check,range(5))
+            self.assertEqual([next(results),next(results)],[0,1])
+            with self.assertRaisesRegex(ValueError,"two"):
+                next(results)
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name,"sub","page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_chunks(self):
+        atomic_write(self.path,(chunk for chunk in ["<p>","a","</p>"]))
+        with open(self.path) as file:
+            self.assertEqual(file.read(),"<p>a</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)),["page.html"])
+
+    def test_failed_write_keeps_old_file(self):
+        atomic_write(self.path,["old"])
+        def chunks():
+            yield "partial"
+            raise ValueError("render failed")
+        with self.assertRaises(ValueError):
+            atomic_write(self.path,chunks())
+        with open(self.path) as file:
+            self.assertEqual(file.read(),"old")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)),["page.html"])
+
+class TestBackgroundWriter(unittest.TestCase):
+    def test_writes_and_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with BackgroundWriter(threads=2,depth=2) as writer:
+                futures = [writer.submit(os.path.join(tmp,f"{i}.html"),[str(i)]) for i in range(10)]
+                blocked = writer.submit(os.path.join(tmp,"0.html","x.html"),["x"])
+            self.assertTrue(all(future.exception() is None for future in futures))
+            self.assertIsNotNone(blocked.exception())
+            self.assertEqual(len([name for name in os.listdir(tmp) if name.endswith(".html")]),10)
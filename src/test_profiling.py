@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from build import *
+
+class TestStageTimer(unittest.TestCase):
+    def test_records_stages_in_order(self):
+        timer = StageTimer()
+        with timer.stage("a"):
+            pass
+        with timer.stage("b"):
+            sum(range(1000))
+        self.assertEqual([stage[0] for stage in timer.stages],["a","b"])
+        self.assertTrue(all(stage[2] >= 0 and stage[3] is None for stage in timer.stages))
+
+    def test_records_stage_even_on_error(self):
+        timer = StageTimer()
+        with self.assertRaises(ValueError):
+            with timer.stage("a"):
+                raise ValueError()
+        self.assertEqual(len(timer.stages),1)
+
+class TestBuildProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = BuildProfiler()
+        self.profiler.add("fast.md",[("read",10.0,0.001,None),("write",10.5,0.001,None)],pid=1)
+        self.profiler.add("slow.md",[("read",11.0,0.002,None),("inline",11.1,0.5,2048)],pid=2)
+
+    def test_totals_and_slowest(self):
+        self.assertEqual(self.profiler.slowest(1),["slow.md"])
+        totals = self.profiler.stage_totals()
+        self.assertAlmostEqual(totals["read"],0.003)
+        self.assertEqual(totals["blocks"],0.0)
+        self.assertEqual(self.profiler.stage_peaks(),{"inline":2048})
+        self.assertIn("slow.md",self.profiler.report())
+
+    def test_trace_events(self):
+        events = self.profiler.trace_events()
+        self.assertEqual([event["name"] for event in events],["read","write","read","inline"])
+        self.assertEqual(events[0]["ts"],0.0)
+        self.assertEqual(events[3]["ts"],1100000.0)
+        self.assertEqual(events[3]["dur"],500000.0)
+        self.assertEqual(events[3]["args"],{"page":"slow.md","peak_bytes":2048})
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+
+class TestProfiledBuild(unittest.TestCase):
+    def test_every_stage_recorded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp,"content")
+            os.makedirs(content)
+            for name in ("a","b"):
+                with open(os.path.join(content,name + ".md"),"w") as file:
+                    file.write(f"# {name}\n\nSome **text**")
+            template = os.path.join(tmp,"template.html")
+            with open(template,"w") as file:
+                file.write("{{ Title }}{{ Content }}")
+            profiler = BuildProfiler(trace_memory=True)
+            builder = SiteBuilder(content,template,os.path.join(tmp,"docs"),"/",1,os.path.join(tmp,"layouts"),profiler)
+            with redirect_stdout(StringIO()):
+                self.assertEqual(builder.build(),[])
+            tracemalloc.stop()
+            self.assertEqual(sorted(profiler.pages),[os.path.join(content,"a.md"),os.path.join(content,"b.md")])
+            for events in profiler.pages.values():
+                self.assertEqual(tuple(event[0] for event in events),PAGE_STAGES)
+            self.assertIn("inline",profiler.stage_peaks())
+            trace = os.path.join(tmp,"trace.json")
+            profiler.export_trace(trace)
+            with open(trace) as file:
+                self.assertEqual(len(json.load(file)["traceEvents"]),2 * len(PAGE_STAGES))
+            with open(os.path.join(tmp,"docs","a.html")) as file:
+                self.assertEqual(file.read(),"a<div><h1>a</h1><p>Some <b>text</b></p></div>")
+
+    def test_mapped_page_streamed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp,"a.md")
+            with open(src,"w") as file:
+                file.write("# a\n\nSome **text**")
+            init_page_context({"t.html":Template("{{ Title }}{{ Content }}")},UrlResolver("/"))
+            dst = os.path.join(tmp,"a.html")
+            result = profile_page((src,dst,MappedMarkdown(src),"t.html"))
+            self.assertIsNone(result["error"])
+            #rendered while it is written, so there are no separate render stages
+            self.assertEqual([stage[0] for stage in result["stages"]],["write","checks"])
+            with open(dst) as file:
+                self.assertEqual(file.read(),"a<div><h1>a</h1><p>Some <b>text</b></p></div>")
+
+if __name__ == "__main__":
+    unittest.main()
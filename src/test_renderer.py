@@ -0,0 +1,72 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from build import render_page
+from renderer import *
+
+TEMPLATE = "<title>{{ Title }}</title>\n<link href=\"/index.css\">\n<main>{{ Content }}</main>"
+MARKDOWN = "# Hello\n\nSome **bold** [link](/blog/) text\n\n![a](/images/a.png)\n\n- one\n- two"
+
+class TestRenderer(unittest.TestCase):
+    def test_matches_build_output(self):
+        renderer = Renderer(TEMPLATE,"/ssg/")
+        self.assertEqual(renderer.render(MARKDOWN),render_page(MARKDOWN,Template(TEMPLATE),"/ssg/"))
+        self.assertEqual(renderer.render(MARKDOWN),renderer.render(MARKDOWN))
+
+    def test_content_and_images(self):
+        renderer = Renderer(base_path="/ssg/",images={"/images/a.png":(4,3)})
+        content = renderer.render_content(MARKDOWN)
+        self.assertTrue(content.startswith("<div><h1>Hello</h1>"))
+        self.assertIn("<a href=\"/ssg/blog/\">link</a>",content)
+        self.assertIn("width=\"4\" height=\"3\"",content)
+
+    def test_templates_compiled_once(self):
+        renderer = Renderer(TEMPLATE)
+        other = "<h1>{{ Title }}</h1>{{ Content }}"
+        self.assertIs(renderer.compile(TEMPLATE),renderer.compile(TEMPLATE))
+        self.assertEqual(renderer.render(MARKDOWN,other),"<h1>Hello</h1>" + renderer.render_content(MARKDOWN))
+        self.assertEqual(len(renderer.templates),2)
+
+    def test_template_cache_bounded(self):
+        renderer = Renderer(TEMPLATE)
+        for i in range(TEMPLATE_CACHE_SIZE + 5):
+            renderer.compile(f"<p>{i}</p>{{{{ Content }}}}")
+        self.assertEqual(len(renderer.templates),TEMPLATE_CACHE_SIZE)
+
+    def test_minify(self):
+        self.assertEqual(Renderer(TEMPLATE,minify=True).compile(TEMPLATE).source,"<title>{{ Title }}</title><link href=/index.css><main>{{ Content }}</main>")
+
+    def test_blocks_cached_in_memory(self):
+        renderer = Renderer(TEMPLATE,block_cache_entries=2)
+        renderer.render(MARKDOWN)
+        self.assertEqual(renderer.stats(),{"hits":0,"misses":4})
+        self.assertEqual(len(renderer.block_cache.blocks),2)
+        self.assertEqual(Renderer(TEMPLATE,block_cache_entries=0).stats(),{"hits":0,"misses":0})
+
+    def test_no_disk_access(self):
+        renderer = Renderer(TEMPLATE)
+        with patch("builtins.open",side_effect=AssertionError("opened a file")), patch("builtins.print",side_effect=AssertionError("printed")):
+            renderer.render(MARKDOWN)
+            renderer.render(MARKDOWN)
+
+    def test_errors_raised(self):
+        with self.assertRaises(Exception):
+            Renderer(TEMPLATE).render("no title")
+
+    def test_concurrent_renders(self):
+        renderer = Renderer(TEMPLATE,"/ssg/")
+        pages = [f"# Page {i}\n\nText _{i % 7}_ and [x](/p/{i % 5})" for i in range(50)]
+        expected = [Renderer(TEMPLATE,"/ssg/",block_cache_entries=0).render(page) for page in pages]
+        results = {}
+        def work(worker):
+            results[worker] = [renderer.render(page) for page in pages for repeat in range(4)][::4]
+        threads = [threading.Thread(target=work,args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(results.values()),[expected] * 8)
+
+if __name__ == "__main__":
+    unittest.main()
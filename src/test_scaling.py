@@ -0,0 +1,154 @@
+import gc
+import math
+import os
+import time
+import tracemalloc
+import unittest
+
+from node_utils import *
+from links import page_links
+from search import page_terms
+from minify import minify_html
+
+#each input is measured at SIZES sizes, every one GROWTH times the one before
+GROWTH = 2
+SIZES = 4
+#allowed slope of log(cost) over log(size): linear is 1, n log n a little more, quadratic 2
+MAX_SLOPE = 1.4
+#the smallest input is doubled until one run takes at least this much cpu time, so timer noise stays small
+MIN_SECONDS = 0.01
+MAX_SIZE = 1 << 20
+#the smallest of the huge paragraphs; raise it by hand for a 50 MB run, which takes minutes
+PARAGRAPH_BYTES = 1 << 17
+
+def best_time(function,text,repeats=3):
+    #process cpu time, so other load on the machine does not count against the input
+    best = None
+    gc.disable()
+    try:
+        for repeat in range(repeats):
+            start = time.process_time()
+            function(text)
+            elapsed = time.process_time() - start
+            best = elapsed if best is None else min(best,elapsed)
+    finally:
+        gc.enable()
+    return best
+
+def peak_memory(function,text):
+    tracemalloc.start()
+    try:
+        function(text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def base_size(function,make_input,size):
+    while size < MAX_SIZE and best_time(function,make_input(size),1) < MIN_SECONDS:
+        size *= 2
+    return size
+
+def slope(sizes,costs):
+    #least squares fit of log(cost) against log(size)
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(cost,1e-9)) for cost in costs]
+    mean_x,mean_y = sum(xs) / len(xs),sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x,y in zip(xs,ys)) / sum((x - mean_x) ** 2 for x in xs)
+
+#pathological inline text, by the number of repeated tokens
+INLINE_INPUTS = {
+    "unmatched brackets":lambda n: "[" * n,
+    "unmatched image openers":lambda n: "![" * n,
+    "repeated bold":lambda n: "**" * n,
+    "repeated italic":lambda n: "_" * n,
+    "interleaved delimeters":lambda n: "**_" * n,
+    "open emphasis with text":lambda n: "**a _b " * n,
+    "unmatched backticks":lambda n: "`" * n,
+    "links never closed":lambda n: "[a](" * n,
+    "one link with a long tail":lambda n: "[x](" + "y" * n,
+    "plain words":lambda n: "word " * n,
+}
+
+#pathological documents, by the number of lines or blocks
+BLOCK_INPUTS = {
+    "long ordered list":lambda n: "".join(f"{i}. a\n" for i in range(1,n + 1)),
+    "broken ordered list":lambda n: "1. a\n" * n,
+    "long quote":lambda n: "> a\n" * n,
+    "many fences":lambda n: "```\n\n" * n,
+    "unclosed fence":lambda n: "```\n" + "a\n\n" * n,
+    "many one-line blocks":lambda n: "a\n\n" * n,
+    "blank lines":lambda n: "\n" * n,
+    "one huge heading marker":lambda n: "#" * n + " x",
+}
+
+#minutes of cpu time, so only run on request: SCALING_TESTS=1, or ./scaling.sh
+@unittest.skipUnless(os.environ.get("SCALING_TESTS"),"set SCALING_TESTS=1 to run the scaling tests")
+class ScalingTestCase(unittest.TestCase):
+    def assertLinear(self,function,make_input,size=256,memory=True):
+        """Cost over SIZES inputs, each GROWTH times the last, has to grow with a slope below MAX_SLOPE."""
+        size = base_size(function,make_input,size)
+        sizes = [size * GROWTH ** step for step in range(SIZES)]
+        inputs = [make_input(size) for size in sizes]
+        fit = slope(sizes,[best_time(function,text) for text in inputs])
+        self.assertLess(fit,MAX_SLOPE,f"time grew as size^{fit:.2f} (sizes {sizes[0]} to {sizes[-1]})")
+        if memory:
+            #peaks do not vary between runs, the smallest and largest input are enough
+            ends = [sizes[0],sizes[-1]]
+            fit = slope(ends,[max(peak_memory(function,inputs[0]),1),max(peak_memory(function,inputs[-1]),1)])
+            self.assertLess(fit,MAX_SLOPE,f"peak memory grew as size^{fit:.2f} (sizes {sizes[0]} to {sizes[-1]})")
+
+class TestInlineScaling(ScalingTestCase):
+    def check_inline(self,function,memory=True):
+        for name,make_input in INLINE_INPUTS.items():
+            with self.subTest(name):
+                self.assertLinear(function,make_input,memory=memory)
+
+    def test_text_to_textnodes(self):
+        self.check_inline(text_to_textnodes)
+
+    def test_split_nodes_regex(self):
+        self.check_inline(lambda text: split_nodes_link([TextNode(text,TextType.PLAIN)]))
+        self.check_inline(lambda text: split_nodes_image([TextNode(text,TextType.PLAIN)]))
+
+    def test_split_nodes_delimeter(self):
+        """Balanced delimeters only; unbalanced ones raise before doing any work."""
+        for delimeter,text_type in (("**",TextType.BOLD),("_",TextType.ITALIC),("`",TextType.CODE)):
+            with self.subTest(delimeter):
+                self.assertLinear(lambda text: split_nodes_delimeter([TextNode(text,TextType.PLAIN)],delimeter,text_type),lambda n: f"{delimeter}a{delimeter} " * n)
+
+    def test_page_render(self):
+        for compact in (False,True):
+            with self.subTest(compact=compact):
+                self.check_inline(lambda text: markdown_to_html_node("# T\n\n" + text,compact=compact).to_html())
+
+    def test_page_checks(self):
+        self.check_inline(page_links,memory=False)
+        self.check_inline(page_terms,memory=False)
+
+class TestBlockScaling(ScalingTestCase):
+    def check_blocks(self,function,memory=True):
+        for name,make_input in BLOCK_INPUTS.items():
+            with self.subTest(name):
+                self.assertLinear(function,make_input,memory=memory)
+
+    def test_markdown_to_blocks(self):
+        self.check_blocks(markdown_to_blocks)
+
+    def test_block_to_block_type(self):
+        self.check_blocks(block_to_block_type,memory=False)
+
+    def test_page_render(self):
+        self.check_blocks(lambda markdown: markdown_to_html_node("# T\n\n" + markdown,compact=True).to_html())
+
+    def test_minify(self):
+        self.assertLinear(minify_html,lambda n: "<p>  <b> x </b> </p>\n<!-- c -->\n" * n)
+
+class TestHugeParagraph(ScalingTestCase):
+    def test_huge_paragraph(self):
+        """One paragraph of PARAGRAPH_BYTES and up to eight times that, rendered the way the build does."""
+        sentence = "Some **bold** and _italic_ text with a [link](/a) and `code`. "
+        make_input = lambda n: "# T\n\n" + sentence * (n // len(sentence))
+        self.assertLinear(lambda markdown: markdown_to_html_node(markdown,compact=True).to_html(),make_input,PARAGRAPH_BYTES)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from build import *
+from search import *
+
+def read_json(path):
+    with open(path) as file:
+        return json.load(file)
+
+class TestPageTerms(unittest.TestCase):
+    def test_text_without_markup(self):
+        md = "# The Title\n\nSome **bold** and [a link](/x) with ![alt text](/a.png)\n\n- item _one_\n\n> quoted"
+        terms = page_terms(md)
+        self.assertEqual(terms["the"],1)
+        for term in ("title","some","bold","link","alt","text","item","one","quoted"):
+            self.assertIn(term,terms)
+        self.assertNotIn("x",terms)
+        self.assertNotIn("png",terms)
+
+    def test_counts_and_code(self):
+        terms = page_terms("# Elf\n\nelf Elf elves\n\n```\nprint(elf)\n```")
+        self.assertEqual(terms,{"elf":4,"elves":1,"print":1})
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join("blog","tom","index.html")),"/blog/tom/")
+        self.assertEqual(page_url("index.html"),"/")
+        self.assertEqual(page_url("about.html"),"/about.html")
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = SearchIndex(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def shard(self,prefix):
+        return read_json(os.path.join(self.tmp.name,SEARCH_DIR,prefix + ".json"))
+
+    def test_sharded_by_prefix(self):
+        self.index.update("a.html","/a.html","A",{"elf":2,"elves":1,"ring":1})
+        self.index.update("b.html","/b.html","B",{"elf":1})
+        self.assertEqual(self.index.save(),["el","ri"])
+        self.assertEqual(self.shard("el"),{"elf":[0,2,1,1],"elves":[0,1]})
+        self.assertEqual(self.shard("ri"),{"ring":[0,1]})
+        self.assertEqual(read_json(os.path.join(self.tmp.name,SEARCH_DIR,"pages.json")),[["/a.html","A"],["/b.html","B"]])
+
+    def test_incremental_updates(self):
+        self.index.update("a.html","/a.html","A",{"elf":1,"ring":1})
+        self.index.update("b.html","/b.html","B",{"tower":1})
+        self.index.save()
+        #a fresh index (next build) only rewrites the shards the changed page touches
+        index = SearchIndex(self.tmp.name)
+        index.update("b.html","/b.html","B",{"tower":1})
+        self.assertEqual(index.save(),[])
+        index.update("a.html","/a.html","A",{"elf":1,"song":1})
+        self.assertEqual(index.save(),["el","ri","so"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name,SEARCH_DIR,"ri.json")))
+        index.remove("a.html")
+        self.assertEqual(index.save(),["el","so"])
+        self.assertEqual(read_json(os.path.join(self.tmp.name,SEARCH_DIR,"pages.json")),[None,["/b.html","B"]])
+        #ids of removed pages are reused
+        index.update("c.html","/c.html","C",{"tower":2})
+        index.save()
+        self.assertEqual(self.shard("to"),{"tower":[0,2,1,1]})
+
+    def test_ids_reused_smallest_first(self):
+        for name in "abcde":
+            self.index.update(f"{name}.html",f"/{name}.html",name,{name:1})
+        self.index.remove("d.html")
+        self.index.remove("b.html")
+        self.index.save()
+        #the free ids are found again when the index is loaded
+        index = SearchIndex(self.tmp.name)
+        for name in "fgh":
+            index.update(f"{name}.html",f"/{name}.html",name,{name:1})
+        self.assertEqual([index.pages[f"{name}.html"]["id"] for name in "fgh"],[1,3,5])
+
+class TestSearchBuild(unittest.TestCase):
+    def test_index_follows_builds(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp,"content")
+            template = os.path.join(tmp,"template.html")
+            dest = os.path.join(tmp,"docs")
+            os.makedirs(os.path.join(content,"blog"))
+            with open(template,"w") as file:
+                file.write("{{ Content }}")
+            for path,text in (("index.md","# Home\n\nWelcome"),(os.path.join("blog","post.md"),"# Post\n\nWelcome back")):
+                with open(os.path.join(content,path),"w") as file:
+                    file.write(text)
+            with redirect_stdout(StringIO()):
+                #pages built before search was turned on are rendered again to be indexed
+                SiteBuilder(content,template,dest,"/ssg/",layouts_dir=os.path.join(tmp,"layouts")).build()
+                builder = SiteBuilder(content,template,dest,"/ssg/",layouts_dir=os.path.join(tmp,"layouts"),search=True)
+                builder.build()
+                self.assertEqual(len(builder.changed),2)
+                os.remove(os.path.join(content,"blog","post.md"))
+                builder.build()
+            self.assertEqual(read_json(os.path.join(dest,SEARCH_DIR,"we.json")),{"welcome":[1,1]})
+            self.assertEqual(read_json(os.path.join(dest,SEARCH_DIR,"pages.json")),[None,["/ssg/","Home"]])
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from build import SiteBuilder
+from shards import *
+from test_utils import write_file
+
+def read_tree(root):
+    files = {}
+    for dirpath,dirnames,filenames in os.walk(root):
+        for filename in filenames:
+            if filename.startswith("."):
+                continue
+            path = os.path.join(dirpath,filename)
+            with open(path) as file:
+                files[os.path.relpath(path,root)] = file.read()
+    return files
+
+class TestShardOf(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"),(2,4))
+        for text in ("0/4","5/4","2","a/b"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_stable_and_covering(self):
+        sources = [f"blog/post{i}.md" for i in range(200)]
+        assigned = [shard_of(source,4) for source in sources]
+        self.assertEqual(assigned,[shard_of(source,4) for source in sources])
+        self.assertEqual(set(assigned),{1,2,3,4})
+        #the same page lands in the same shard whatever the path separator
+        self.assertEqual(shard_of(os.path.join("blog","post1.md"),4),shard_of("blog/post1.md",4))
+
+class TestMergeShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name,"content")
+        self.template = os.path.join(self.tmp.name,"template.html")
+        self.shards = os.path.join(self.tmp.name,"shards")
+        self.docs = os.path.join(self.tmp.name,"docs")
+        write_file(self.template,"<title>{{ Title }}</title>{{ Content }}")
+        for i in range(10):
+            write_file(os.path.join(self.content,f"dir{i % 2}",f"page{i}.md"),f"# Page {i}\n\n[next](/dir{(i + 1) % 2}/page{(i + 1) % 10}.html) page")
+        self.expected = [os.path.join(f"dir{i % 2}",f"page{i}.html") for i in range(10)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self,dest,shard=None):
+        builder = SiteBuilder(self.content,self.template,dest,"/",layouts_dir=os.path.join(self.tmp.name,"layouts"),search=True,shard=shard)
+        with redirect_stdout(StringIO()):
+            self.assertEqual(builder.build(),[])
+        return builder
+
+    def merge(self):
+        with redirect_stdout(StringIO()):
+            return merge_shards(self.shards,self.docs,self.expected)
+
+    def test_merged_shards_match_single_build(self):
+        builders = [self.build(shard_root(self.shards,i,3),(i,3)) for i in (1,2,3)]
+        self.assertEqual(sum(len(builder.pages) for builder in builders),10)
+        #links to pages of other shards are not reported as broken
+        self.assertEqual([builder.broken_links for builder in builders],[[],[],[]])
+        self.assertEqual(self.merge(),[])
+        single = os.path.join(self.tmp.name,"single")
+        self.build(single)
+        self.assertEqual(read_tree(self.docs),read_tree(single))
+        self.assertEqual(load_manifest(manifest_path(self.docs)),load_manifest(manifest_path(single)))
+
+    def test_remerge_copies_only_changes(self):
+        for i in (1,2):
+            self.build(shard_root(self.shards,i,2),(i,2))
+        self.merge()
+        os.remove(os.path.join(self.content,"dir0","page0.md"))
+        self.expected.remove(os.path.join("dir0","page0.html"))
+        for i in (1,2):
+            self.build(shard_root(self.shards,i,2),(i,2))
+        with redirect_stdout(StringIO()) as out:
+            self.assertEqual(merge_shards(self.shards,self.docs,self.expected),[])
+        self.assertIn("9 pages merged from 2 shards: 0 copied, 9 unchanged, 1 removed.",out.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(self.docs,"dir0","page0.html")))
+
+    def test_missing_shard_and_pages(self):
+        self.build(shard_root(self.shards,1,2),(1,2))
+        self.assertEqual(self.merge(),[f"missing shard {shard_root(self.shards,2,2)}"])
+        os.makedirs(shard_root(self.shards,2,2))
+        problems = self.merge()
+        self.assertTrue(problems)
+        self.assertTrue(all(problem.endswith("was not built by any shard") for problem in problems))
+        self.assertFalse(os.path.exists(self.docs))
+
+    def test_collision(self):
+        self.build(shard_root(self.shards,1,2))
+        self.build(shard_root(self.shards,2,2))
+        problems = self.merge()
+        self.assertEqual(len(problems),10)
+        self.assertIn("was built by both",problems[0])
+
+    def test_mixed_splits(self):
+        os.makedirs(shard_root(self.shards,1,1))
+        os.makedirs(shard_root(self.shards,1,2))
+        self.assertEqual(self.merge(),[f"{self.shards} mixes splits into 1, 2 shards"])
+
+if __name__ == "__main__":
+    unittest.main()
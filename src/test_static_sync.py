@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+
+from static_sync import *
+from test_utils import write_file
+
+def read_file(path):
+    with open(path,"rb") as file:
+        return file.read()
+
+class TestSyncTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name,"static")
+        self.dst = os.path.join(self.tmp.name,"docs")
+        write_file(os.path.join(self.src,"index.css"),b"body{}")
+        write_file(os.path.join(self.src,"images","a.png"),b"\x89PNG" + bytes(5000))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_copies_then_skips(self):
+        self.assertEqual(sync_tree(self.src,self.dst),(["index.css",os.path.join("images","a.png")],[]))
+        self.assertEqual(read_file(os.path.join(self.dst,"images","a.png")),b"\x89PNG" + bytes(5000))
+        self.assertEqual(sync_tree(self.src,self.dst),([],[]))
+
+    def test_changed_file_copied(self):
+        sync_tree(self.src,self.dst)
+        write_file(os.path.join(self.src,"index.css"),b"body{color:red}")
+        self.assertEqual(sync_tree(self.src,self.dst),(["index.css"],[]))
+        self.assertEqual(read_file(os.path.join(self.dst,"index.css")),b"body{color:red}")
+
+    def test_orphans_removed_but_pages_kept(self):
+        write_file(os.path.join(self.dst,"index.html"),b"<html>")
+        sync_tree(self.src,self.dst)
+        os.remove(os.path.join(self.src,"images","a.png"))
+        self.assertEqual(sync_tree(self.src,self.dst),([],[os.path.join("images","a.png")]))
+        self.assertFalse(os.path.exists(os.path.join(self.dst,"images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dst,"index.html")))
+
+    def test_checksum_mode(self):
+        sync_tree(self.src,self.dst,checksum=True)
+        self.assertEqual(sync_tree(self.src,self.dst,checksum=True),([],[]))
+        #same size and mtime, different content
+        path = os.path.join(self.src,"index.css")
+        stat = os.stat(path)
+        write_file(path,b"BODY{}")
+        os.utime(path,ns=(stat.st_atime_ns,stat.st_mtime_ns))
+        self.assertEqual(sync_tree(self.src,self.dst,checksum=True),(["index.css"],[]))
+        self.assertEqual(read_file(os.path.join(self.dst,"index.css")),b"BODY{}")
+
+    def test_hardlink_mode(self):
+        sync_tree(self.src,self.dst,hardlink=True)
+        self.assertTrue(os.path.samefile(os.path.join(self.src,"index.css"),os.path.join(self.dst,"index.css")))
+        self.assertEqual(sync_tree(self.src,self.dst,hardlink=True),([],[]))
+
+class TestCopyFileData(unittest.TestCase):
+    def test_fallback_from_offset(self):
+        data = os.urandom(100000)
+        fsrc = BytesIO(data)
+        fdst = BytesIO()
+        #an invalid descriptor makes the kernel paths fail, so copyfileobj has to finish the job
+        fsrc.fileno = lambda: -1
+        fdst.fileno = lambda: -1
+        copy_file_data(fsrc,fdst,len(data))
+        self.assertEqual(fdst.getvalue(),data)
+
+if __name__ == "__main__":
+    unittest.main()
+
+class TestFingerprintTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name,"static")
+        self.dst = os.path.join(self.tmp.name,"docs")
+        write_file(os.path.join(self.src,"index.css"),b"body{background:url(/images/a.png)}")
+        write_file(os.path.join(self.src,"images","a.png"),b"\x89PNG" + bytes(50))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hashed_names_and_css_rewritten(self):
+        copied,removed,assets = fingerprint_tree(self.src,self.dst)
+        image = assets["/images/a.png"]
+        self.assertRegex(image,r"^/images/a\.[0-9a-f]{8}\.png$")
+        self.assertRegex(assets["/index.css"],r"^/index\.[0-9a-f]{8}\.css$")
+        self.assertEqual(sorted(copied),sorted(path[1:] for path in assets.values()))
+        css = read_file(os.path.join(self.dst,assets["/index.css"][1:]))
+        self.assertEqual(css,f"body{{background:url({image})}}".encode())
+        self.assertEqual(fingerprint_tree(self.src,self.dst),([],[],assets))
+
+    def test_changed_image_renames_stylesheet(self):
+        copied,removed,assets = fingerprint_tree(self.src,self.dst)
+        write_file(os.path.join(self.src,"images","a.png"),b"\x89PNG" + bytes(60))
+        copied,removed,new_assets = fingerprint_tree(self.src,self.dst)
+        self.assertNotEqual(assets["/index.css"],new_assets["/index.css"])
+        self.assertEqual(sorted(removed),sorted(path[1:] for path in assets.values()))
+        self.assertFalse(os.path.exists(os.path.join(self.dst,"index.css")))
+
+    def test_replaces_plain_copies(self):
+        sync_tree(self.src,self.dst)
+        copied,removed,assets = fingerprint_tree(self.src,self.dst)
+        self.assertEqual(sorted(removed),sorted(["index.css",os.path.join("images","a.png")]))
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from templates import *
+from nodes import ParentNode,LeafNode
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(template.pieces,["<title>","{{ Title }}","</title><body>","{{ Content }}","</body>"])
+        self.assertEqual(template.slot_names(),["Title","Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{Content}}")
+        self.assertEqual(template.render({"Title":"Hi","Content":"<p>x</p>"}),"<title>Hi</title><p>x</p>")
+
+    def test_render_repeated_slot(self):
+        template = Template("{{ Title }} - {{ Title }}")
+        self.assertEqual(template.render({"Title":"Hi"}),"Hi - Hi")
+
+    def test_unknown_slot_left_alone(self):
+        template = Template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render({"Title":"Hi"}),"Hi {{ Author }}")
+
+    def test_values_are_not_rescanned(self):
+        template = Template("{{ Title }}{{ Content }}")
+        self.assertEqual(template.render({"Title":"{{ Content }}","Content":"x"}),"{{ Content }}x")
+
+    def test_iter_render_streams_nodes(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        content = ParentNode("p", [LeafNode(None, "x")])
+        self.assertEqual(list(template.iter_render({"Title":"Hi","Content":content})),["<title>","Hi","</title>","<p>","x","</p>"])
+
+    def test_no_slots(self):
+        template = Template("plain")
+        self.assertEqual(template.render({}),"plain")
+        self.assertEqual(Template("").render({}),"")
+
+class TestTemplateCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.default = os.path.join(self.tmp.name,"template.html")
+        self.layouts = os.path.join(self.tmp.name,"layouts")
+        os.makedirs(os.path.join(self.layouts,"blog"))
+        for path,text in ((self.default,"default"),(os.path.join(self.layouts,"blog.html"),"blog"),(os.path.join(self.layouts,"blog","tom.html"),"tom")):
+            with open(path,"w") as file:
+                file.write(text)
+        self.cache = TemplateCache(self.default,self.layouts)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_layout_selection(self):
+        self.assertEqual(self.cache.for_page("index.md").source,"default")
+        self.assertEqual(self.cache.for_page("contact/index.md").source,"default")
+        self.assertEqual(self.cache.for_page("blog/index.md").source,"blog")
+        self.assertEqual(self.cache.for_page("blog/majesty/index.md").source,"blog")
+        self.assertEqual(self.cache.for_page("blog/tom/index.md").source,"tom")
+        self.assertEqual(self.cache.for_page("blog/tom/deep/index.md").source,"tom")
+
+    def test_layout_of_absolute_path(self):
+        self.assertEqual(self.cache.layout_path("/tmp/evil.md"),self.default)
+        self.assertEqual(self.cache.layout_path("/evil.md"),self.default)
+
+    def test_templates_read_once(self):
+        first = self.cache.get(self.default)
+        with open(self.default,"w") as file:
+            file.write("changed")
+        self.assertIs(self.cache.get(self.default),first)
+        self.cache.invalidate(self.default)
+        self.assertEqual(self.cache.get(self.default).source,"changed")
+
+    def test_minified_once_when_compiled(self):
+        with open(self.default,"w") as file:
+            file.write("<head>\n  <title>{{ Title }}</title>\n</head>\n<body>\n  {{ Content }}\n</body>")
+        template = TemplateCache(self.default,self.layouts,minify=True).get(self.default)
+        self.assertEqual(template.source,"<head><title>{{ Title }}</title></head><body> {{ Content }} </body>")
+        self.assertEqual(template.slot_names(),["Title","Content"])
+
+if __name__ == "__main__":
+    unittest.main()
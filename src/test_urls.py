@@ -0,0 +1,43 @@
+import unittest
+
+from urls import *
+
+class TestUrlResolver(unittest.TestCase):
+    def test_base_path(self):
+        resolve = UrlResolver("/ssg/")
+        self.assertEqual(resolve("/blog/tom"),"/ssg/blog/tom")
+        self.assertEqual(resolve("/"),"/ssg/")
+
+    def test_other_urls_untouched(self):
+        resolve = UrlResolver("/ssg/")
+        for url in ("https://example.com/a","//cdn.example.com/a.js","relative/page","#top","mailto:a@b.c"):
+            self.assertEqual(resolve(url),url)
+
+    def test_assets(self):
+        resolve = UrlResolver("/ssg/",{"/index.css":"/index.3f9a2c1d.css"})
+        self.assertEqual(resolve("/index.css"),"/ssg/index.3f9a2c1d.css")
+        self.assertEqual(resolve("/index.css?v=1#x"),"/ssg/index.3f9a2c1d.css?v=1#x")
+        self.assertEqual(resolve("/other.css"),"/ssg/other.css")
+
+    def test_key(self):
+        key = UrlResolver("/").key
+        self.assertEqual(key,UrlResolver("/",{}).key)
+        self.assertNotEqual(key,UrlResolver("/ssg/").key)
+        self.assertNotEqual(key,UrlResolver("/",{"/a.css":"/a.1.css"}).key)
+
+    def test_resolve_attributes(self):
+        resolve = UrlResolver("/ssg/",{"/index.css":"/index.1.css"})
+        html = "<link href=\"/index.css\" rel=\"stylesheet\"><a href=\"https://x.org\">x</a><img src=\"/a.png\">"
+        self.assertEqual(resolve.resolve_attributes(html),"<link href=\"/ssg/index.1.css\" rel=\"stylesheet\"><a href=\"https://x.org\">x</a><img src=\"/ssg/a.png\">")
+
+    def test_resolve_unquoted_attributes(self):
+        resolve = UrlResolver("/ssg/")
+        self.assertEqual(resolve.resolve_attributes("<link href=/index.css rel=stylesheet>"),"<link href=/ssg/index.css rel=stylesheet>")
+
+    def test_resolve_css(self):
+        resolve = UrlResolver("/",{"/a.png":"/a.1.png"})
+        self.assertEqual(resolve.resolve_css("a{background:url('/a.png')} b{background:url(b.png)}"),"a{background:url('/a.1.png')} b{background:url(b.png)}")
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name("images/a.png","3f9a2c1d4e"),"images/a.3f9a2c1d.png")
+        self.assertEqual(fingerprint_name("LICENSE","3f9a2c1d4e"),"LICENSE.3f9a2c1d")
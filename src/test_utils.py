@@ -0,0 +1,10 @@
+import os
+
+def write_file(path,data):
+    #text or bytes, creating directories as needed
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path,"wb" if isinstance(data,bytes) else "w") as file:
+        file.write(data)
+    #make sure the change is visible even on coarse mtime filesystems
+    stat = os.stat(path)
+    os.utime(path,ns=(stat.st_atime_ns,stat.st_mtime_ns + 1000000000))
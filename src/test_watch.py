@@ -0,0 +1,126 @@
+import os
+import tempfile
+import time
+import unittest
+import urllib.error
+import urllib.request
+from contextlib import redirect_stdout
+from io import StringIO
+
+from watch import *
+from test_utils import write_file
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+class TestSnapshots(unittest.TestCase):
+    def test_diff(self):
+        old = {"a":(1,1),"b":(1,1),"c":(1,1)}
+        new = {"a":(1,1),"b":(2,1),"d":(1,1)}
+        self.assertEqual(diff_snapshots(old,new),{"b","c","d"})
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_file(os.path.join(tmp,"x","y.md"),"y")
+            write_file(os.path.join(tmp,"t.html"),"t")
+            files = snapshot([os.path.join(tmp,"x"),os.path.join(tmp,"t.html"),os.path.join(tmp,"missing")])
+            self.assertEqual(sorted(files),[os.path.join(tmp,"t.html"),os.path.join(tmp,"x","y.md")])
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root,"content")
+        self.static = os.path.join(root,"static")
+        self.template = os.path.join(root,"template.html")
+        self.layouts = os.path.join(root,"layouts")
+        self.dest = os.path.join(root,"docs")
+        write_file(self.template,TEMPLATE)
+        write_file(os.path.join(self.content,"index.md"),"# Home")
+        write_file(os.path.join(self.content,"blog","post.md"),"# Post")
+        write_file(os.path.join(self.static,"index.css"),"body{}")
+        self.builder = SiteBuilder(self.content,self.template,self.dest,"/",1,self.layouts)
+        with redirect_stdout(StringIO()):
+            copy_static(self.static,self.dest)
+            self.builder.build()
+        self.watcher = SiteWatcher(self.builder,self.static,self.layouts)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rebuild(self):
+        with redirect_stdout(StringIO()):
+            return sorted(self.watcher.rebuild(self.watcher.poll()))
+
+    def test_markdown_change_rebuilds_that_page(self):
+        write_file(os.path.join(self.content,"blog","post.md"),"# Changed")
+        self.assertEqual(self.rebuild(),[os.path.join("blog","post.html")])
+
+    def test_new_and_deleted_pages(self):
+        write_file(os.path.join(self.content,"new.md"),"# New")
+        self.assertEqual(self.rebuild(),["new.html"])
+        os.remove(os.path.join(self.content,"new.md"))
+        self.assertEqual(self.rebuild(),["new.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest,"new.html")))
+
+    def test_template_change_rebuilds_all_pages(self):
+        write_file(self.template,TEMPLATE.replace("<html>","<html lang=\"en\">"))
+        self.assertEqual(self.rebuild(),[os.path.join("blog","post.html"),"index.html"])
+
+    def test_new_layout_moves_pages(self):
+        write_file(os.path.join(self.layouts,"blog.html"),"<main>{{ Content }}</main>")
+        self.assertEqual(self.rebuild(),[os.path.join("blog","post.html")])
+        write_file(os.path.join(self.layouts,"blog.html"),"<article>{{ Content }}</article>")
+        self.assertEqual(self.rebuild(),[os.path.join("blog","post.html")])
+
+    def test_static_change_copies_that_file(self):
+        write_file(os.path.join(self.static,"index.css"),"body{color:red}")
+        self.assertEqual(self.rebuild(),["index.css"])
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.rebuild(),[])
+
+class TestWatchServer(unittest.TestCase):
+    def test_reload_script_injected(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_file(os.path.join(tmp,"index.html"),"<html><body><p>hi</p></body></html>")
+            hub = ReloadHub()
+            server = start_server(tmp,0,hub)
+            try:
+                port = server.server_address[1]
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/") as response:
+                    page = response.read().decode()
+                self.assertIn(RELOAD_SCRIPT + "</body>",page)
+                with open(os.path.join(tmp,"index.html")) as file:
+                    self.assertNotIn(RELOAD_PATH,file.read())
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_served_under_base_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_file(os.path.join(tmp,"index.html"),"<html><body><p>hi</p></body></html>")
+            write_file(os.path.join(tmp,"index.css"),"body{}")
+            server = start_server(tmp,0,ReloadHub(),"/ssg/")
+            try:
+                url = f"http://127.0.0.1:{server.server_address[1]}"
+                with urllib.request.urlopen(url + "/ssg/") as response:
+                    self.assertIn("<p>hi</p>",response.read().decode())
+                with urllib.request.urlopen(url + "/ssg/index.css") as response:
+                    self.assertEqual(response.read(),b"body{}")
+                with self.assertRaises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(url + "/index.css")
+                self.assertEqual(error.exception.code,404)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_hub_wakes_waiters(self):
+        hub = ReloadHub()
+        version = hub.version
+        threading.Timer(0.05,hub.notify).start()
+        start = time.perf_counter()
+        self.assertEqual(hub.wait(version,5),version + 1)
+        self.assertLess(time.perf_counter() - start,1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import re
+
+#attributes whose values are resolved against the base path and asset map
+URL_PROPS = ("href","src")
+#quoted, or unquoted as left by minify_html
+ATTRIBUTE_URL_PATTERN = re.compile(r"\b(href|src)=(?:\"([^\"]*)\"|([^\s\"'=<>`]+))")
+CSS_URL_PATTERN = re.compile(r"url\(\s*(['\"]?)(/[^'\")]*)\1\s*\)")
+FINGERPRINT_LENGTH = 8
+
+def path_end(url):
+    #where the query or fragment starts
+    cut = len(url)
+    for separator in "?#":
+        index = url.find(separator)
+        if index != -1:
+            cut = min(cut,index)
+    return cut
+
+class UrlResolver():
+    #site-absolute urls ("/images/a.png") -> base path plus fingerprinted asset name.
+    #images maps the same urls to (width, height) for the img attributes
+    def __init__(self,base_path="/",assets=None,images=None):
+        self.base_path = base_path
+        self.assets = assets or {}
+        self.images = images or {}
+        digest = hashlib.sha256(base_path.encode())
+        for path in sorted(self.assets):
+            digest.update(f"\0{path}\0{self.assets[path]}".encode())
+        for path in sorted(self.images):
+            digest.update(f"\0{path}\0{self.images[path]}".encode())
+        #changes whenever any resolved url could change
+        self.key = digest.hexdigest()
+
+    def __call__(self,url):
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+        cut = path_end(url)
+        path = self.assets.get(url[:cut],url[:cut])
+        return self.base_path + path[1:] + url[cut:]
+
+    def image_size(self,url):
+        return self.images.get(url[:path_end(url)])
+
+    def resolve_attributes(self,html):
+        #for trusted markup such as templates, where attributes are known to be real
+        return ATTRIBUTE_URL_PATTERN.sub(self.resolve_attribute,html)
+
+    def resolve_attribute(self,match):
+        if match[2] is None:
+            return f"{match[1]}={self(match[3])}"
+        return f"{match[1]}=\"{self(match[2])}\""
+
+    def resolve_css(self,css):
+        return CSS_URL_PATTERN.sub(lambda match: f"url({match[1]}{self(match[2])}{match[1]})",css)
+
+def fingerprint_name(rel_path,content_hash):
+    #images/a.png -> images/a.3f9a2c1d.png
+    root,ext = os.path.splitext(rel_path)
+    return f"{root}.{content_hash[:FINGERPRINT_LENGTH]}{ext}"
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from build import *
+
+RELOAD_PATH = "/__reload"
+RELOAD_SCRIPT = f"<script>new EventSource(\"{RELOAD_PATH}\").onmessage = () => location.reload();</script>"
+
+def snapshot(paths):
+    #(mtime, size) for every file under the given files and directories
+    files = {}
+    pending = [path for path in paths if os.path.exists(path)]
+    while pending:
+        path = pending.pop()
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns,stat.st_size)
+            continue
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns,stat.st_size)
+    return files
+
+def diff_snapshots(old,new):
+    changed = {path for path in new if old.get(path) != new[path]}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+def is_under(path,directory):
+    return os.path.commonpath([os.path.abspath(path),os.path.abspath(directory)]) == os.path.abspath(directory)
+
+class ReloadHub():
+    #browsers wait on the hub; every rebuild bumps the version and wakes them up
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self,version,timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version,timeout)
+            return self.version
+
+class SiteWatcher():
+    #maps changed files to the outputs that depend on them and rebuilds only those
+    def __init__(self,builder,static_dir,layouts_dir=LAYOUTS_DIR,image_sizes=None):
+        self.builder = builder
+        self.static_dir = static_dir
+        self.image_sizes = image_sizes or ImageSizes()
+        self.layouts_dir = layouts_dir
+        self.watched = [builder.content_dir,static_dir,builder.template_path,layouts_dir]
+        self.files = snapshot(self.watched)
+
+    def poll(self):
+        files = snapshot(self.watched)
+        changed = diff_snapshots(self.files,files)
+        self.files = files
+        return changed
+
+    def rebuild(self,changed):
+        #returns the output paths that were rewritten or removed
+        builder = self.builder
+        outputs = []
+        sources = set()
+        layouts_changed = False
+        for path in sorted(changed):
+            if is_under(path,self.static_dir):
+                continue
+            if is_under(path,builder.content_dir):
+                sources.add(os.path.relpath(path,builder.content_dir))
+                continue
+            #template change: every page rendered with it
+            using = builder.sources_using(path)
+            if using and os.path.isfile(path):
+                builder.templates.invalidate(path)
+                sources.update(using)
+            else:
+                layouts_changed = True
+        if any(is_under(path,self.static_dir) for path in changed):
+            copied,removed = sync_tree(self.static_dir,builder.dest_dir)
+            outputs.extend(copied + removed)
+            images = self.image_sizes.scan(self.static_dir)
+            if images != builder.resolver.images:
+                #image sizes are part of every page's hash, so this is a full rebuild
+                builder.set_assets(builder.resolver.assets,images)
+                layouts_changed = True
+        if layouts_changed:
+            #adding or removing a layout can move any page to another template
+            builder.templates.invalidate()
+            builder.build()
+            outputs.extend(builder.changed)
+        elif sources:
+            builder.build(sorted(sources))
+            outputs.extend(builder.changed)
+        return outputs
+
+class WatchHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.send_reload_events()
+            return
+        if not self.path.startswith(self.server.base_path):
+            self.send_error(404)
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            path = os.path.join(path,"index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            self.send_page(path)
+            return
+        super().do_GET()
+
+    def translate_path(self,path):
+        #pages are built to link under the base path, but sit at the root of the directory
+        return super().translate_path("/" + path[len(self.server.base_path):])
+
+    def send_page(self,path):
+        #inject the live reload client into served pages, never into the files on disk
+        with open(path,"rb") as file:
+            page = file.read()
+        script = RELOAD_SCRIPT.encode()
+        if b"</body>" in page:
+            page = page.replace(b"</body>",script + b"</body>",1)
+        else:
+            page += script
+        self.send_response(200)
+        self.send_header("Content-Type","text/html; charset=utf-8")
+        self.send_header("Content-Length",str(len(page)))
+        self.send_header("Cache-Control","no-store")
+        self.end_headers()
+        self.wfile.write(page)
+
+    def send_reload_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type","text/event-stream")
+        self.send_header("Cache-Control","no-store")
+        self.end_headers()
+        hub = self.server.hub
+        version = hub.version
+        try:
+            while True:
+                new_version = hub.wait(version,15)
+                if new_version == version:
+                    #keep the connection alive
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    self.wfile.write(b"data: reload\n\n")
+                    version = new_version
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self,format,*args):
+        pass
+
+def start_server(directory,port,hub,base_path="/"):
+    server = ThreadingHTTPServer(("",port),partial(WatchHandler,directory=directory))
+    server.daemon_threads = True
+    server.hub = hub
+    server.base_path = base_path.rstrip("/") + "/"
+    threading.Thread(target=server.serve_forever,daemon=True).start()
+    return server
+
+def watch(builder,static_dir,port=8888,interval=0.2,layouts_dir=LAYOUTS_DIR):
+    copy_static(static_dir,builder.dest_dir)
+    image_sizes = ImageSizes()
+    builder.set_assets(images=image_sizes.scan(static_dir))
+    builder.build()
+    watcher = SiteWatcher(builder,static_dir,layouts_dir,image_sizes)
+    hub = ReloadHub()
+    server = start_server(builder.dest_dir,port,hub,builder.base_path)
+    print(f"Serving {builder.dest_dir} at http://localhost:{port}{builder.base_path} and watching for changes.")
+    try:
+        while True:
+            time.sleep(interval)
+            changed = watcher.poll()
+            if not changed:
+                continue
+            start = time.perf_counter()
+            outputs = watcher.rebuild(changed)
+            if outputs:
+                hub.notify()
+            print(f"Rebuilt {len(outputs)} outputs in {(time.perf_counter() - start) * 1000:.0f} ms.")
+    except KeyboardInterrupt:
+        server.shutdown()